@@ -0,0 +1,83 @@
+"""
+Compare the rich console UI with the headless JSON-lines interface.
+
+Measures (1) the import cost of each interface in a fresh interpreter and
+(2) the per-event cost of rendering a typical pipeline event sequence.
+
+    python benchmarks/bench_headless_ui.py --events 2000
+"""
+
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC)
+
+
+def import_seconds(module: str, repeats: int) -> float:
+    """Best-of-N wall time to import a module in a fresh interpreter."""
+    code = (
+        "import sys, time; sys.path.insert(0, %r); t = time.perf_counter(); "
+        "import %s; print(time.perf_counter() - t, 'rich' in sys.modules)" % (SRC, module)
+    )
+    best = float("inf")
+    loaded_rich = False
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split()
+        best = min(best, float(output[0]))
+        loaded_rich = output[1] == "True"
+    return best, loaded_rich
+
+
+def run_events(ui, events: int) -> float:
+    """Per-event time to emit the events of one processed email, repeated."""
+    draft = {"id": 1, "sender_email": "sender@example.com", "thread_id": "thread-1"}
+    started = time.perf_counter()
+    for i in range(events // 4):
+        ui.show_email_processing_start("sender@example.com", f"thread-{i}")
+        ui.show_sender_info_learned("name: Sender, company: Example")
+        ui.show_response_generation()
+        ui.show_draft_queued(draft, i)
+    return (time.perf_counter() - started) / (events // 4 * 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    rich_import, _ = import_seconds("ui.user_interface", args.repeats)
+    headless_import, headless_loaded_rich = import_seconds("ui.headless_interface", args.repeats)
+
+    from rich.console import Console
+    from ui.user_interface import UserInterface
+    from ui.headless_interface import HeadlessInterface
+    from services.event_log import JsonLinesLog
+
+    rich_ui = UserInterface()
+    rich_ui.console.console = Console(file=io.StringIO(), force_terminal=True, width=100)
+    rich_per_event = run_events(rich_ui, args.events)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        event_log = JsonLinesLog(os.path.join(tmp, "events.jsonl"))
+        headless_per_event = run_events(HeadlessInterface(event_log), args.events)
+        event_log.close()
+
+    print(f"import rich UI:        {rich_import * 1000:8.1f} ms")
+    print(f"import headless UI:    {headless_import * 1000:8.1f} ms (rich loaded: {headless_loaded_rich})")
+    print(f"rich per event:        {rich_per_event * 1e6:8.1f} us")
+    print(f"headless per event:    {headless_per_event * 1e6:8.1f} us")
+
+    if headless_loaded_rich:
+        print("FAIL: headless interface imported rich")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Benchmark suite for the email processing hot paths (no network).
+
+Uses the stand-in model and toolset from benchmarks/fakes.py and writes
+machine-readable results that benchmarks/compare_results.py can diff between
+commits.
+
+    python benchmarks/bench_hot_paths.py --json results/HEAD.json
+    python benchmarks/bench_hot_paths.py --quick --only memory
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, Any, List, Callable
+
+from fakes import FakeAgent, FakeChatModel, FakeEmailHandler, isolate_globals
+
+from mail.email_listener import EmailListener
+from services.email_processor import EmailProcessor
+from services.memory_manager import MemoryManager
+from services.near_duplicate import NearDuplicateIndex
+from services.response_generator import ResponseGenerator
+from services.sender_info_extractor import SenderInfoExtractor
+from services.thread_context import ThreadContextFetcher
+from services.tracing import get_tracer
+
+USER_INFO = {"name": "Nicolas Florez", "email": "nicolas.florez@example.com", "role": "Professional Email Assistant"}
+BODY_SENTENCE = "Hi Nicolas, my name is Alice and I'm 34 years old. I work at Example Corp, based in Berlin. "
+
+
+def measure(func: Callable[[int], None], number: int, repeat: int) -> Dict[str, float]:
+    """Per-operation time in microseconds; func(i) runs one operation."""
+    samples = []
+    counter = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func(counter)
+            counter += 1
+        samples.append((time.perf_counter() - started) / number * 1e6)
+    return {
+        "ops": number * repeat,
+        "min_us": min(samples),
+        "median_us": statistics.median(samples),
+        "mean_us": statistics.fmean(samples),
+        "max_us": max(samples)
+    }
+
+
+def build_memory(senders: int) -> MemoryManager:
+    """Memory with one email and extracted details per sender."""
+    memory = MemoryManager()
+    for i in range(senders):
+        sender = f"Sender {i} <sender{i}@example.com>"
+        memory.add_email_to_memory(sender, BODY_SENTENCE, f"thread-{i}", "Thanks!")
+        memory.add_sender_info(sender, {"name": f"Sender {i}", "company": "Example"})
+    return memory
+
+
+def bench_process_email(quick: bool) -> List[Dict[str, Any]]:
+    """EmailProcessor.process_email end to end: extraction, memory, thread context, generation."""
+    handler = FakeEmailHandler()
+    model = FakeChatModel()
+    processor = EmailProcessor(
+        MemoryManager(),
+        SenderInfoExtractor(model=model),
+        ResponseGenerator(model=model),
+        ThreadContextFetcher(handler.fetch_thread_messages, handler.fetch_message),
+        get_tracer()
+    )
+
+    def run(i: int):
+        result = processor.process_email(f"Alice <alice{i % 500}@example.com>", BODY_SENTENCE * 5,
+                                         f"thread-{i}", USER_INFO, f"thread-{i}-m2")
+        assert result["success"], result
+
+    return [{"name": "process_email", "params": {}, **measure(run, 200 if quick else 2000, 5)}]
+
+
+def bench_memory(quick: bool) -> List[Dict[str, Any]]:
+    """MemoryManager insert, context and stats at growing sender counts."""
+    results = []
+    for senders in ([1_000, 10_000] if quick else [1_000, 10_000, 100_000]):
+        memory = build_memory(senders)
+        params = {"senders": senders}
+
+        def insert(i: int):
+            memory.add_email_to_memory(f"Sender {i % senders} <sender{i % senders}@example.com>",
+                                       BODY_SENTENCE, f"new-{senders}-{i}", "Thanks!")
+
+        def context(i: int):
+            memory.get_sender_context(f"Sender {i % senders} <sender{i % senders}@example.com>")
+
+        def stats(i: int):
+            memory.get_memory_stats()
+
+        results.append({"name": "memory_insert", "params": params, **measure(insert, 5000, 5)})
+        results.append({"name": "memory_context", "params": params, **measure(context, 5000, 5)})
+        results.append({"name": "memory_stats", "params": params, **measure(stats, 3, 3)})
+    return results
+
+
+def bench_extraction(quick: bool) -> List[Dict[str, Any]]:
+    """Pattern-based sender extraction on bodies from 100 bytes to 1 MB."""
+    extractor = SenderInfoExtractor(model=FakeChatModel())
+    results = []
+    for size in ([100, 10_000, 100_000] if quick else [100, 1_000, 10_000, 100_000, 1_000_000]):
+        body = ("Lorem ipsum dolor sit amet. " * (size // 28 + 1))[:max(0, size - len(BODY_SENTENCE))] + BODY_SENTENCE
+        number = max(3, min(2000, 2_000_000 // size))
+        results.append({"name": "basic_extract_info", "params": {"bytes": size},
+                        **measure(lambda i: extractor._basic_extract_info(body), number, 5)})
+    return results
+
+
+def bench_parse_sender(quick: bool) -> List[Dict[str, Any]]:
+    """Sender address parsing."""
+    processor = EmailProcessor(MemoryManager(), SenderInfoExtractor(), ResponseGenerator(model=FakeChatModel()))
+    senders = ["Alice Smith <alice@example.com>", "bob@example.com", "\"Carol, Ops\" <carol@ops.example.com>"]
+    return [{"name": "parse_sender_email", "params": {},
+             **measure(lambda i: processor.parse_sender_email(senders[i % 3]), 20_000, 5)}]
+
+
+def bench_listener_dedup(quick: bool) -> List[Dict[str, Any]]:
+    """Listener handling of trigger bursts where each email is delivered several times."""
+    results = []
+    for duplicates in (1, 5, 20):
+        agent = FakeAgent()
+        listener = EmailListener(FakeEmailHandler(), agent)
+        listener.sender_filter.check = lambda sender: None
+
+        def burst(i: int, duplicates=duplicates):
+            payload = {"sender": f"Alice <alice{i}@example.com>", "message_text": BODY_SENTENCE,
+                       "thread_id": f"thread-{i}", "message_id": f"m-{i}"}
+            for _ in range(duplicates):
+                listener.handle_payload(payload)
+
+        stats = measure(burst, 500 if quick else 5000, 5)
+        stats["per_event_us"] = stats["median_us"] / duplicates
+        results.append({"name": "listener_dedup", "params": {"duplicates": duplicates},
+                        "processed": agent.processed, **stats})
+    return results
+
+
+def bench_near_duplicate(quick: bool) -> List[Dict[str, Any]]:
+    """Near-duplicate lookups (fingerprint plus banded search) against indexes of growing size."""
+    def word(n: int) -> str:
+        """Distinct letters-only word for n (base-26), so every indexed body has its own fingerprint."""
+        letters = ""
+        for _ in range(4):
+            n, digit = divmod(n, 26)
+            letters += chr(ord("a") + digit)
+        return letters
+
+    results = []
+    for entries in ([100, 5_000] if quick else [100, 1_000, 5_000]):
+        index = NearDuplicateIndex({"max_entries": entries})
+        for i in range(entries):
+            index.add(" ".join(word(i * 40 + j) for j in range(40)), "Thanks, we will follow up.",
+                      "Sender <sender@example.com>", {}, f"thread-{i}")
+        assert len({entry["fingerprint"] for entry in index._entries.values()}) > entries * 0.99
+
+        def lookup(i: int):
+            index.find(BODY_SENTENCE * 3, f"Alice <alice{i}@example.com>")
+
+        results.append({"name": "near_duplicate_find", "params": {"entries": entries},
+                        "hit_rate": index.get_stats()["hit_rate"], **measure(lookup, 500 if quick else 2000, 5)})
+    return results
+
+
+SUITES = {
+    "process_email": bench_process_email,
+    "memory": bench_memory,
+    "extraction": bench_extraction,
+    "parse_sender": bench_parse_sender,
+    "listener": bench_listener_dedup,
+    "near_duplicate": bench_near_duplicate
+}
+
+
+def git_commit() -> str:
+    """Current commit hash, if available."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--only", choices=sorted(SUITES), action="append", help="run only these suites")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes and fewer iterations")
+    args = parser.parse_args()
+
+    isolate_globals()
+    results: List[Dict[str, Any]] = []
+    for name in args.only or SUITES:
+        started = time.perf_counter()
+        suite_results = SUITES[name](args.quick)
+        for result in suite_results:
+            params = ", ".join(f"{k}={v}" for k, v in result["params"].items())
+            print(f"{result['name']:<22}{params:<18}{result['median_us']:>12.2f} us/op  (min {result['min_us']:.2f})")
+        print(f"  [{name}: {time.perf_counter() - started:.1f}s]")
+        results.extend(suite_results)
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "quick": args.quick,
+                "created_at": time.time(),
+                "results": results
+            }, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
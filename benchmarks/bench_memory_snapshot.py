@@ -0,0 +1,64 @@
+"""
+Cold-start benchmark for memory snapshots.
+
+Builds a MemoryManager with many senders, saves a snapshot, then measures how long
+a fresh MemoryManager takes to load it and serve the first context lookup.
+
+    python benchmarks/bench_memory_snapshot.py --senders 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from services.memory_manager import MemoryManager
+from services.memory_snapshot import save_snapshot, load_snapshot
+
+
+def build_memory(senders: int, emails_per_sender: int) -> MemoryManager:
+    """Populate a memory manager with synthetic senders."""
+    memory = MemoryManager()
+    for i in range(senders):
+        sender = f"Sender {i} <sender{i}@example.com>"
+        for j in range(emails_per_sender):
+            memory.add_email_to_memory(sender, f"Hello, this is email {j} from sender {i}. " * 4, f"thread-{i}-{j}", f"Reply {j}")
+            memory.mark_thread_processed(f"thread-{i}-{j}")
+        memory.add_sender_info(sender, {"name": f"Sender {i}", "company": "Example"})
+    return memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--senders", type=int, default=100_000)
+    parser.add_argument("--emails-per-sender", type=int, default=3)
+    parser.add_argument("--budget-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    memory = build_memory(args.senders, args.emails_per_sender)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "memory.snapshot")
+        saved = save_snapshot(memory, path)
+        del memory
+
+        started = time.perf_counter()
+        restored = MemoryManager()
+        load_snapshot(restored, path)
+        restored.get_sender_context(f"Sender {args.senders // 2} <sender{args.senders // 2}@example.com>")
+        cold_start = time.perf_counter() - started
+
+    print(f"senders:        {saved['senders']}")
+    print(f"snapshot size:  {saved['bytes'] / 1_000_000:.1f} MB")
+    print(f"save time:      {saved['seconds'] * 1000:.0f} ms")
+    print(f"cold start:     {cold_start * 1000:.0f} ms (budget {args.budget_seconds * 1000:.0f} ms)")
+
+    if cold_start > args.budget_seconds:
+        print("FAIL: cold start exceeded budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Guard cold-start time of the CLI against regressions.
+
+Runs ``python -X importtime`` on the entry point and the agent modules in fresh
+interpreters, reports the slowest imports, and fails (exit code 1) when a
+heavy SDK is loaded at import time, the import time exceeds the budget, or it
+regressed against a saved baseline.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --save-baseline benchmarks/startup_baseline.json
+    python benchmarks/bench_startup.py --baseline benchmarks/startup_baseline.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# Modules on the startup path; none of them may pull in the SDKs
+TARGET_MODULES = ["main", "core.email_manager", "agent.ai_agent", "mail.email_listener"]
+HEAVY_PACKAGES = ["composio", "composio_langgraph", "langchain_core", "langchain_openai", "openai", "pydantic"]
+
+
+def importtime(modules: List[str]) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Self and cumulative import time in microseconds per module, from a fresh interpreter."""
+    code = "import sys; sys.path.insert(0, %r); import %s" % (SRC, ", ".join(modules))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True, cwd=SRC)
+    self_us: Dict[str, int] = {}
+    cumulative_us: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, total, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        self_us[name] = int(own)
+        cumulative_us[name] = int(total)
+    return self_us, cumulative_us
+
+
+def help_seconds(repeats: int) -> float:
+    """Best-of-N wall time of `python main.py help`."""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(SRC, "main.py"), "help"],
+                       capture_output=True, check=True, cwd=SRC)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=250.0,
+                        help="maximum import time of the target modules")
+    parser.add_argument("--baseline", help="fail if import time regressed against this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed relative regression against the baseline")
+    parser.add_argument("--save-baseline", help="write the measured numbers to this file")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    # Best of N: import times are noisy, the minimum is the most reproducible
+    runs = [importtime(TARGET_MODULES) for _ in range(args.repeats)]
+    self_us, cumulative_us = min(runs, key=lambda r: sum(r[0].values()))
+    total_ms = sum(self_us.values()) / 1000
+    heavy = sorted(name for name in cumulative_us if name.split(".")[0] in HEAVY_PACKAGES)
+    help_s = help_seconds(args.repeats)
+
+    print(f"Import time of {', '.join(TARGET_MODULES)}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"`main.py help` wall time: {help_s * 1000:.1f} ms")
+    print(f"Modules loaded: {len(self_us)}")
+    print("Slowest imports (self time):")
+    for name, us in sorted(self_us.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {us / 1000:8.2f} ms  {name}")
+
+    failures = []
+    if heavy:
+        failures.append(f"heavy SDK modules loaded at import time: {', '.join(heavy[:10])}")
+    if total_ms > args.budget_ms:
+        failures.append(f"import time {total_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        limit = baseline["import_ms"] * (1 + args.tolerance)
+        print(f"Baseline: {baseline['import_ms']:.1f} ms (limit {limit:.1f} ms)")
+        if total_ms > limit:
+            failures.append(f"import time regressed: {total_ms:.1f} ms > {limit:.1f} ms")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"import_ms": round(total_ms, 1), "help_ms": round(help_s * 1000, 1),
+                       "python": sys.version.split()[0]}, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
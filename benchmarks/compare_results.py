@@ -0,0 +1,59 @@
+"""
+Compare two result files written by bench_hot_paths.py.
+
+Prints the median change per benchmark and exits with code 1 when any
+benchmark got slower than the threshold.
+
+    python benchmarks/compare_results.py results/base.json results/HEAD.json --threshold 0.15
+"""
+
+import argparse
+import json
+from typing import Dict, Any, Tuple
+
+
+def load(path: str) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """Metadata and results keyed by name and parameters."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    results = {}
+    for result in data["results"]:
+        params = ", ".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+        results[f"{result['name']}({params})"] = result
+    return data, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    base_meta, base = load(args.base)
+    head_meta, head = load(args.head)
+    print(f"base {base_meta.get('commit') or args.base}  ->  head {head_meta.get('commit') or args.head}")
+    if base_meta.get("quick") != head_meta.get("quick"):
+        print("warning: comparing a --quick run with a full run")
+
+    regressions = 0
+    for key in sorted(set(base) | set(head)):
+        if key not in base or key not in head:
+            print(f"  {key:<48} {'only in ' + ('head' if key in head else 'base')}")
+            continue
+        before, after = base[key]["median_us"], head[key]["median_us"]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif change < -args.threshold:
+            flag = "  faster"
+        print(f"  {key:<48} {before:>12.2f} -> {after:>12.2f} us  {change:+7.1%}{flag}")
+
+    print(f"{regressions} regression(s) above {args.threshold:.0%}")
+    raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
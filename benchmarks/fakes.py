@@ -0,0 +1,98 @@
+"""
+Offline stand-ins for the chat model and the Composio toolset used by the benchmarks.
+
+They return immediately with realistic shapes (``content`` and
+``usage_metadata`` for the model, trigger listeners and action responses for
+the toolset), so the benchmarks measure our code and not the network.
+"""
+
+import os
+import sys
+from typing import Dict, Any, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+class FakeMessage:
+    """Chat model response with content and token usage."""
+
+    def __init__(self, content: str, input_tokens: int, output_tokens: int):
+        self.content = content
+        self.usage_metadata = {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                               "total_tokens": input_tokens + output_tokens}
+        self.response_metadata = {}
+
+
+class FakeChatModel:
+    """Answers extraction prompts with key-value lines and everything else with a short reply."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, messages: List[Any]) -> FakeMessage:
+        self.calls += 1
+        prompt = messages[-1].content
+        if "Extract information in this format" in prompt:
+            content = "name: Alice Smith\ncompany: Example Corp\nlocation: Berlin"
+        else:
+            content = "Hi Alice,\n\nThanks for your email. Tuesday works for me.\n\nBest regards,\nNicolas"
+        return FakeMessage(content, input_tokens=len(prompt) // 4, output_tokens=len(content) // 4)
+
+
+class FakeTriggerListener:
+    """Accepts callbacks like the Composio trigger listener, without connecting."""
+
+    def callback(self, filters: Dict[str, Any]):
+        def register(func):
+            self.handler = func
+            return func
+        return register
+
+
+class FakeToolset:
+    """Composio toolset stand-in."""
+
+    def create_trigger_listener(self) -> FakeTriggerListener:
+        return FakeTriggerListener()
+
+
+class FakeEmailHandler:
+    """EmailHandler stand-in: a profile, a thread store and a send that always succeeds."""
+
+    def __init__(self):
+        self.toolset = FakeToolset()
+        self.user_profile = {"emailAddress": "nicolas.florez@example.com"}
+        self.sent = 0
+
+    def fetch_thread_messages(self, thread_id: str) -> List[Dict[str, Any]]:
+        return [{"id": f"{thread_id}-m{i}", "sender": "alice@example.com",
+                 "text": f"Earlier message {i} in {thread_id}.", "timestamp": str(i)} for i in range(3)]
+
+    def fetch_message(self, message_id: str) -> Dict[str, Any]:
+        return {"id": message_id, "sender": "alice@example.com", "text": "New message.", "timestamp": "9"}
+
+    def send_reply(self, recipient_email: str, message_text: str, thread_id: str) -> Dict[str, Any]:
+        self.sent += 1
+        return {"successful": True}
+
+
+class FakeAgent:
+    """Counts the emails the listener hands over."""
+
+    def __init__(self):
+        self.processed = 0
+
+    def process_incoming_email(self, sender: str, email_text: str, thread_id: str, message_id=None):
+        self.processed += 1
+
+
+def isolate_globals():
+    """Keep process-wide services from writing trace, usage or send state files during a benchmark."""
+    import services.tracing as tracing
+    import services.usage_tracker as usage_tracker
+    from config.agent_config import EMAIL_CONFIG
+
+    EMAIL_CONFIG["outbound_state_path"] = None
+
+    tracing._default_tracer = tracing.Tracer({"enabled": True, "export_path": None})
+    usage_tracker._default_tracker = usage_tracker.UsageTracker({"daily_token_budget": 0, "path": None})
@@ -4,7 +4,7 @@ Refactored AI Agent with clean separation of concerns.
 
 import sys
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -14,13 +14,18 @@ from core.email_manager import EmailManager
 class EmailAIAgent:
     """Clean AI Agent that delegates to specialized services."""
     
-    def __init__(self, email_handler):
+    def __init__(self, email_handler, ui=None, shared=None, account: Optional[str] = None,
+                 memory_shard: Optional[str] = None):
         self.email_handler = email_handler
-        self.email_manager = EmailManager(email_handler)
+        self.email_manager = EmailManager(email_handler, ui, shared, account, memory_shard)
     
-    def process_incoming_email(self, sender: str, email_text: str, thread_id: str):
+    def process_incoming_email(self, sender: str, email_text: str, thread_id: str, message_id: Optional[str] = None):
         """Process incoming email - delegates to EmailManager."""
-        self.email_manager.process_incoming_email(sender, email_text, thread_id)
+        self.email_manager.process_incoming_email(sender, email_text, thread_id, message_id)
+    
+    def process_queued_email(self, sender: str, email_text: str, thread_id: str, message_id: Optional[str] = None):
+        """Process a queued email, raising on failure - delegates to EmailManager."""
+        self.email_manager.process_queued_email(sender, email_text, thread_id, message_id)
     
     def get_user_info(self) -> Dict[str, Any]:
         """Get user information - delegates to UserProfile."""
@@ -38,6 +43,58 @@ class EmailAIAgent:
         """Display user profile - delegates to EmailManager."""
         self.email_manager.display_profile()
     
+    def list_drafts(self) -> List[Dict[str, Any]]:
+        """List pending drafts - delegates to EmailManager."""
+        return self.email_manager.list_drafts()
+    
+    def get_draft(self, draft_id: int) -> Optional[Dict[str, Any]]:
+        """Get a draft - delegates to EmailManager."""
+        return self.email_manager.get_draft(draft_id)
+    
+    def approve_draft(self, draft_id: int) -> Dict[str, Any]:
+        """Approve and send a draft - delegates to EmailManager."""
+        return self.email_manager.approve_draft(draft_id)
+    
+    def select_drafts(self, selection: str) -> List[int]:
+        """Resolve a draft selection - delegates to EmailManager."""
+        return self.email_manager.select_drafts(selection)
+    
+    def approve_drafts(self, draft_ids: List[int]) -> Dict[str, Any]:
+        """Approve and send several drafts - delegates to EmailManager."""
+        return self.email_manager.approve_drafts(draft_ids)
+    
+    def list_dead_letters(self) -> List[Dict[str, Any]]:
+        """List failed sends - delegates to EmailManager."""
+        return self.email_manager.list_dead_letters()
+    
+    def retry_dead_letter(self, key: str) -> Optional[Dict[str, Any]]:
+        """Retry a failed send - delegates to EmailManager."""
+        return self.email_manager.retry_dead_letter(key)
+    
+    def edit_draft(self, draft_id: int, response: str) -> Optional[Dict[str, Any]]:
+        """Edit a draft - delegates to EmailManager."""
+        return self.email_manager.edit_draft(draft_id, response)
+    
+    def reject_draft(self, draft_id: int) -> Optional[Dict[str, Any]]:
+        """Reject a draft and offer its alternative - delegates to EmailManager."""
+        return self.email_manager.reject_draft(draft_id)
+    
+    def warm_up(self):
+        """Warm up the models - delegates to EmailManager."""
+        self.email_manager.warm_up()
+    
+    def get_latency_report(self) -> List[Dict[str, Any]]:
+        """Per-stage latency percentiles - delegates to EmailManager."""
+        return self.email_manager.get_latency_report()
+    
+    def get_usage_report(self) -> Dict[str, Any]:
+        """Token usage report - delegates to EmailManager."""
+        return self.email_manager.get_usage_report()
+    
+    def shutdown(self):
+        """Flush background work - delegates to EmailManager."""
+        self.email_manager.shutdown()
+    
     # Legacy compatibility properties for existing code
     @property
     def email_memory(self):
@@ -10,6 +10,14 @@ AI_AGENT_CONFIG = {
     "response_tone": "professional",
     "enable_memory": True,
     "auto_reply": False,  # Changed to require approval
+    # A second draft generated in the background while the first is reviewed; offered when it is rejected
+    "alternative_draft": {
+        "enabled": False,  # Opt-in: every draft held for review costs a second model call
+        "workers": 2,  # Alternatives generated concurrently
+        "max_pending": 200,  # Alternatives held at once; the oldest is dropped beyond this
+        "style": "Make it noticeably shorter and more direct than a typical reply: two to four sentences, "
+                 "answering only what was asked."
+    },
     "system_prompt": """
 You are responding to emails as the Gmail account owner. Be personal, professional, and helpful.
 
@@ -42,19 +50,150 @@ Key instructions:
 
 # Email Processing Configuration
 EMAIL_CONFIG = {
-    "max_email_length": 10000,
+    "max_email_length": 10000,  # Cap applied after body normalization
+    "normalize_body": True,  # Strip HTML, quoted replies and signatures before any LLM call
+    "min_normalized_chars": 2,  # A normalized body with fewer letters/digits falls back to the original text
     "include_original_message": True,
     "reply_delay_seconds": 2,
     "enable_thread_context": True,
+    "thread_context": {
+        "cache_size": 256,  # Threads kept in the LRU cache
+        "max_messages": 10,  # Most recent earlier messages included in the prompt
+        "max_chars_per_message": 1500
+    },
     "max_retry_attempts": 3,
-    "require_approval": True  # Require approval before sending
+    "require_approval": True,  # Require approval before sending
+    "max_finished_drafts": 200,  # Sent and rejected drafts kept for reference; pending and failed ones always stay
+    "reuse_existing_connection": True,  # Skip OAuth when the entity already has an active Gmail connection
+    # Composio entity ids (one per Gmail account) served by this process; `--account` overrides
+    "accounts": ["default_user"],
+    "profile_cache": {
+        "path": "data/profile_{user_id}.json",  # On-disk copy, relative to the project root
+        "ttl_seconds": 3600,  # Older profiles are served while a background refresh runs
+        "retry_seconds": 60  # Minimum wait before retrying a failed refresh
+    },
+    # Inbound emails wait in a priority queue scored from local signals; aging lets low scores catch up.
+    # Not used by worker processes, where the durable queue keeps per-sender order.
+    "priority_scheduling": {
+        "enabled": True,
+        "workers": 1,  # Emails processed concurrently
+        "weights": {
+            "known_sender": 2,       # Sender has extracted details in memory
+            "per_prior_reply": 1,    # Per remembered email that got a reply...
+            "max_prior_replies": 3,  # ...counting at most this many
+            "active_thread": 2,      # Thread processed in the last recent_thread_seconds or in the sender's history
+            "urgent": 3,             # Any urgency keyword
+            "bulk": -3               # Any bulk-mail keyword
+        },
+        "urgency_keywords": ["urgent", "asap", "as soon as possible", "immediately", "emergency", "deadline",
+                             "critical", "today", "time-sensitive"],
+        "bulk_keywords": ["unsubscribe", "newsletter", "view in browser", "no longer wish to receive"],
+        "high_score": 4,  # Score at or above: high priority
+        "low_score": -1,  # Score at or below: low priority (bulk mail)
+        "aging_points_per_minute": 1.0,
+        "recent_thread_seconds": 3600,
+        "scan_chars": 2000  # Keywords are looked for in the start of the body
+    },
+    # Reuse the draft of a recently answered near-identical email (templated or bulk mail) for first
+    # contacts, rewriting only the greeting; SimHash fingerprints compared in bands
+    "near_duplicate": {
+        "enabled": True,
+        "max_distance": 5,   # Differing fingerprint bits (of 64) still counted as a duplicate
+        "bands": 8,          # Must exceed max_distance; more bands mean more candidates per lookup
+        "shingle_words": 3,
+        "min_words": 20,     # Shorter bodies are too generic to reuse a reply for
+        "scan_chars": 4000,
+        "max_entries": 5000,
+        "ttl_seconds": 7 * 24 * 3600
+    },
+    "send_workers": 4,  # Outbound queue worker threads (concurrent replies)
+    "retry_base_delay_seconds": 1.0,  # Backoff doubles per attempt, with +/-50% jitter
+    "retry_max_delay_seconds": 30.0,
+    "outbound_state_path": "data/outbound_state.jsonl"  # Append-only log of sent reply keys and dead letters; None keeps them in memory
+}
+
+# Auto-approval policy (only applies when AI_AGENT_CONFIG["auto_reply"] is True)
+APPROVAL_POLICY_CONFIG = {
+    # Trust rules, first match wins. A rule matches on "senders", "domains",
+    # "thread_participant" (the sender wrote earlier in a thread you have written in;
+    # needs enable_thread_context) or "min_prior_replies" (senders you have already replied to).
+    "rules": [
+        {"name": "allowlisted", "senders": [], "domains": []},
+        {"name": "known_participant", "thread_participant": True, "max_draft_length": 800},
+        {"name": "replied_before", "min_prior_replies": 1, "max_draft_length": 800}
+    ],
+    # Guards that always send the draft to review
+    "max_draft_length": 1200,
+    "excluded_keywords": ["invoice", "payment", "contract", "password", "legal", "urgent", "confidential"],
+    "audit_log_path": "data/approval_audit.jsonl"  # Relative to the project root; None disables the audit log
+}
+
+# Headless (daemon) mode Configuration
+HEADLESS_CONFIG = {
+    "event_log_path": "data/events.jsonl",  # Relative to the project root
+    "command_path": "data/commands.txt",  # Lines appended here are run as commands (drafts, approve, ...)
+    "flush_every_events": 50,
+    "flush_interval_seconds": 2.0
+}
+
+# Per-stage latency tracing
+TRACING_CONFIG = {
+    "enabled": True,
+    "export_path": "data/traces.jsonl",  # One JSON line per span; None disables the export
+    "flush_every_events": 200,
+    "flush_interval_seconds": 5.0,
+    "bucket_growth": 1.05  # Histogram bucket width; percentiles are within ~5%
+}
+
+# Token accounting and daily budget
+USAGE_CONFIG = {
+    "daily_token_budget": 2_000_000,  # Prompt + completion tokens per day; 0 disables the guard
+    # Cheaper behavior once the budget is used up: replies use this model with a shorter limit,
+    # sender details use pattern matching and summaries use the local backend
+    "budget_model": "gpt-4.1-nano",
+    "budget_max_tokens": 300,
+    "path": "data/usage_today.json",  # Today's totals, relative to the project root
+    "save_interval_seconds": 30,
+    "prices_per_million_tokens": {  # USD, used for cost estimates
+        "gpt-4o-mini": {"input": 0.15, "output": 0.60},
+        "gpt-4.1-nano": {"input": 0.10, "output": 0.40},
+        "gpt-4o": {"input": 2.50, "output": 10.00}
+    }
+}
+
+# Prometheus metrics endpoint (http://host:port/metrics)
+METRICS_CONFIG = {
+    "enabled": False,  # Opt-in: serves an unauthenticated HTTP endpoint while the agent runs
+    "host": "127.0.0.1",  # Local only
+    "port": 9464,
+    "prefix": "email_agent"
+}
+
+# Multi-process worker mode (`--workers N`, headless): the listener process queues events by sender
+WORKER_CONFIG = {
+    "workers": 0,  # Worker processes; 0 processes emails in the listener process
+    "queue_path": "data/work_queue.sqlite3",  # Durable event queue, relative to the project root
+    "poll_interval_seconds": 0.2,
+    "max_attempts": 3,  # Failed events are retried, then parked as failed in the queue
+    "retry_delay_seconds": 5.0,
+    "restart_delay_seconds": 5.0  # Minimum time between restarts of a crashed worker
+}
+
+# On-demand profiling ("profiler" command, SIGUSR1)
+PROFILER_CONFIG = {
+    "output_dir": "data/profiles",  # .folded (speedscope, flamegraph.pl) and .prof (snakeviz, pstats) files
+    "sample_interval_seconds": 0.005,
+    "default_window_seconds": 60,   # Windows stop by themselves after this long; 0 runs until stopped
+    "signal_mode": "sampling",      # Mode toggled by SIGUSR1
+    "max_stack_depth": 64
 }
 
 # Security and Privacy Settings
 SECURITY_CONFIG = {
     "enable_content_filtering": True,
-    "blocked_senders": [],
+    "blocked_senders": [],  # Exact addresses, domains ("@example.com") or wildcards ("*@news.*", "news*.example.com")
     "allowed_domains": [],  # Empty means all domains allowed
+    "block_noreply": True,  # Skip no-reply, mailer-daemon, notification and newsletter addresses (each skip is shown)
     "enable_phishing_detection": True,
     "log_conversations": True,
     "anonymize_logs": False
@@ -135,5 +274,43 @@ Email content:
 
 JSON response:"""
     },
+    "summarization": {
+        # Off by default: each fold is one extra model call per compact_batch_size emails from a sender
+        "enabled": False,
+        "backend": "openai",      # "openai" or "local" (offline stand-in for tests)
+        "model": "gpt-4o-mini",
+        "temperature": 0.2,
+        "keep_recent_raw": 3,     # Raw emails kept out of the summary and quoted verbatim
+        "compact_batch_size": 3,  # Fold older emails once this many are waiting
+        "max_summary_chars": 1200,
+        "summary_prompt": """
+You maintain a running summary of an email relationship for {sender}.
+
+Current summary:
+{summary}
+
+New exchanges to fold in:
+{exchanges}
+
+Rewrite the summary so it includes the important facts, requests, commitments and open questions
+from the new exchanges. Keep it under {max_chars} characters. Return only the summary text.
+"""
+    },
+    "thread_guard": {
+        "ttl_seconds": 30 * 24 * 3600,        # Processed ids are remembered for 30 to ~45 days
+        "exact_window_seconds": 6 * 3600,     # Recent ids are stored exactly (and can be un-marked)
+        "bucket_seconds": 600,
+        # Ids per 15-day filter generation: ~1,300 emails a day in ~70 KB; raise for shared inboxes
+        "expected_ids_per_generation": 20_000,
+        "false_positive_rate": 1e-6           # A false positive skips an email unanswered, so keep it low
+    },
+    "snapshot": {
+        "enabled": True,
+        "path": "data/memory.snapshot",  # Relative to the project root
+        # Per account (several accounts) and per worker shard (worker mode); shards written with
+        # another worker count are re-split over the current workers on startup
+        "namespaced_path": "data/memory_{namespace}.snapshot",
+        "save_interval_seconds": 60
+    },
     "max_email_length": 2000  # Increased to capture more context
 }
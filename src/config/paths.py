@@ -0,0 +1,16 @@
+"""
+Filesystem locations for runtime data (snapshots, caches, logs).
+"""
+
+import os
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+
+
+def resolve_data_path(path: str) -> str:
+    """Resolve a configured path relative to the project root and ensure its folder exists."""
+    if not os.path.isabs(path):
+        path = os.path.join(PROJECT_ROOT, path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
@@ -1,6 +1,5 @@
 from dotenv import load_dotenv
 import os
-from pydantic import SecretStr
 
 # Get the absolute path to the project root
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -9,18 +8,25 @@ env_file = os.path.join(project_root, ".env.local")
 # Load environment variables from .env.local
 load_dotenv(dotenv_path=env_file)
 
-# API Keys with default fallback to force non-None type
-COMPOSIO_API_KEY = os.getenv("COMPOSIO_API_KEY", "")
-GMAIL_INTEGRATION_ID = os.getenv("GMAIL_INTEGRATION_ID", "")
-_openai_api_key = os.getenv("OPENAI_API_KEY", "")
+# Keys are validated when first used, so offline commands start without them
+_REQUIRED_KEYS = ("COMPOSIO_API_KEY", "GMAIL_INTEGRATION_ID", "OPENAI_API_KEY")
 
-# Validation
-if not COMPOSIO_API_KEY:
-    raise ValueError("COMPOSIO_API_KEY not found in environment variables")
-if not GMAIL_INTEGRATION_ID:
-    raise ValueError("GMAIL_INTEGRATION_ID not found in environment variables")
-if not _openai_api_key:
-    raise ValueError("OPENAI_API_KEY not found in environment variables")
 
-# Convert OpenAI API key to SecretStr for ChatOpenAI compatibility
-OPENAI_API_KEY = SecretStr(_openai_api_key)
\ No newline at end of file
+def _require(name: str) -> str:
+    """Read a required key from the environment."""
+    value = os.getenv(name, "")
+    if not value:
+        raise ValueError(f"{name} not found in environment variables")
+    return value
+
+
+def __getattr__(name):
+    if name not in _REQUIRED_KEYS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = _require(name)
+    if name == "OPENAI_API_KEY":
+        # Convert OpenAI API key to SecretStr for ChatOpenAI compatibility
+        from pydantic import SecretStr
+        value = SecretStr(value)
+    globals()[name] = value
+    return value
@@ -4,5 +4,7 @@ Core application logic and user profile management.
 
 from .user_profile import UserProfile
 from .email_manager import EmailManager
+from .startup_graph import StartupGraph
+from .shared_resources import SharedResources
 
-__all__ = ['UserProfile', 'EmailManager']
+__all__ = ['UserProfile', 'EmailManager', 'StartupGraph', 'SharedResources']
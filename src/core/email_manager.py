@@ -2,50 +2,233 @@
 Email manager for coordinating email operations.
 """
 
-from typing import Optional
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional, Dict, Any, List, Set
+from services.alternative_drafts import AlternativeDrafts
+from services.approval_policy import ApprovalPolicy
+from services.body_normalizer import BodyNormalizer
+from services.draft_inbox import DraftInbox
 from services.email_processor import EmailProcessor
 from services.memory_manager import MemoryManager
+from services.memory_summarizer import MemorySummarizer
+from services.memory_snapshot import SnapshotScheduler, snapshot_path
+from services.near_duplicate import NearDuplicateIndex
+from services.outbound_queue import OutboundQueue
+from services.priority_scheduler import PriorityScheduler
+from services.profiler import get_profiler
 from services.sender_info_extractor import SenderInfoExtractor
 from services.response_generator import ResponseGenerator
+from services.thread_context import ThreadContextFetcher
+from services.metrics import get_metrics
+from services.tracing import get_tracer
+from services.usage_tracker import get_usage_tracker
 from core.user_profile import UserProfile
-from ui.user_interface import UserInterface
+from config.agent_config import MEMORY_CONFIG, EMAIL_CONFIG, AI_AGENT_CONFIG
+
+
+class ProcessingError(Exception):
+    """An email could not be processed; raised where the caller retries (the worker queue)."""
 
 
 class EmailManager:
     """Manages email operations and coordinates between services."""
     
-    def __init__(self, email_handler):
+    def __init__(self, email_handler, ui=None, shared=None, account: Optional[str] = None,
+                 memory_shard: Optional[str] = None):
         self.email_handler = email_handler
+        # Set when one process serves several mailboxes: `shared` (SharedResources) supplies the
+        # model clients and send pool, `account` namespaces memory snapshots and metrics.
+        # `memory_shard` names the sender partition a worker process owns in worker mode.
+        self.account = account
+        self.memory_shard = memory_shard
         self.user_profile = UserProfile(email_handler)
-        self.ui = UserInterface()
+        if ui is None:
+            from ui.user_interface import UserInterface
+            ui = UserInterface()
+        self.ui = ui
         
         # Initialize services
-        self.memory_manager = MemoryManager()
-        self.sender_info_extractor = SenderInfoExtractor()
-        self.response_generator = ResponseGenerator()
+        self.tracer = get_tracer()
+        summarizer = None
+        if MEMORY_CONFIG.get("summarization", {}).get("enabled", False):
+            summarizer = MemorySummarizer(backend=shared.summary_backend if shared else None)
+        self.memory_manager = MemoryManager(summarizer)
+        self.snapshot_scheduler = None
+        if MEMORY_CONFIG.get("snapshot", {}).get("enabled", False):
+            self._start_snapshots()
+        if shared is not None:
+            self.body_normalizer = shared.body_normalizer
+            self.sender_info_extractor = shared.sender_info_extractor
+            self.response_generator = shared.response_generator
+        else:
+            self.body_normalizer = BodyNormalizer() if EMAIL_CONFIG.get("normalize_body", True) else None
+            self.sender_info_extractor = SenderInfoExtractor()
+            self.response_generator = ResponseGenerator()
+        self.thread_context = None
+        if EMAIL_CONFIG.get("enable_thread_context", True):
+            self.thread_context = ThreadContextFetcher(
+                self.email_handler.fetch_thread_messages,
+                self.email_handler.fetch_message
+            )
+        self.duplicate_index = None
+        if EMAIL_CONFIG.get("near_duplicate", {}).get("enabled", False):
+            self.duplicate_index = NearDuplicateIndex()
         self.email_processor = EmailProcessor(
             self.memory_manager,
             self.sender_info_extractor,
-            self.response_generator
+            self.response_generator,
+            self.thread_context,
+            duplicate_index=self.duplicate_index
         )
+        self.draft_inbox = DraftInbox()
+        self.approval_policy = ApprovalPolicy()
+        self.alternatives = None
+        if AI_AGENT_CONFIG.get("alternative_draft", {}).get("enabled", False):
+            self.alternatives = AlternativeDrafts(self.response_generator)
+        self.scheduler = None
+        if EMAIL_CONFIG.get("priority_scheduling", {}).get("enabled", False):
+            self.scheduler = PriorityScheduler(self.memory_manager, self._process_incoming_email)
+        self.profiler = get_profiler()
+        # The shared send pool is stopped by its owner once every account has shut down
+        self.owns_outbound_queue = shared is None
+        self.outbound_queue = OutboundQueue(self.email_handler.send_reply) if shared is None else shared.outbound_queue
+        self.outbound_queue.register_sender(self.account, self.email_handler.send_reply)
+        self.metrics = get_metrics()
+        self._register_metrics()
     
-    def process_incoming_email(self, sender: str, email_text: str, thread_id: str):
-        """Process incoming email and handle response."""
+    def _register_metrics(self):
+        """Expose queue, inbox and memory sizes; they are read when the endpoint is scraped."""
+        memory = self.memory_manager
+        # Per-mailbox values carry an account label when several accounts share the process
+        labels = {"account": self.account} if self.account else {}
+        self.metrics.register_callback("drafts_pending", "gauge", "Drafts awaiting approval",
+                                       self.draft_inbox.pending_count, **labels)
+        self.metrics.register_callback("memory_senders", "gauge", "Senders with email history",
+                                       lambda: len(memory.email_memory), **labels)
+        self.metrics.register_callback("memory_sender_info", "gauge", "Senders with extracted details",
+                                       lambda: len(memory.sender_info), **labels)
+        self.metrics.register_callback("memory_sender_summaries", "gauge", "Senders with a rolling summary",
+                                       lambda: len(memory.sender_summaries), **labels)
+        self.metrics.register_callback("memory_processed_threads", "gauge", "Thread ids remembered as processed",
+                                       lambda: len(memory.processed_threads), **labels)
+        if self.owns_outbound_queue:
+            # A shared send pool is registered once by SharedResources
+            self.outbound_queue.register_metrics(self.metrics)
+        if self.scheduler is not None:
+            self.metrics.register_callback("priority_queue_depth", "gauge", "Emails waiting to be processed by priority",
+                                           self.scheduler.depth_by_priority, **labels)
+        if self.thread_context is not None:
+            threads = self.thread_context
+            self.metrics.register_callback(
+                "thread_cache_requests_total", "counter", "Thread context lookups by result",
+                lambda: {
+                    (("result", "hit"),): threads.hits,
+                    (("result", "incremental"),): threads.incremental_fetches,
+                    (("result", "full"),): threads.full_fetches,
+                    (("result", "error"),): threads.errors
+                },
+                **labels
+            )
+    
+    def _start_snapshots(self):
+        """Restore memory from the last snapshot and keep saving it in the background."""
+        self.snapshot_scheduler = SnapshotScheduler(self.memory_manager,
+                                                    snapshot_path(self.account, self.memory_shard))
+        try:
+            result = self.snapshot_scheduler.load()
+            if result:
+                self.ui.show_processing_status(
+                    f"Restored memory for {result['senders']} senders in {result['seconds'] * 1000:.0f} ms"
+                )
+        except Exception as e:
+            self.ui.show_error(f"Could not load memory snapshot: {e}")
+        self.snapshot_scheduler.start()
+    
+    def warm_up(self):
+        """Build the chat models ahead of the first email (shared models are built once)."""
+        _ = self.response_generator.model
+        _ = self.sender_info_extractor.model
+    
+    def shutdown(self):
+        """Flush background work before exit."""
+        if self.scheduler is not None:
+            dropped = self.scheduler.stop()
+            if dropped:
+                threads = ", ".join(item["thread_id"] for item in dropped)
+                self.ui.show_error(f"{len(dropped)} queued emails were not processed before shutdown "
+                                   f"(threads: {threads})")
+        if self.alternatives is not None:
+            self.alternatives.shutdown()
+        if self.owns_outbound_queue:
+            self.outbound_queue.stop()
+        self.tracer.flush()
+        get_usage_tracker().save()
+        if self.snapshot_scheduler:
+            result = self.snapshot_scheduler.stop()
+            if result and "error" in result:
+                self.ui.show_error(f"Could not save memory snapshot: {result['error']}")
+    
+    def process_incoming_email(self, sender: str, email_text: str, thread_id: str, message_id: Optional[str] = None):
+        """Process incoming email now, or queue it by priority when scheduling is enabled."""
+        if self.scheduler is None:
+            self._process_incoming_email(sender, email_text, thread_id, message_id)
+            return
+        scored = self.scheduler.submit(sender, email_text, thread_id, message_id)
+        if scored["waiting"]:
+            self.ui.show_processing_status(
+                f"Queued email from {self.email_processor.parse_sender_email(sender)} "
+                f"({scored['priority']} priority, {scored['waiting']} ahead)"
+            )
+    
+    def process_queued_email(self, sender: str, email_text: str, thread_id: str, message_id: Optional[str] = None):
+        """Process an email from the durable work queue now; raises ProcessingError so the queue retries it."""
+        self._process_incoming_email(sender, email_text, thread_id, message_id, raise_errors=True)
+    
+    def _process_incoming_email(self, sender: str, email_text: str, thread_id: str, message_id: Optional[str] = None,
+                                raise_errors: bool = False):
+        """Process incoming email and handle response; profiles taken meanwhile are attributed to it."""
+        with self.profiler.email(self.tracer.current_trace_id):
+            self._handle_incoming_email(sender, email_text, thread_id, message_id, raise_errors)
+    
+    def _handle_incoming_email(self, sender: str, email_text: str, thread_id: str, message_id: Optional[str] = None,
+                               raise_errors: bool = False):
+        """Run the pipeline for one email and hand the response to approval."""
+        result = None
         try:
             sender_email = self.email_processor.parse_sender_email(sender)
             
             # Show processing start
             self.ui.show_email_processing_start(sender_email, thread_id)
+            if self.account:
+                self.ui.show_processing_status(f"Account: {self.account}")
+            
+            # Drop quoted replies, signatures and HTML before extraction and generation
+            if self.body_normalizer is not None:
+                normalized = self.body_normalizer.normalize(email_text)
+                email_text = normalized["text"]
+                if normalized["fallback"]:
+                    self.ui.show_processing_status("Normalized body was (nearly) empty; using the original text")
+                elif normalized["chars_saved"] > 0:
+                    self.ui.show_processing_status(
+                        f"Normalized body: {normalized['chars_saved']} characters "
+                        f"(~{normalized['tokens_saved']} tokens) removed"
+                    )
             
             # Process email
             user_info = self.user_profile.get_user_info()
-            result = self.email_processor.process_email(sender, email_text, thread_id, user_info)
+            result = self.email_processor.process_email(sender, email_text, thread_id, user_info, message_id)
             
             if not result["success"]:
+                if result["reason"] != "already_processed":
+                    self.metrics.inc("processing_errors_total")
                 if result["reason"] == "already_processed":
-                    self.ui.show_processing_status(f"Already processed thread {thread_id}, skipping...")
+                    self.ui.show_processing_status(f"Already processed {message_id or thread_id}, skipping...")
                 else:
                     self.ui.show_error(f"Processing error: {result.get('error', 'Unknown error')}")
+                    if raise_errors:
+                        raise ProcessingError(result.get("error", "Unknown error"))
                 return
             
             # Show sender info if learned
@@ -54,53 +237,267 @@ class EmailManager:
                 self.ui.show_sender_info_learned(details)
             
             # Show response generation
-            self.ui.show_response_generation()
+            generation = None
+            if result.get("reused_from"):
+                self.ui.show_processing_status(
+                    f"Reusing the draft of near-duplicate thread {result['reused_from']} "
+                    f"({result['distance']} bits apart)"
+                )
+            else:
+                self.ui.show_response_generation()
+                generation = {"sender": sender, "email_text": email_text, "context": result["context"],
+                              "user_info": user_info, "thread_context": result.get("thread_context", "")}
+            self.metrics.inc("emails_processed_total")
             
             # Get approval and send response
-            self._handle_response_approval(sender, sender_email, email_text, result["response"], thread_id)
+            self._handle_response_approval(sender, sender_email, email_text, result["response"], thread_id,
+                                           generation, result.get("reused_from"), message_id)
             
+        except ProcessingError:
+            raise
         except Exception as e:
+            if result is not None and result["success"]:
+                # The email only counts as processed once its reply was queued or sent; a retry runs it again
+                self.memory_manager.unmark_thread_processed(message_id or thread_id)
+            self.metrics.inc("processing_errors_total")
             self.ui.show_error(f"Error processing email: {e}")
+            if raise_errors:
+                raise ProcessingError(str(e)) from e
     
-    def _handle_response_approval(self, sender: str, sender_email: str, email_text: str, response: str, thread_id: str):
-        """Handle response approval and sending."""
-        # Show response for approval
-        approved = self.ui.show_email_for_approval(sender_email, email_text, response)
+    def _handle_response_approval(self, sender: str, sender_email: str, email_text: str, response: str, thread_id: str,
+                                  generation: Optional[Dict[str, Any]] = None, reused_from: Optional[str] = None,
+                                  message_id: Optional[str] = None):
+        """Auto-send when the approval policy allows it, otherwise queue for review without blocking."""
+        decision = self.approval_policy.evaluate(
+            sender_email, email_text, response,
+            prior_replies=self.memory_manager.count_prior_replies(sender),
+            thread_id=thread_id,
+            thread_participants=self._thread_participants(thread_id, message_id),
+            reused_from=reused_from
+        )
         
-        if approved:
-            success = self._send_response(sender_email, response, thread_id, sender, email_text)
-            if success:
-                self.ui.show_email_sent_success()
-            else:
-                self.ui.show_email_sent_failure()
+        if decision["auto_send"]:
+            future = self._queue_reply(sender, sender_email, email_text, response, thread_id)
+            future.add_done_callback(
+                lambda f: self._on_auto_send_done(f.result(), sender, sender_email, email_text, response, thread_id, decision)
+            )
+            return
+        
+        self._queue_draft(sender, sender_email, email_text, response, thread_id, decision["reasons"], generation,
+                          reused_from)
+    
+    def _thread_participants(self, thread_id: str, message_id: Optional[str]) -> Set[str]:
+        """Earlier senders of the thread, only when you have written in it yourself (read from the thread cache)."""
+        if self.thread_context is None:
+            return set()
+        participants = self.thread_context.get_participants(thread_id, message_id)
+        own_email = (self.user_profile.get_user_info().get("email") or "").lower()
+        return participants if own_email and own_email in participants else set()
+    
+    def _on_auto_send_done(self, outcome: Dict[str, Any], sender: str, sender_email: str, email_text: str,
+                           response: str, thread_id: str, decision: Dict[str, Any]):
+        """Report an automatic send, falling back to review if it failed."""
+        if outcome["success"]:
+            self.ui.show_auto_sent(sender_email, decision["rule"])
+            self.ui.show_command_prompt()
         else:
-            self.ui.show_response_cancelled()
+            self._queue_draft(sender, sender_email, email_text, response, thread_id,
+                              decision["reasons"] + [f"automatic send failed: {outcome.get('error', '')}"])
+    
+    def _queue_draft(self, sender: str, sender_email: str, email_text: str, response: str, thread_id: str,
+                     review_reasons: List[str], generation: Optional[Dict[str, Any]] = None,
+                     reused_from: Optional[str] = None):
+        """Put a draft in the approval inbox and start its alternative while it is reviewed."""
+        draft = self.draft_inbox.add(sender, sender_email, email_text, response, thread_id,
+                                     review_reasons=review_reasons, trace_id=self.tracer.current_trace_id,
+                                     reused_from=reused_from)
+        self.ui.show_draft_queued(draft, self.draft_inbox.pending_count())
+        if generation is not None and self.alternatives is not None:
+            self.alternatives.start(draft, generation)
         
         # Show command prompt
         self.ui.show_command_prompt()
     
-    def _send_response(self, sender_email: str, response: str, thread_id: str, sender: str, email_text: str) -> bool:
-        """Send the response email."""
-        try:
-            success = self.email_handler.reply_to_thread(
-                recipient_email=sender_email,
-                message_text=response,
-                thread_id=thread_id
+    def list_drafts(self) -> List[Dict[str, Any]]:
+        """Drafts awaiting review."""
+        return self.draft_inbox.list()
+    
+    def get_draft(self, draft_id: int) -> Optional[Dict[str, Any]]:
+        """Get a draft by id."""
+        return self.draft_inbox.get(draft_id)
+    
+    def approve_draft(self, draft_id: int) -> Dict[str, Any]:
+        """Send a pending draft."""
+        return self.approve_drafts([draft_id])["results"][0]
+    
+    def select_drafts(self, selection: str) -> List[int]:
+        """Resolve 'all', 'sender <email>' or a list of ids/ranges (e.g. '1 3 5-8') to pending draft ids."""
+        pending = self.draft_inbox.list()
+        selection = selection.strip()
+        if selection.lower() == "all":
+            return [d["id"] for d in pending]
+        if selection.lower().startswith("sender "):
+            sender_email = selection.split(None, 1)[1].strip().lower()
+            return [d["id"] for d in pending if d["sender_email"].lower() == sender_email]
+        
+        # Ranges select the pending drafts inside them; they are never expanded, so "1-999999999" is cheap
+        pending_ids = [d["id"] for d in pending]
+        ids: List[int] = []
+        seen: Set[int] = set()
+        for token in selection.replace(",", " ").split():
+            token = token.lstrip("#")
+            if "-" in token:
+                start, end = (int(bound) for bound in token.split("-", 1))
+                if start < 0 or end < start:
+                    raise ValueError(f"Invalid draft range '{token}'")
+                selected = [draft_id for draft_id in pending_ids if start <= draft_id <= end]
+            else:
+                selected = [int(token)]
+            # Each draft once, in the order it was first named
+            for draft_id in selected:
+                if draft_id not in seen:
+                    seen.add(draft_id)
+                    ids.append(draft_id)
+        return ids
+    
+    def approve_drafts(self, draft_ids: List[int]) -> Dict[str, Any]:
+        """Approve several drafts and send them concurrently through the outbound queue."""
+        started = time.perf_counter()
+        
+        # Queue every claimable draft first so the sender pool works on them in parallel
+        queued = []
+        results: List[Dict[str, Any]] = []
+        for draft_id in draft_ids:
+            draft = self.draft_inbox.claim(draft_id)
+            if draft is None:
+                results.append({"draft_id": draft_id, "success": False, "sender_email": "",
+                                "error": "No pending draft with that id"})
+                continue
+            if self.alternatives is not None:
+                self.alternatives.cancel(draft_id)
+            self.tracer.record("approval_wait", (time.time() - draft["created_at"]) * 1000,
+                               trace_id=draft.get("trace_id"), started_at=draft["created_at"])
+            future = self._queue_reply(draft["sender"], draft["sender_email"], draft["email_text"],
+                                       draft["response"], draft["thread_id"], trace_id=draft.get("trace_id"))
+            queued.append((draft, future))
+        
+        for draft, future in queued:
+            outcome = future.result()
+            if outcome["success"]:
+                status = DraftInbox.SENT
+            else:
+                status = DraftInbox.UNKNOWN if outcome.get("unknown") else DraftInbox.FAILED
+            self.draft_inbox.set_status(draft["id"], status, send_key=outcome["key"])
+            results.append({
+                "draft_id": draft["id"],
+                "success": outcome["success"],
+                "sender_email": draft["sender_email"],
+                "seconds": outcome["seconds"],
+                "attempts": outcome["attempts"],
+                "error": outcome.get("error", "")
+            })
+        
+        positions: Dict[int, int] = {}
+        for position, draft_id in enumerate(draft_ids):
+            positions.setdefault(draft_id, position)
+        results.sort(key=lambda r: positions[r["draft_id"]])
+        return {
+            "results": results,
+            "sent": sum(1 for r in results if r["success"]),
+            "failed": sum(1 for r in results if not r["success"]),
+            "wall_seconds": time.perf_counter() - started
+        }
+    
+    def edit_draft(self, draft_id: int, response: str) -> Optional[Dict[str, Any]]:
+        """Replace the text of a pending draft."""
+        return self.draft_inbox.update_response(draft_id, response)
+    
+    def reject_draft(self, draft_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Discard a pending draft (None if there is none) and offer its alternative:
+        `alternative` is the new pending draft when it was ready, `alternative_pending`
+        is set when it is still generating and will be queued for review once done.
+        """
+        draft = self.draft_inbox.claim(draft_id)
+        if draft is None:
+            return None
+        self.draft_inbox.set_status(draft_id, DraftInbox.REJECTED)
+        if self.duplicate_index is not None:
+            # A rejected reply must not be handed to near-duplicates of its email
+            self.duplicate_index.discard(draft.get("reused_from") or draft["thread_id"])
+        outcome: Dict[str, Any] = {"draft_id": draft_id, "alternative": None, "alternative_pending": False}
+        if self.alternatives is None:
+            return outcome
+        # Re-entrant: a ready alternative is delivered synchronously inside take()
+        handover = threading.RLock()
+        
+        def on_ready(text: Optional[str]):
+            if text is None:
+                return
+            alternative = self.draft_inbox.add(
+                draft["sender"], draft["sender_email"], draft["email_text"], text, draft["thread_id"],
+                review_reasons=draft.get("review_reasons", []), trace_id=draft.get("trace_id"),
+                alternative_of=draft_id
             )
-            
-            if success:
-                # Update memory with the response
+            with handover:
+                if not outcome["alternative_pending"]:
+                    outcome["alternative"] = alternative
+                    return
+            # Finished after the reject returned: announce it like any other draft
+            self.ui.show_draft_queued(alternative, self.draft_inbox.pending_count())
+            self.ui.show_command_prompt()
+        
+        with handover:
+            ready = self.alternatives.take(draft_id, on_ready)
+            outcome["alternative_pending"] = ready is False and outcome["alternative"] is None
+        return outcome
+    
+    def _queue_reply(self, sender: str, sender_email: str, email_text: str, response: str, thread_id: str,
+                     trace_id: Optional[str] = None) -> Future:
+        """Queue a reply for sending; memory is updated once it has been delivered."""
+        def on_sent():
+            # Update memory with the response
+            try:
                 self.email_processor.update_memory_with_response(sender, email_text, thread_id, response)
-                
-            return success
-            
-        except Exception as e:
-            self.ui.show_error(f"Error sending response: {e}")
-            return False
+                if self.thread_context is not None:
+                    self.thread_context.add_local_message(thread_id, self.user_profile.get_user_info()["email"], response)
+            except Exception as e:
+                self.ui.show_error(f"Reply to {sender_email} was sent, but updating memory failed: {e}")
+                raise
+        
+        return self.outbound_queue.submit(sender_email, response, thread_id, on_sent=on_sent, trace_id=trace_id,
+                                          send_func=self.email_handler.send_reply, account=self.account)
+    
+    def list_dead_letters(self) -> List[Dict[str, Any]]:
+        """Replies from this account that exhausted their retries."""
+        return self.outbound_queue.list_dead_letters(self.account)
+    
+    def retry_dead_letter(self, key: str) -> Optional[Dict[str, Any]]:
+        """Re-send a dead-lettered reply and wait for the outcome; its draft is marked sent on success."""
+        future = self.outbound_queue.retry_dead_letter(key, self.account)
+        if future is None:
+            return None
+        outcome = future.result()
+        if outcome["success"]:
+            for draft in self.draft_inbox.list(status=None):
+                if draft.get("send_key") == outcome["key"] and draft["status"] in (DraftInbox.FAILED, DraftInbox.UNKNOWN):
+                    self.draft_inbox.set_status(draft["id"], DraftInbox.SENT)
+        return outcome
+    
+    def get_latency_report(self) -> List[Dict[str, Any]]:
+        """Per-stage latency percentiles."""
+        return self.tracer.get_latency_report()
+    
+    def get_usage_report(self) -> Dict[str, Any]:
+        """Today's token usage by sender, stage and model."""
+        return get_usage_tracker().get_report()
     
     def get_memory_stats(self) -> dict:
         """Get memory statistics."""
-        return self.email_processor.get_memory_stats()
+        stats = self.email_processor.get_memory_stats()
+        if self.body_normalizer is not None:
+            stats["body_normalizer"] = self.body_normalizer.get_stats()
+        return stats
     
     def process_custom_prompt(self, prompt_text: str) -> str:
         """Process custom user prompt."""
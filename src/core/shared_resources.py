@@ -0,0 +1,56 @@
+"""
+Clients and pools shared by every Gmail account served by one process.
+"""
+
+from typing import Any
+
+from services.body_normalizer import BodyNormalizer
+from services.metrics import get_metrics
+from services.memory_summarizer import LLMSummaryBackend, LocalSummaryBackend
+from services.outbound_queue import OutboundQueue
+from services.response_generator import ResponseGenerator
+from services.sender_info_extractor import SenderInfoExtractor
+from services.tracing import get_tracer
+from services.usage_tracker import get_usage_tracker
+from config.agent_config import MEMORY_CONFIG, EMAIL_CONFIG
+
+
+class SharedResources:
+    """
+    One set of model clients, the Composio toolset, the summary backend and the
+    reply send pool, handed to each account's EmailManager. Memory, drafts and
+    profiles stay per account; the token budget (usage tracker), tracer and
+    metrics are process-wide already.
+    """
+
+    def __init__(self, toolset: Any = None):
+        self.toolset = toolset
+        self.response_generator = ResponseGenerator()
+        self.sender_info_extractor = SenderInfoExtractor()
+        self.body_normalizer = BodyNormalizer() if EMAIL_CONFIG.get("normalize_body", True) else None
+        self._summary_backend = None
+        # Jobs carry their account's send function, so one pool serves every mailbox
+        self.outbound_queue = OutboundQueue(send_func=None)
+        self.outbound_queue.register_metrics(get_metrics())
+
+    @property
+    def summary_backend(self):
+        """Summarization backend shared by the per-account summarizer workers."""
+        if self._summary_backend is None:
+            config = MEMORY_CONFIG.get("summarization", {})
+            if config.get("backend") == "local":
+                self._summary_backend = LocalSummaryBackend(config)
+            else:
+                self._summary_backend = LLMSummaryBackend(config)
+        return self._summary_backend
+
+    def warm_up(self):
+        """Build the chat models ahead of the first email."""
+        _ = self.response_generator.model
+        _ = self.sender_info_extractor.model
+
+    def shutdown(self):
+        """Finish queued sends and flush process-wide state; call after every account has shut down."""
+        self.outbound_queue.stop()
+        get_tracer().flush()
+        get_usage_tracker().save()
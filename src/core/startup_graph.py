@@ -0,0 +1,112 @@
+"""
+Startup dependency graph: independent initialization steps run concurrently.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Any, List, Callable, Optional, Iterable
+
+
+class StartupStep:
+    """One initialization step and its dependencies."""
+
+    def __init__(self, name: str, func: Callable[[], Any], depends_on: Iterable[str] = (), background: bool = False):
+        self.name = name
+        self.func = func
+        self.depends_on = list(depends_on)
+        self.background = background
+        self.future: Future = Future()
+        self.started_at: Optional[float] = None
+        self.seconds: Optional[float] = None
+        self.status = "pending"
+
+
+class StartupGraph:
+    """Runs each step on its own thread as soon as its dependencies have finished.
+
+    ``run`` returns once every foreground step is done; background steps (for
+    example model warm-up or the metrics endpoint) keep running and do not
+    count towards the time it takes to become ready. Foreground steps without a
+    dependency between them overlap, so one only adds to time-to-ready when it
+    is on the slowest path.
+    """
+
+    def __init__(self, on_background_error: Optional[Callable[[str, Exception], None]] = None):
+        self.steps: Dict[str, StartupStep] = {}
+        self.on_background_error = on_background_error
+        self._origin = 0.0
+        self.ready_seconds: Optional[float] = None
+
+    def add(self, name: str, func: Callable[[], Any], depends_on: Iterable[str] = (), background: bool = False):
+        """Register a step; dependencies must already be registered."""
+        step = StartupStep(name, func, depends_on, background)
+        missing = [d for d in step.depends_on if d not in self.steps]
+        if missing:
+            raise ValueError(f"Step '{name}' depends on unknown steps: {', '.join(missing)}")
+        self.steps[name] = step
+        return self
+
+    def run(self) -> Dict[str, Any]:
+        """Start every step and wait for the foreground ones; raises the first foreground failure."""
+        self._origin = time.perf_counter()
+        for step in self.steps.values():
+            threading.Thread(target=self._run_step, args=(step,), name=f"startup-{step.name}", daemon=True).start()
+
+        for step in self.steps.values():
+            if not step.background:
+                step.future.result()
+        self.ready_seconds = time.perf_counter() - self._origin
+        return self.report()
+
+    def _run_step(self, step: StartupStep):
+        """Wait for dependencies, then run the step."""
+        try:
+            for dependency in step.depends_on:
+                self.steps[dependency].future.result()
+        except Exception as e:
+            step.status = "skipped"
+            step.future.set_exception(e)
+            return
+
+        step.status = "running"
+        step.started_at = time.perf_counter() - self._origin
+        started = time.perf_counter()
+        try:
+            result = step.func()
+        except Exception as e:
+            step.seconds = time.perf_counter() - started
+            step.status = "failed"
+            step.future.set_exception(e)
+            if step.background and self.on_background_error:
+                self.on_background_error(step.name, e)
+            return
+        step.seconds = time.perf_counter() - started
+        step.status = "done"
+        step.future.set_result(result)
+
+    def wait_background(self, timeout: Optional[float] = None) -> bool:
+        """Wait for background steps; returns False if some are still running after the timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for step in self.steps.values():
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                step.future.exception(timeout=remaining)
+            except Exception:
+                return False
+        return True
+
+    def report(self) -> Dict[str, Any]:
+        """Per-step timings (seconds since startup began) and the time to become ready."""
+        steps: List[Dict[str, Any]] = [
+            {
+                "name": step.name,
+                "status": step.status,
+                "background": step.background,
+                "depends_on": step.depends_on,
+                "started_at": step.started_at,
+                "seconds": step.seconds
+            }
+            for step in self.steps.values()
+        ]
+        return {"ready_seconds": self.ready_seconds, "steps": steps}
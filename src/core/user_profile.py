@@ -12,18 +12,24 @@ class UserProfile:
     def __init__(self, email_handler):
         self.email_handler = email_handler
         self._user_profile = None
+        self._user_info: Optional[Dict[str, Any]] = None
     
     def get_user_info(self) -> Dict[str, Any]:
-        """Get user information from profile or defaults."""
-        if self._user_profile is None and hasattr(self.email_handler, 'user_profile'):
-            self._user_profile = self.email_handler.user_profile
-        
+        """Get user information, re-deriving it only when the cached profile has changed."""
+        profile = getattr(self.email_handler, 'user_profile', None)
+        if self._user_info is None or profile is not self._user_profile:
+            self._user_profile = profile
+            self._user_info = self._derive_user_info(profile)
+        return dict(self._user_info)
+    
+    def _derive_user_info(self, profile: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Derive the owner's identity from the profile or defaults."""
         # Extract name from email if available
         email = ""
         name = "Assistant"  # Default fallback
         
-        if self._user_profile:
-            email = self._user_profile.get('emailAddress', '')
+        if profile:
+            email = profile.get('emailAddress', '')
             
             # Extract name from email with better logic
             if email:
@@ -0,0 +1,257 @@
+"""
+Multi-process worker mode.
+
+The listener process queues every trigger event in a durable SQLite queue,
+partitioned by sender. One worker process per partition processes its events
+in order with its own agent and memory shard, so per-sender ordering holds and
+throughput scales with cores instead of sharing one GIL.
+"""
+
+import multiprocessing
+import os
+import signal
+import time
+from typing import Dict, Any, List, Optional, Callable
+
+from services.durable_queue import DurableQueue, sender_partition
+from services.memory_snapshot import reshard_snapshots, shard_name
+from services.metrics import get_metrics
+from services.tracing import get_tracer
+from config.agent_config import (
+    APPROVAL_POLICY_CONFIG, EMAIL_CONFIG, HEADLESS_CONFIG, MEMORY_CONFIG, METRICS_CONFIG, TRACING_CONFIG,
+    USAGE_CONFIG, WORKER_CONFIG
+)
+
+
+class QueueDispatcher:
+    """Takes the agent's place in the listener process: queues each email for the worker owning its sender."""
+
+    def __init__(self, queue: DurableQueue, account: Optional[str] = None):
+        self.queue = queue
+        self.account = account
+        self.tracer = get_tracer()
+        self.metrics = get_metrics()
+
+    def process_incoming_email(self, sender: str, email_text: str, thread_id: str, message_id: Optional[str] = None):
+        """Queue the email; the worker continues the listener's trace."""
+        partition = self.queue.put({
+            "sender": sender,
+            "message_text": email_text,
+            "thread_id": thread_id,
+            "message_id": message_id,
+            "trace_id": self.tracer.current_trace_id
+        }, self.account)
+        self.metrics.inc("events_enqueued_total", partition=str(partition))
+
+
+class PartitionWorker:
+    """Processes one partition of the queue, oldest event first, inside a worker process."""
+
+    def __init__(self, index: int, queue: DurableQueue, agents: Dict[Optional[str], Any],
+                 poll_interval: Optional[float] = None, on_tick: Optional[Callable[[], None]] = None):
+        self.index = index
+        self.queue = queue
+        self.agents = agents
+        self.on_tick = on_tick
+        self.poll_interval = poll_interval or WORKER_CONFIG.get("poll_interval_seconds", 0.2)
+        self.tracer = get_tracer()
+        self.metrics = get_metrics()
+
+    def run(self, stop_event):
+        """Process events until stop_event is set."""
+        self.queue.recover(self.index)
+        while not stop_event.is_set():
+            if self.on_tick:
+                self.on_tick()
+            event = self.queue.claim(self.index)
+            if event is None:
+                stop_event.wait(self.poll_interval)
+                continue
+            self.process(event)
+
+    def process(self, event: Dict[str, Any]):
+        """Hand one event to its account's agent and acknowledge it."""
+        payload = event["payload"]
+        agent = self.agents.get(event["account"]) or next(iter(self.agents.values()))
+        with self.tracer.trace(payload.get("trace_id")):
+            self.tracer.record("queue_wait", (time.time() - event["enqueued_at"]) * 1000)
+            try:
+                agent.process_queued_email(payload["sender"], payload["message_text"],
+                                           payload["thread_id"], payload.get("message_id"))
+            except Exception as e:
+                self.metrics.inc("worker_events_failed_total")
+                self.queue.nack(event, str(e))
+                return
+        self.queue.ack(event["id"])
+        self.metrics.inc("worker_events_processed_total")
+
+
+def _suffixed(path: str, suffix: str) -> str:
+    """data/events.jsonl -> data/events_worker0.jsonl"""
+    root, extension = os.path.splitext(path)
+    return f"{root}_{suffix}{extension}"
+
+
+def _configure_worker_process(index: int, workers: int):
+    """Give a worker its own output files and metrics port, and its share of the daily token budget."""
+    suffix = f"worker{index}"
+    # Events must be finished before they are acknowledged, and the partition already keeps sender order
+    EMAIL_CONFIG.setdefault("priority_scheduling", {})["enabled"] = False
+    HEADLESS_CONFIG["event_log_path"] = _suffixed(HEADLESS_CONFIG["event_log_path"], suffix)
+    if HEADLESS_CONFIG.get("command_path"):
+        HEADLESS_CONFIG["command_path"] = _suffixed(HEADLESS_CONFIG["command_path"], suffix)
+    if TRACING_CONFIG.get("export_path"):
+        TRACING_CONFIG["export_path"] = _suffixed(TRACING_CONFIG["export_path"], suffix)
+    if APPROVAL_POLICY_CONFIG.get("audit_log_path"):
+        APPROVAL_POLICY_CONFIG["audit_log_path"] = _suffixed(APPROVAL_POLICY_CONFIG["audit_log_path"], suffix)
+    if EMAIL_CONFIG.get("outbound_state_path"):
+        EMAIL_CONFIG["outbound_state_path"] = _suffixed(EMAIL_CONFIG["outbound_state_path"], suffix)
+    profile_cache = EMAIL_CONFIG.get("profile_cache", {})
+    if profile_cache.get("path"):
+        # Every worker refreshes and rewrites the account profile; the copies must not share a temp file
+        profile_cache["path"] = _suffixed(profile_cache["path"], suffix)
+    if USAGE_CONFIG.get("path"):
+        USAGE_CONFIG["path"] = _suffixed(USAGE_CONFIG["path"], suffix)
+    USAGE_CONFIG["daily_token_budget"] = USAGE_CONFIG.get("daily_token_budget", 0) // workers
+    METRICS_CONFIG["port"] = METRICS_CONFIG["port"] + 1 + index
+
+
+def run_worker(index: int, workers: int, accounts: List[str], integration_id: str, stop_event):
+    """Entry point of a worker process: build the agents for its memory shard and drain its partition."""
+    # The supervisor stops workers through stop_event; Ctrl-C reaches the whole process group
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _configure_worker_process(index, workers)
+
+    from composio_langgraph import ComposioToolSet
+    from agent.ai_agent import EmailAIAgent
+    from config.settings import COMPOSIO_API_KEY
+    from core.shared_resources import SharedResources
+    from mail.email_handler import EmailHandler
+    from main import EmailAgentApp
+    from services.command_file import CommandFile
+    from services.metrics import MetricsServer
+
+    # The app object only serves the worker's control file, for drafts held back for review
+    app = EmailAgentApp(headless=True, accounts=accounts)
+    ui = app.ui
+    ui.show_startup_message()
+    shared = SharedResources(ComposioToolSet(api_key=COMPOSIO_API_KEY))
+    shard = shard_name(index, workers)
+    agents: Dict[Optional[str], Any] = {}
+    for account in accounts:
+        handler = EmailHandler(integration_id, account, toolset=shared.toolset)
+        app.email_handlers[account] = handler
+        agents[account] = app.ai_agents[account] = EmailAIAgent(
+            handler, ui, shared, account if len(accounts) > 1 else None, shard
+        )
+    shared.warm_up()
+    commands = CommandFile(HEADLESS_CONFIG["command_path"]) if HEADLESS_CONFIG.get("command_path") else None
+
+    def run_commands():
+        """Run commands appended to this worker's control file."""
+        lines = commands.poll() if commands else []
+        for line in lines:
+            app._execute_headless_command(line)
+        if lines:
+            ui.log.flush()
+
+    metrics_server = None
+    if METRICS_CONFIG.get("enabled", False):
+        metrics_server = MetricsServer(get_metrics(), METRICS_CONFIG["host"], METRICS_CONFIG["port"])
+        try:
+            metrics_server.start()
+        except OSError as e:
+            ui.show_error(f"Metrics endpoint on port {METRICS_CONFIG['port']} unavailable: {e}")
+            metrics_server = None
+
+    ui.show_system_ready()
+    try:
+        PartitionWorker(index, DurableQueue(workers), agents, on_tick=run_commands).run(stop_event)
+    finally:
+        for agent in agents.values():
+            agent.shutdown()
+        shared.shutdown()
+        if metrics_server:
+            metrics_server.stop()
+        ui.show_goodbye()
+
+
+class WorkerPool:
+    """Runs one worker process per partition and restarts workers that exit."""
+
+    def __init__(self, workers: int, accounts: List[str], integration_id: str,
+                 queue: Optional[DurableQueue] = None):
+        self.workers = workers
+        self.accounts = accounts
+        self.integration_id = integration_id
+        self.queue = queue or DurableQueue(workers)
+        self.restart_delay = WORKER_CONFIG.get("restart_delay_seconds", 5.0)
+        self.restarts = 0
+        self._context = multiprocessing.get_context("spawn")
+        self._stop = self._context.Event()
+        self.processes: List[Any] = [None] * workers
+        self._started_at = [0.0] * workers
+
+        metrics = get_metrics()
+        metrics.register_callback(
+            "work_queue_depth", "gauge", "Events queued or in progress per worker partition",
+            lambda: {(("partition", str(p)),): depth for p, depth in self.queue.depth().items()}
+        )
+        metrics.register_callback("worker_restarts_total", "counter", "Worker processes restarted after exiting",
+                                  lambda: self.restarts)
+
+    def start(self) -> int:
+        """Re-partition leftover events and memory shards for the current worker count, then start every worker."""
+        moved = self.queue.rebalance()
+        if MEMORY_CONFIG.get("snapshot", {}).get("enabled", False):
+            for account in self.accounts:
+                reshard_snapshots(account if len(self.accounts) > 1 else None, self.workers,
+                                  lambda sender: sender_partition(sender, self.workers))
+        for index in range(self.workers):
+            self._start(index)
+        return moved
+
+    def _start(self, index: int):
+        """Start (or restart) the worker of one partition."""
+        process = self._context.Process(
+            target=run_worker,
+            args=(index, self.workers, self.accounts, self.integration_id, self._stop),
+            name=f"email-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        self.processes[index] = process
+        self._started_at[index] = time.monotonic()
+
+    def check(self) -> List[int]:
+        """Restart workers that exited (at most once per restart delay); returns their partitions."""
+        restarted = []
+        if self._stop.is_set():
+            return restarted
+        for index, process in enumerate(self.processes):
+            if (process is not None and not process.is_alive()
+                    and time.monotonic() - self._started_at[index] >= self.restart_delay):
+                self._start(index)
+                self.restarts += 1
+                restarted.append(index)
+        return restarted
+
+    def stop(self, timeout: float = 30.0):
+        """Let workers finish their current email, then terminate any that do not exit in time."""
+        self._stop.set()
+        deadline = time.monotonic() + timeout
+        for process in self.processes:
+            if process is None:
+                continue
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Worker liveness, restarts and queue depth."""
+        return {
+            "workers": self.workers,
+            "alive": sum(1 for p in self.processes if p is not None and p.is_alive()),
+            "restarts": self.restarts,
+            "queue": self.queue.get_stats()
+        }
@@ -4,12 +4,24 @@ Email Handler using Composio's toolset for Gmail OAuth and profile fetching.
 
 import os
 import sys
-from typing import Optional, Dict, Any
+import threading
+from typing import Optional, Dict, Any, List
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from composio_langgraph import Action, ComposioToolSet, App
 from config.settings import COMPOSIO_API_KEY
+from config.agent_config import EMAIL_CONFIG
+from services.profile_cache import ProfileCache
+
+
+# Error text that means the stored credentials are gone, as opposed to a network or rate-limit failure
+_REVOKED_MARKERS = ("revoked", "invalid_grant", "unauthorized", "unauthenticated", "401", "expired",
+                    "not active", "inactive", "invalid credentials")
+
+
+class SendError(Exception):
+    """Raised when Gmail reports that a reply could not be sent."""
 
 
 class EmailHandler:
@@ -17,23 +29,102 @@ class EmailHandler:
     Handles Gmail OAuth authentication and profile fetching.
     """
 
-    def __init__(self, integration_id: str, user_id: str):
-        # Initialize Composio toolset and connection parameters
-        self.toolset = ComposioToolSet(api_key=COMPOSIO_API_KEY)
+    def __init__(self, integration_id: str, user_id: str, connect: bool = True,
+                 toolset: Optional[ComposioToolSet] = None):
+        # Initialize Composio toolset (shared when one process serves several accounts) and connection parameters
+        self.toolset = toolset or ComposioToolSet(api_key=COMPOSIO_API_KEY)
         self.integration_id = integration_id
         self.user_id = user_id
         self.entity = self.toolset.get_entity(user_id)
         self.active_connection = None
-        self.user_profile = None
+        cache_config = EMAIL_CONFIG.get("profile_cache", {})
+        self.profile_cache = ProfileCache(
+            self._fetch_profile_data,
+            path=cache_config.get("path", "data/profile_{user_id}.json").format(user_id=user_id),
+            ttl_seconds=cache_config.get("ttl_seconds", 3600),
+            retry_seconds=cache_config.get("retry_seconds", 60)
+        )
+        if connect:
+            self.connect()
 
-        # Establish connection and authenticate
+    def connect(self):
+        """Reuse an existing active connection; only run the OAuth flow when there is none."""
         try:
-            connection_request = self.initiate_connection()
-            self.wait_for_activation(connection_request)
+            if not (EMAIL_CONFIG.get("reuse_existing_connection", True) and self.reuse_active_connection()):
+                connection_request = self.initiate_connection()
+                self.wait_for_activation(connection_request)
         except Exception as e:
             print(f"❌ Error connecting to Gmail: {e}")
             raise
 
+    def find_active_connection(self):
+        """Return the most recently updated active Gmail connection for this entity and integration."""
+        try:
+            connections = self.entity.get_connections()
+        except Exception as e:
+            print(f"⚠️  Could not list existing connections: {e}")
+            return None
+        
+        candidates = [
+            c for c in connections
+            if str(c.appName).lower() == "gmail"
+            and str(c.status).upper() == "ACTIVE"
+            and c.integrationId == self.integration_id
+        ]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda c: c.updatedAt or "")
+
+    def reuse_active_connection(self) -> bool:
+        """Use an existing active connection; a cached profile is served at once and validated in the background."""
+        connection = self.find_active_connection()
+        if connection is None:
+            return False
+        
+        print(f"🔁 Reusing active Gmail connection {connection.id}")
+        self.active_connection = connection
+        if self.profile_cache.load_from_disk():
+            email_address = self.profile_cache.get().get('emailAddress', 'Unknown')
+            print(f"👤 Using cached profile for {email_address}, validating connection in background")
+            threading.Thread(target=self._validate_connection, name="connection-check", daemon=True).start()
+            return True
+        try:
+            # No cached profile to start from: validate with a live fetch before going on
+            if self.fetch_user_profile() is None:
+                raise ValueError("no profile data received")
+            return True
+        except Exception as e:
+            print(f"⚠️  Existing connection is not usable ({e}), starting OAuth...")
+            self.active_connection = None
+            return False
+
+    @staticmethod
+    def _is_revoked_error(error: Exception) -> bool:
+        """Whether an error means the connection itself is no longer authorized (not a transient failure)."""
+        message = str(error).lower()
+        return any(marker in message for marker in _REVOKED_MARKERS)
+
+    def _validate_connection(self):
+        """Refresh the profile over a reused connection; run OAuth again if the connection was revoked."""
+        try:
+            if self.profile_cache.refresh() is not None:
+                self.profile_cache.last_error = None
+                return
+            error: Exception = ValueError("no profile data received")
+        except Exception as e:
+            if not self._is_revoked_error(e):
+                # Network trouble: keep the cached profile, the TTL refresh tries again later
+                self.profile_cache.last_error = str(e)
+                return
+            error = e
+        print(f"⚠️  Reused connection is not usable ({error}), starting OAuth...")
+        self.active_connection = None
+        try:
+            connection_request = self.initiate_connection()
+            self.wait_for_activation(connection_request)
+        except Exception as e:
+            self.profile_cache.last_error = f"Reconnecting to Gmail failed: {e}"
+
     def initiate_connection(self):
         """Start OAuth connection process."""
         try:
@@ -74,47 +165,64 @@ class EmailHandler:
                 timeout=timeout,
             )
 
-            # Fetch user profile after connection is established
-            self.fetch_user_profile()
+            # Load user profile after connection is established
+            self.load_user_profile()
             
         except Exception as e:
             print(f"❌ Connection failed or timed out: {e}")
             raise
 
-    def fetch_user_profile(self):
+    @property
+    def user_profile(self) -> Optional[Dict[str, Any]]:
+        """Cached Gmail profile (refreshed in the background once it is older than the TTL)."""
+        return self.profile_cache.get()
+
+    def load_user_profile(self):
+        """Use the on-disk profile copy when present so startup does not wait on the network."""
+        if self.profile_cache.load_from_disk():
+            email_address = self.profile_cache.get().get('emailAddress', 'Unknown')
+            print(f"👤 Using cached profile for {email_address}, refreshing in background")
+            self.profile_cache.refresh_async()
+        else:
+            self.fetch_user_profile()
+
+    def fetch_user_profile(self) -> Optional[Dict[str, Any]]:
         """Fetch user profile using GMAIL_GET_PROFILE."""
         try:
             print("👤 Fetching user profile...")
-            action = Action.GMAIL_GET_PROFILE
-            user_info = self.toolset.execute_action(
-                action=action, 
-                entity_id=self.user_id, 
-                params={}
-            )
-            
-            # Parse profile data from response
-            if user_info and 'data' in user_info:
-                if 'response_data' in user_info['data']:
-                    self.user_profile = user_info['data']['response_data']
-                    email_address = self.user_profile.get('emailAddress', 'Unknown')
-                    print(f"✅ Profile fetched successfully!")
-                    print(f"📧 Email: {email_address}")
-                elif 'successful' in user_info['data'] and user_info['data']['successful']:
-                    profile_data = user_info['data'].get('data', {})
-                    self.user_profile = profile_data
-                    email_address = profile_data.get('emailAddress', 'Unknown')
-                    print(f"✅ Profile fetched successfully!")
-                    print(f"📧 Email: {email_address}")
-                else:
-                    print("⚠️  Warning: Profile data structure is unexpected")
-                    print(f"Response structure: {user_info['data'].keys()}")
-                    self.user_profile = user_info['data']
+            profile = self.profile_cache.refresh()
+            if profile is not None:
+                email_address = profile.get('emailAddress', 'Unknown')
+                print(f"✅ Profile fetched successfully!")
+                print(f"📧 Email: {email_address}")
             else:
                 print("❌ No profile data received")
+            return profile
                 
         except Exception as e:
             print(f"❌ Error fetching user profile: {e}")
             raise
+
+    def _fetch_profile_data(self) -> Optional[Dict[str, Any]]:
+        """Call GMAIL_GET_PROFILE and parse the profile from the response."""
+        action = Action.GMAIL_GET_PROFILE
+        user_info = self.toolset.execute_action(
+            action=action, 
+            entity_id=self.user_id, 
+            params={}
+        )
+        
+        # Parse profile data from response
+        if user_info and 'data' in user_info:
+            if 'response_data' in user_info['data']:
+                return user_info['data']['response_data']
+            elif 'successful' in user_info['data'] and user_info['data']['successful']:
+                return user_info['data'].get('data', {})
+            else:
+                print("⚠️  Warning: Profile data structure is unexpected")
+                print(f"Response structure: {user_info['data'].keys()}")
+                return user_info['data']
+        return None
         
     def get_user_profile(self) -> Optional[Dict[str, Any]]:
         """Return the complete user profile information."""
@@ -156,19 +264,71 @@ class EmailHandler:
             print(f"❌ Error enabling trigger: {e}")
             raise
 
+    def send_reply(self, recipient_email: str, message_text: str, thread_id: str) -> Dict[str, Any]:
+        """Reply to a Gmail thread, raising SendError if Composio reports a failure."""
+        action = Action.GMAIL_REPLY_TO_THREAD
+        response = self.toolset.execute_action(
+            action=action,
+            entity_id=self.user_id,
+            params={
+                "recipient_email": recipient_email,
+                "message_body": message_text,
+                "thread_id": thread_id,
+            },
+        )
+        
+        if not isinstance(response, dict):
+            raise SendError(f"Unexpected response from GMAIL_REPLY_TO_THREAD: {response!r}")
+        successful = response.get("successful", response.get("successfull"))
+        if successful is False or response.get("error"):
+            raise SendError(str(response.get("error") or "Reply was not successful"))
+        return response
+
+    def fetch_thread_messages(self, thread_id: str) -> List[Dict[str, Any]]:
+        """Fetch every message of a Gmail thread, oldest first."""
+        response = self.toolset.execute_action(
+            action=Action.GMAIL_FETCH_MESSAGE_BY_THREAD_ID,
+            entity_id=self.user_id,
+            params={"thread_id": thread_id},
+        )
+        data = self._action_data(response)
+        messages = [self._parse_message(m) for m in data.get("messages", [])]
+        return sorted(messages, key=lambda m: m["timestamp"])
+
+    def fetch_message(self, message_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a single Gmail message by id."""
+        response = self.toolset.execute_action(
+            action=Action.GMAIL_FETCH_MESSAGE_BY_MESSAGE_ID,
+            entity_id=self.user_id,
+            params={"message_id": message_id, "format": "full"},
+        )
+        data = self._action_data(response)
+        return self._parse_message(data) if data else None
+
+    @staticmethod
+    def _action_data(response: Any) -> Dict[str, Any]:
+        """Payload of a Composio action response, raising on failure."""
+        if not isinstance(response, dict):
+            raise Exception(f"Unexpected response from Composio: {response!r}")
+        if response.get("successful", response.get("successfull")) is False or response.get("error"):
+            raise Exception(str(response.get("error") or "Action was not successful"))
+        data = response.get("data") or {}
+        return data.get("response_data", data)
+
+    @staticmethod
+    def _parse_message(message: Dict[str, Any]) -> Dict[str, Any]:
+        """Normalize a Gmail message to id, sender, text and timestamp."""
+        return {
+            "id": message.get("messageId") or message.get("id", ""),
+            "sender": message.get("sender", ""),
+            "text": message.get("messageText") or message.get("snippet", ""),
+            "timestamp": str(message.get("messageTimestamp") or message.get("internalDate") or "")
+        }
+
     def reply_to_thread(self, recipient_email: str, message_text: str, thread_id: str):
         """Reply to a Gmail thread."""
         try:
-            action = Action.GMAIL_REPLY_TO_THREAD
-            response = self.toolset.execute_action(
-                action=action,
-                entity_id=self.user_id,
-                params={
-                    "recipient_email": recipient_email,
-                    "message_body": message_text,
-                    "thread_id": thread_id,
-                },
-            )
+            self.send_reply(recipient_email, message_text, thread_id)
             return True
             
         except Exception as e:
@@ -4,10 +4,16 @@ Email Listener using Composio's toolset for Gmail trigger handling with AI Agent
 
 import os
 import sys
+from typing import Any, Dict, Optional, TYPE_CHECKING
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from mail.email_handler import EmailHandler
+from services.sender_filter import SenderFilter
+from services.metrics import get_metrics
+from services.tracing import get_tracer
+
+if TYPE_CHECKING:
+    from mail.email_handler import EmailHandler
 
 
 class EmailListener:
@@ -16,11 +22,17 @@ class EmailListener:
     """
     TRIGGER_NAME = "GMAIL_NEW_GMAIL_MESSAGE"
 
-    def __init__(self, email_handler: EmailHandler, ai_agent=None):
+    def __init__(self, email_handler: "EmailHandler", ai_agent=None, ui=None):
         self.email_handler = email_handler
         self.ai_agent = ai_agent
+        self.ui = ui
+        # Agents per Composio entity id when one toolset (and one listener) serves several accounts
+        self.accounts: Dict[str, Any] = {}
         self.listener = self.email_handler.toolset.create_trigger_listener()
         self.processed_events = set()  # Track processed events to prevent duplicates
+        self.sender_filter = SenderFilter.from_config()  # Drop unwanted senders before any model call
+        self.tracer = get_tracer()
+        self.metrics = get_metrics()
 
     def setup_listener(self):
         """Setup email listener with callback."""
@@ -30,34 +42,68 @@ class EmailListener:
             }
         )
         def handle_trigger(event):
-            payload = event.payload
+            account = None
+            if self.accounts:
+                account = self.event_account(event)
+                if account not in self.accounts:
+                    self.metrics.inc("events_unrouted_total")
+                    return
+            # One trace per email; every pipeline stage below records into it
+            with self.tracer.trace(), self.tracer.span("handle_trigger"):
+                self.handle_payload(event.payload, account)
+
+    def add_account(self, user_id: str, ai_agent):
+        """Route trigger events of this Composio entity to its agent."""
+        self.accounts[user_id] = ai_agent
+
+    @staticmethod
+    def event_account(event) -> Optional[str]:
+        """Entity id (clientUniqueUserId) of the connection a trigger event came from."""
+        connection = getattr(getattr(event, "metadata", None), "connection", None)
+        return getattr(connection, "clientUniqueUserId", None)
 
-            # Extract email information from payload
-            sender = payload.get("sender", "")
-            email_text = payload.get("message_text", "")
-            thread_id = payload.get("thread_id", "")
-            
-            # Create a unique event identifier to prevent duplicates
-            event_id = f"{thread_id}_{hash(sender)}_{hash(email_text[:50])}"
-            
-            # Check if we've already processed this event
-            if event_id in self.processed_events:
-                return  # Skip duplicate
-            
-            # Mark event as processed
-            self.processed_events.add(event_id)
-            
-            # Process the email with AI if agent is available
-            if self.ai_agent:
-                self.ai_agent.process_incoming_email(sender, email_text, thread_id)
-            else:
-                self.process_email(sender, email_text, thread_id)
-            
-            # Clean up old events to prevent memory leaks
-            if len(self.processed_events) > 100:
-                old_events = list(self.processed_events)[:20]
-                for old_event in old_events:
-                    self.processed_events.discard(old_event)
+    def handle_payload(self, payload, account: Optional[str] = None):
+        """Filter, de-duplicate and process one trigger payload (for `account` when several are served)."""
+        self.metrics.inc("events_received_total")
+        ai_agent = self.accounts[account] if account else self.ai_agent
+        
+        # Extract email information from payload
+        sender = payload.get("sender", "")
+        email_text = payload.get("message_text", "")
+        thread_id = payload.get("thread_id", "")
+        message_id = payload.get("message_id") or None
+        
+        # Skip blocked, non-allowed and no-reply senders before any LLM call
+        rule = self.sender_filter.check(sender)
+        if rule:
+            self.metrics.inc("events_filtered_total")
+            if self.ui:
+                self.ui.show_sender_filtered(sender, thread_id, rule)
+                self.ui.show_command_prompt()
+            return
+        
+        # Create a unique event identifier to prevent duplicates
+        event_id = f"{account}_{thread_id}_{hash(sender)}_{hash(email_text[:50])}"
+        
+        # Check if we've already processed this event
+        if event_id in self.processed_events:
+            self.metrics.inc("events_deduplicated_total")
+            return  # Skip duplicate
+        
+        # Mark event as processed
+        self.processed_events.add(event_id)
+        
+        # Process the email with AI if agent is available
+        if ai_agent:
+            ai_agent.process_incoming_email(sender, email_text, thread_id, message_id)
+        else:
+            self.process_email(sender, email_text, thread_id)
+        
+        # Clean up old events to prevent memory leaks
+        if len(self.processed_events) > 100:
+            old_events = list(self.processed_events)[:20]
+            for old_event in old_events:
+                self.processed_events.discard(old_event)
 
     def process_email(self, sender: str, email_text: str, thread_id: str):
         """Basic email processing without AI."""
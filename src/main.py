@@ -3,73 +3,271 @@ Main entry point for the refactored AI Email Agent system.
 Clean, modular architecture with separation of concerns.
 """
 
+import argparse
 import os
+import signal
 import sys
 import threading
-from typing import Optional
+from typing import Dict, List, Optional, TYPE_CHECKING
 
 # Add the src directory to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from mail.email_handler import EmailHandler
-from mail.email_listener import EmailListener
-from agent.ai_agent import EmailAIAgent
-from config.settings import GMAIL_INTEGRATION_ID
-from ui.user_interface import UserInterface
+from config.agent_config import AI_AGENT_CONFIG, EMAIL_CONFIG, HEADLESS_CONFIG, METRICS_CONFIG, PROFILER_CONFIG, WORKER_CONFIG
+
+# Composio, langchain and the agent are imported during initialize_system so that
+# offline commands (e.g. `python main.py help`) start without loading them
+if TYPE_CHECKING:
+    from mail.email_handler import EmailHandler
+    from mail.email_listener import EmailListener
+    from agent.ai_agent import EmailAIAgent
+    from core.shared_resources import SharedResources
+    from core.worker_pool import WorkerPool
+
+OFFLINE_COMMANDS = ["help"]
 
 
 class EmailAgentApp:
     """Main application class with clean architecture."""
     
-    def __init__(self):
-        # Core components
-        self.email_handler: Optional[EmailHandler] = None
-        self.ai_agent: Optional[EmailAIAgent] = None
-        self.email_listener: Optional[EmailListener] = None
-        self.ui = UserInterface()
+    # Commands a headless run accepts from its control file
+    HEADLESS_COMMANDS = {"drafts", "view", "approve", "edit", "reject", "deadletters", "resend",
+                         "filters", "latency", "usage", "profiler", "memory", "account"}
+    
+    def __init__(self, headless: bool = False, accounts: Optional[List[str]] = None, workers: int = 0):
+        # Core components: one handler and agent per Gmail account (Composio entity id),
+        # sharing one toolset, model clients, send pool and trigger listener
+        self.accounts: List[str] = list(dict.fromkeys(accounts or EMAIL_CONFIG.get("accounts") or ["default_user"]))
+        self.current_account = self.accounts[0]
+        self.email_handlers: Dict[str, "EmailHandler"] = {}
+        self.ai_agents: Dict[str, "EmailAIAgent"] = {}
+        self.shared: Optional["SharedResources"] = None
+        self.email_listener: Optional["EmailListener"] = None
+        # Worker mode: emails are processed by `workers` processes partitioned by sender
+        self.workers = workers
+        self.worker_pool: Optional["WorkerPool"] = None
+        self.headless = headless
+        self.ui = self._create_ui()
         
         # Runtime state
         self.listening_thread: Optional[threading.Thread] = None
-        self.user_id = "default_user"
+        self.startup_graph = None
+        self.metrics_server = None
+    
+    @property
+    def email_handler(self) -> Optional["EmailHandler"]:
+        """Handler of the account CLI commands act on."""
+        return self.email_handlers.get(self.current_account)
+    
+    @property
+    def ai_agent(self) -> Optional["EmailAIAgent"]:
+        """Agent of the account CLI commands act on."""
+        return self.ai_agents.get(self.current_account)
+        
+    def _create_ui(self):
+        """Create the rich console UI, or the JSON-lines event log in headless mode."""
+        if self.headless:
+            from services.event_log import JsonLinesLog
+            from ui.headless_interface import HeadlessInterface
+            event_log = JsonLinesLog(
+                HEADLESS_CONFIG["event_log_path"],
+                flush_every_events=HEADLESS_CONFIG["flush_every_events"],
+                flush_interval_seconds=HEADLESS_CONFIG["flush_interval_seconds"]
+            )
+            return HeadlessInterface(event_log)
         
+        from ui.user_interface import UserInterface
+        return UserInterface()
+    
     def initialize_system(self):
         """Initialize all system components."""
         try:
             self.ui.show_startup_message()
             
-            # Initialize email handler
-            self.email_handler = EmailHandler(GMAIL_INTEGRATION_ID, self.user_id)
+            from core.startup_graph import StartupGraph
+            from config.settings import GMAIL_INTEGRATION_ID
             
-            # Initialize AI agent
-            self.ai_agent = EmailAIAgent(self.email_handler)
-            
-            # Initialize email listener
-            self.email_listener = EmailListener(self.email_handler, self.ai_agent)
+            graph = StartupGraph(
+                on_background_error=lambda step, e: self.ui.show_error(f"Startup step '{step}' failed: {e}")
+            )
+            graph.add("shared_resources", self._create_shared_resources)
+            # Per account, the Gmail connection (OAuth wait, profile) and agent construction (memory restore) overlap
+            handler_steps, connection_steps, agent_steps, trigger_steps = [], [], [], []
+            for account in self.accounts:
+                graph.add(f"email_handler:{account}",
+                          lambda account=account: self._create_email_handler(GMAIL_INTEGRATION_ID, account),
+                          depends_on=["shared_resources"])
+                graph.add(f"gmail_connection:{account}", lambda account=account: self.email_handlers[account].connect(),
+                          depends_on=[f"email_handler:{account}"])
+                if not self.workers:
+                    graph.add(f"ai_agent:{account}", lambda account=account: self._create_ai_agent(account),
+                              depends_on=[f"email_handler:{account}"])
+                    agent_steps.append(f"ai_agent:{account}")
+                # Without the trigger no email ever arrives, so "ready" waits for it; it needs only the
+                # connection and runs alongside agent construction, which usually takes longer
+                graph.add(f"enable_trigger:{account}", lambda account=account: self.email_handlers[account].enable_trigger(),
+                          depends_on=[f"gmail_connection:{account}"])
+                trigger_steps.append(f"enable_trigger:{account}")
+                handler_steps.append(f"email_handler:{account}")
+                connection_steps.append(f"gmail_connection:{account}")
+            if self.workers:
+                # Workers start once every account is connected, so they reuse the connections instead of OAuth
+                graph.add("work_queue", lambda: self._create_worker_pool(GMAIL_INTEGRATION_ID))
+                graph.add("worker_processes", self._start_workers, depends_on=["work_queue"] + connection_steps)
+                listener_steps = handler_steps + ["work_queue"]
+            else:
+                graph.add("model_warm_up", lambda: self.shared.warm_up(), depends_on=["shared_resources"], background=True)
+                listener_steps = agent_steps
+            graph.add("email_listener", self._create_email_listener, depends_on=listener_steps + trigger_steps)
+            if METRICS_CONFIG.get("enabled", False):
+                graph.add("metrics_server", self._start_metrics_server, depends_on=listener_steps, background=True)
             
-            # Enable email triggers
-            self.email_handler.enable_trigger()
+            report = graph.run()
+            self.startup_graph = graph
             
             self.ui.show_system_ready()
+            self.ui.show_startup_timings(report)
             
         except Exception as e:
             self.ui.show_system_error(str(e))
             raise
     
+    def _create_shared_resources(self):
+        """Create the Composio toolset, model clients and send pool shared by every account."""
+        from composio_langgraph import ComposioToolSet
+        from config.settings import COMPOSIO_API_KEY
+        from core.shared_resources import SharedResources
+        self.shared = SharedResources(ComposioToolSet(api_key=COMPOSIO_API_KEY))
+    
+    def _create_email_handler(self, integration_id: str, account: str):
+        """Create an account's Gmail handler without connecting yet."""
+        from mail.email_handler import EmailHandler
+        self.email_handlers[account] = EmailHandler(integration_id, account, connect=False, toolset=self.shared.toolset)
+    
+    def _create_ai_agent(self, account: str):
+        """Create an account's AI agent; memory and metrics are namespaced once several accounts run."""
+        from agent.ai_agent import EmailAIAgent
+        namespace = account if len(self.accounts) > 1 else None
+        if namespace and account == self.accounts[0]:
+            self._adopt_single_account_memory(account)
+        self.ai_agents[account] = EmailAIAgent(self.email_handlers[account], self.ui, self.shared, namespace)
+    
+    def _adopt_single_account_memory(self, account: str):
+        """Keep the memory of a single-account setup when accounts are added: it belongs to the first account."""
+        from services.memory_snapshot import adopt_single_account_snapshots
+        for path in adopt_single_account_snapshots(account):
+            self.ui.show_processing_status(f"Moved single-account memory to {os.path.basename(path)}")
+    
+    def _create_worker_pool(self, integration_id: str):
+        """Open the durable event queue and prepare the worker processes."""
+        from core.worker_pool import WorkerPool
+        self.worker_pool = WorkerPool(self.workers, self.accounts, integration_id)
+    
+    def _start_workers(self):
+        """Start one worker process per sender partition."""
+        if len(self.accounts) > 1:
+            self._adopt_single_account_memory(self.accounts[0])
+        moved = self.worker_pool.start()
+        if moved:
+            self.ui.show_processing_status(f"Re-partitioned {moved} queued emails for {self.workers} workers")
+    
+    def _create_email_listener(self):
+        """Create the trigger listener; with several accounts it routes events by entity id."""
+        from mail.email_listener import EmailListener
+        if self.worker_pool:
+            from core.worker_pool import QueueDispatcher
+            # Emails go to the durable queue instead of an in-process agent
+            agents = {account: QueueDispatcher(self.worker_pool.queue, account) for account in self.accounts}
+        else:
+            agents = self.ai_agents
+        if len(self.accounts) == 1:
+            self.email_listener = EmailListener(self.email_handler, agents[self.current_account], ui=self.ui)
+            return
+        self.email_listener = EmailListener(self.email_handlers[self.accounts[0]], ui=self.ui)
+        for account in self.accounts:
+            self.email_listener.add_account(account, agents[account])
+    
+    def _start_metrics_server(self):
+        """Serve Prometheus metrics on the local endpoint."""
+        from services.metrics import MetricsServer, get_metrics
+        self.metrics_server = MetricsServer(get_metrics(), METRICS_CONFIG["host"], METRICS_CONFIG["port"])
+        self.metrics_server.start()
+    
     def start_listening(self):
         """Start listening for emails in a background thread."""
         if self.email_listener and not self.listening_thread:
             self.listening_thread = threading.Thread(
                 target=self.email_listener.start_listening, 
+                name="email-listener",
                 daemon=True
             )
             self.listening_thread.start()
             self.ui.show_listening_started()
     
+    def install_profiler_signal(self):
+        """Toggle a profiling window with `kill -USR1 <pid>` (where the platform supports it)."""
+        if hasattr(signal, "SIGUSR1"):
+            # Toggle off the main thread: the handler may interrupt code holding the console or log lock
+            signal.signal(signal.SIGUSR1, lambda *_: threading.Thread(target=self._toggle_profiler, daemon=True).start())
+    
+    def _toggle_profiler(self):
+        """Start the configured profiling mode, or stop the running window."""
+        from services.profiler import get_profiler
+        profiler = get_profiler()
+        try:
+            status = profiler.stop() if profiler.active else profiler.start(PROFILER_CONFIG["signal_mode"])
+            self.ui.show_profiler_status(status)
+        except (RuntimeError, ValueError) as e:
+            self.ui.show_error(f"Profiler: {e}")
+    
+    def shutdown(self):
+        """Stop the worker processes, flush every account, then the shared send pool."""
+        if self.worker_pool:
+            self.worker_pool.stop()
+        for agent in self.ai_agents.values():
+            agent.shutdown()
+        if self.shared:
+            self.shared.shutdown()
+    
     def stop_listening(self):
         """Stop the email listening thread."""
         if self.listening_thread and self.listening_thread.is_alive():
             self.ui.show_listening_stopped()
     
+    def run_daemon(self):
+        """Run unattended until interrupted or terminated, running control-file commands and flushing the event log."""
+        from services.command_file import CommandFile
+        commands = CommandFile(HEADLESS_CONFIG["command_path"]) if HEADLESS_CONFIG.get("command_path") else None
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        try:
+            while not stop.wait(HEADLESS_CONFIG["flush_interval_seconds"]):
+                for line in commands.poll() if commands else []:
+                    self._execute_headless_command(line)
+                self.ui.log.flush()
+                if self.worker_pool:
+                    for index in self.worker_pool.check():
+                        self.ui.show_error(f"Worker {index} exited and was restarted")
+        except KeyboardInterrupt:
+            pass
+        
+        self.shutdown()
+        self.ui.show_goodbye()
+    
+    def _execute_headless_command(self, line: str):
+        """Run one control-file command; commands that need a console or stop the process are refused."""
+        parts = line.split(None, 1)
+        cmd = parts[0].lower()
+        args = parts[1] if len(parts) > 1 else ""
+        self.ui.show_command(line)
+        if cmd not in self.HEADLESS_COMMANDS:
+            self.ui.show_unknown_command()
+            return
+        try:
+            self._execute_command(cmd, args)
+        except Exception as e:
+            self.ui.show_error(str(e))
+    
     def run_interactive_cli(self):
         """Run the interactive command-line interface."""
         self.ui.show_commands_info()
@@ -81,9 +279,9 @@ class EmailAgentApp:
                 if not command:
                     continue
                 
-                # Handle email approval responses
+                # Approvals now go through the drafts inbox
                 if command.lower() in ['y', 'yes', 'n', 'no']:
-                    self.ui.show_processing_status("Email approval should be handled automatically")
+                    self.ui.show_processing_status("Use 'drafts', then 'approve <id>' or 'reject <id>'")
                     continue
                     
                 # Parse command
@@ -99,6 +297,7 @@ class EmailAgentApp:
             except Exception as e:
                 self.ui.show_error(str(e))
         
+        self.shutdown()
         self.ui.show_goodbye()
     
     def _execute_command(self, cmd: str, args: str):
@@ -107,11 +306,36 @@ class EmailAgentApp:
             self.ui.show_help()
         elif cmd == "prompt":
             self._handle_prompt_command(args)
+        elif cmd == "drafts":
+            self._handle_drafts_command()
+        elif cmd == "view":
+            self._handle_view_command(args)
+        elif cmd == "approve":
+            self._handle_approve_command(args)
+        elif cmd == "edit":
+            self._handle_edit_command(args)
+        elif cmd == "reject":
+            self._handle_reject_command(args)
+        elif cmd == "deadletters":
+            self._handle_deadletters_command()
+        elif cmd == "resend":
+            self._handle_resend_command(args)
+        elif cmd == "filters":
+            self._handle_filters_command()
+        elif cmd == "latency":
+            self._handle_latency_command()
+        elif cmd == "usage":
+            self._handle_usage_command()
+        elif cmd == "profiler":
+            self._handle_profiler_command(args)
         elif cmd == "memory":
             self._handle_memory_command()
         elif cmd == "profile":
             self._handle_profile_command()
+        elif cmd == "account":
+            self._handle_account_command(args)
         elif cmd in ["quit", "exit", "q"]:
+            self.shutdown()
             sys.exit(0)
         else:
             self.ui.show_unknown_command()
@@ -124,12 +348,163 @@ class EmailAgentApp:
         else:
             self.ui.show_usage_error("prompt <your question>")
     
+    def _parse_draft_id(self, args: str, usage: str) -> Optional[int]:
+        """Parse the draft id argument of a drafts command."""
+        token = args.split(None, 1)[0] if args else ""
+        try:
+            return int(token.lstrip("#"))
+        except ValueError:
+            self.ui.show_usage_error(usage)
+            return None
+    
+    def _handle_drafts_command(self):
+        """Handle drafts command."""
+        if self.ai_agent:
+            self.ui.show_drafts_list(self.ai_agent.list_drafts())
+    
+    def _handle_view_command(self, args: str):
+        """Handle view command."""
+        draft_id = self._parse_draft_id(args, "view <id>")
+        if draft_id is None or not self.ai_agent:
+            return
+        draft = self.ai_agent.get_draft(draft_id)
+        if draft:
+            self.ui.show_draft(draft)
+        else:
+            self.ui.show_error(f"No draft #{draft_id}")
+    
+    def _handle_approve_command(self, args: str):
+        """Handle approve command: approve <id ...> | approve sender <email> | approve all."""
+        if not args:
+            self.ui.show_usage_error("approve <id> [id ...] | approve <from>-<to> | approve sender <email> | approve all")
+            return
+        if not self.ai_agent:
+            return
+        try:
+            draft_ids = self.ai_agent.select_drafts(args)
+        except ValueError:
+            self.ui.show_usage_error("approve <id> [id ...] | approve <from>-<to> | approve sender <email> | approve all")
+            return
+        if not draft_ids:
+            self.ui.show_error("No pending drafts match that selection")
+            return
+        self.ui.show_send_report(self.ai_agent.approve_drafts(draft_ids))
+    
+    def _handle_edit_command(self, args: str):
+        """Handle edit command."""
+        draft_id = self._parse_draft_id(args, "edit <id> [new text]")
+        if draft_id is None or not self.ai_agent:
+            return
+        parts = args.split(None, 1)
+        text = parts[1].strip() if len(parts) > 1 else self.ui.get_multiline_input(f"New text for draft #{draft_id}")
+        if not text:
+            self.ui.show_usage_error("edit <id> [new text]")
+            return
+        draft = self.ai_agent.edit_draft(draft_id, text)
+        if draft:
+            self.ui.show_draft(draft)
+        else:
+            self.ui.show_error(f"No pending draft #{draft_id}")
+    
+    def _handle_reject_command(self, args: str):
+        """Handle reject command."""
+        draft_id = self._parse_draft_id(args, "reject <id>")
+        if draft_id is None or not self.ai_agent:
+            return
+        outcome = self.ai_agent.reject_draft(draft_id)
+        if outcome is None:
+            self.ui.show_error(f"No pending draft #{draft_id}")
+            return
+        self.ui.show_response_cancelled()
+        if outcome["alternative"]:
+            self.ui.show_draft(outcome["alternative"])
+        elif outcome["alternative_pending"]:
+            self.ui.show_processing_status("An alternative draft is still being written; it will be queued for review")
+    
+    def _handle_deadletters_command(self):
+        """Handle deadletters command."""
+        if self.ai_agent:
+            self.ui.show_dead_letters(self.ai_agent.list_dead_letters())
+    
+    def _handle_resend_command(self, args: str):
+        """Handle resend command."""
+        if not args:
+            self.ui.show_usage_error("resend <key>")
+            return
+        if not self.ai_agent:
+            return
+        outcome = self.ai_agent.retry_dead_letter(args.strip())
+        if outcome is None:
+            self.ui.show_error("No single dead letter matches that key")
+        elif outcome["success"]:
+            self.ui.show_email_sent_success()
+        else:
+            self.ui.show_error(f"Send failed again: {outcome.get('error', '')}")
+    
+    def _handle_filters_command(self):
+        """Handle filters command."""
+        if self.email_listener:
+            self.ui.show_filter_stats(self.email_listener.sender_filter.get_stats())
+    
+    def _handle_latency_command(self):
+        """Handle latency command."""
+        if self.ai_agent:
+            self.ui.show_latency_report(self.ai_agent.get_latency_report())
+    
+    def _handle_usage_command(self):
+        """Handle usage command."""
+        if self.ai_agent:
+            self.ui.show_usage_report(self.ai_agent.get_usage_report())
+    
+    def _handle_profiler_command(self, args: str):
+        """Handle profiler command."""
+        from services.profiler import get_profiler
+        usage = "profiler start [sampling|cprofile] [seconds] [min_email_seconds] | profiler stop | profiler status"
+        parts = args.split()
+        action = parts[0].lower() if parts else "status"
+        profiler = get_profiler()
+        try:
+            if action == "start":
+                mode = parts[1].lower() if len(parts) > 1 else PROFILER_CONFIG["signal_mode"]
+                seconds = float(parts[2]) if len(parts) > 2 else None
+                min_email_seconds = float(parts[3]) if len(parts) > 3 else 0.0
+                status = profiler.start(mode, seconds, min_email_seconds)
+            elif action == "stop":
+                status = profiler.stop()
+            elif action == "status":
+                status = profiler.status()
+            else:
+                self.ui.show_usage_error(usage)
+                return
+        except ValueError:
+            self.ui.show_usage_error(usage)
+            return
+        except RuntimeError as e:
+            self.ui.show_error(str(e))
+            return
+        self.ui.show_profiler_status(status)
+    
     def _handle_memory_command(self):
         """Handle memory command."""
         if self.ai_agent:
             stats = self.ai_agent.get_memory_stats()
             self.ui.show_memory_stats(stats)
     
+    def _handle_account_command(self, args: str):
+        """Handle account command: list accounts or switch the one commands act on."""
+        account = args.strip()
+        if account:
+            if account not in self.ai_agents:
+                self.ui.show_error(f"Unknown account '{account}'")
+                return
+            self.current_account = account
+        accounts = []
+        for name, agent in self.ai_agents.items():
+            profile = self.email_handlers[name].user_profile or {}
+            accounts.append({"id": name, "email": profile.get("emailAddress", "Unknown"),
+                             "pending_drafts": len(agent.list_drafts()), "current": name == self.current_account})
+        self.ui.show_accounts(accounts)
+    
     def _handle_profile_command(self):
         """Handle profile command."""
         if self.ai_agent:
@@ -138,21 +513,62 @@ class EmailAgentApp:
 
 def main():
     """Main entry point."""
+    parser = argparse.ArgumentParser(description="AI Email Agent")
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="run unattended without the rich console; pipeline events go to a JSON-lines log"
+    )
+    parser.add_argument(
+        "--account",
+        action="append",
+        dest="accounts",
+        metavar="ENTITY_ID",
+        help="Gmail account (Composio entity id) to serve; repeat for several (default: EMAIL_CONFIG['accounts'])"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=WORKER_CONFIG.get("workers", 0),
+        metavar="N",
+        help="process emails in N worker processes partitioned by sender (implies --headless)"
+    )
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=OFFLINE_COMMANDS,
+        help="run a single offline command and exit, without connecting to Gmail"
+    )
+    args = parser.parse_args()
+    if args.workers > 0 and not args.command and not AI_AGENT_CONFIG.get("auto_reply"):
+        # Workers only have their control files for review, so replies must normally go out on their own
+        parser.error("--workers needs AI_AGENT_CONFIG['auto_reply'] (worker mode has no review console)")
+    
+    # Offline commands always print to the console; worker mode has no interactive review
+    headless = (args.headless or args.workers > 0) and not args.command
+    app = EmailAgentApp(headless=headless, accounts=args.accounts, workers=args.workers)
+    if args.command:
+        app._execute_command(args.command, "")
+        return
+    
     try:
-        # Create and initialize the system
-        app = EmailAgentApp()
+        # Initialize the system
         app.initialize_system()
         
         # Start listening for emails
         app.start_listening()
+        app.install_profiler_signal()
         
-        # Run interactive CLI
-        app.run_interactive_cli()
+        # Run interactive CLI or the headless daemon loop
+        if headless:
+            app.run_daemon()
+        else:
+            app.run_interactive_cli()
         
     except KeyboardInterrupt:
-        UserInterface().show_interrupt()
+        app.ui.show_interrupt()
     except Exception as e:
-        UserInterface().show_fatal_error(str(e))
+        app.ui.show_fatal_error(str(e))
         sys.exit(1)
 
 
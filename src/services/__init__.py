@@ -1,10 +1,27 @@
 """
 Core services for the email agent.
+
+Exports are resolved lazily so that lightweight services (event log, inbox,
+memory) can be imported without loading the model SDKs.
 """
 
-from .email_processor import EmailProcessor
-from .memory_manager import MemoryManager
-from .response_generator import ResponseGenerator
-from .sender_info_extractor import SenderInfoExtractor
+__all__ = ['BodyNormalizer', 'DraftInbox', 'DurableQueue', 'EmailProcessor', 'MemoryManager', 'MemorySummarizer', 'ResponseGenerator', 'SenderInfoExtractor', 'ThreadContextFetcher']
+
+_EXPORTS = {
+    'BodyNormalizer': '.body_normalizer',
+    'DraftInbox': '.draft_inbox',
+    'DurableQueue': '.durable_queue',
+    'EmailProcessor': '.email_processor',
+    'MemoryManager': '.memory_manager',
+    'MemorySummarizer': '.memory_summarizer',
+    'ResponseGenerator': '.response_generator',
+    'SenderInfoExtractor': '.sender_info_extractor',
+    'ThreadContextFetcher': '.thread_context',
+}
+
 
-__all__ = ['EmailProcessor', 'MemoryManager', 'ResponseGenerator', 'SenderInfoExtractor']
+def __getattr__(name):
+    if name in _EXPORTS:
+        from importlib import import_module
+        return getattr(import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,121 @@
+"""
+Alternative reply drafts generated in the background while a draft is reviewed.
+
+Each draft queued for review gets a second version (by default shorter) on a
+small thread pool. Rejecting the draft hands the alternative over at once if it
+is ready, or as soon as it finishes. Approving the draft cancels its job; a job
+that has not started yet costs nothing, and a finished one is just dropped. At
+most ``max_pending`` alternatives are held; the oldest is dropped beyond that.
+A generation that ends in the canned fallback reply counts as failed, and the
+rejected draft gets no alternative.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable
+
+from config.agent_config import AI_AGENT_CONFIG
+from services.metrics import get_metrics
+from services.tracing import get_tracer
+from services.usage_tracker import get_usage_tracker
+
+
+class AlternativeDrafts:
+    """Background generation of one alternative per reviewed draft."""
+
+    STAGE = "generate_alternative"
+
+    def __init__(self, response_generator, config: Optional[Dict[str, Any]] = None):
+        self.config = config or AI_AGENT_CONFIG.get("alternative_draft", {})
+        self.response_generator = response_generator
+        self.style = self.config.get("style", "")
+        self.max_pending = self.config.get("max_pending", 200)
+        self.tracer = get_tracer()
+        self.metrics = get_metrics()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+
+    def start(self, draft: Dict[str, Any], generation: Dict[str, Any]) -> bool:
+        """Generate an alternative for a draft in the background; skipped once the token budget is spent."""
+        if get_usage_tracker().use_cheaper_behavior(self.STAGE):
+            return False
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.config.get("workers", 2),
+                                                    thread_name_prefix="alternative-draft")
+            self._jobs[draft["id"]] = self._executor.submit(self._generate, generation, draft.get("trace_id"))
+            # Dicts keep insertion order, so the first jobs belong to the drafts reviewed longest
+            overflow = []
+            while len(self._jobs) > self.max_pending:
+                overflow.append(self._jobs.pop(next(iter(self._jobs))))
+        for future in overflow:
+            self._drop(future)
+        return True
+
+    def _generate(self, generation: Dict[str, Any], trace_id: Optional[str]) -> str:
+        """Run the generation inside the original email's trace."""
+        with self.tracer.trace(trace_id), self.tracer.span(self.STAGE):
+            response = self.response_generator.generate_response(
+                generation["sender"], generation["email_text"], generation["context"], generation["user_info"],
+                generation.get("thread_context", ""), style=self.style, stage=self.STAGE
+            )
+        if response == self.response_generator.fallback_response(generation["user_info"]):
+            # generate_response does not raise; it falls back to the canned reply
+            self.metrics.inc("alternative_drafts_total", outcome="failed")
+            raise RuntimeError("alternative draft generation failed")
+        self.metrics.inc("alternative_drafts_total", outcome="generated")
+        return response
+
+    def take(self, draft_id: int, on_ready: Callable[[Optional[str]], None]) -> Optional[bool]:
+        """
+        Hand over a draft's alternative through on_ready (text, or None if generation failed).
+        Returns True if it was ready and on_ready already ran, False if on_ready runs once it
+        finishes, None if the draft has no alternative.
+        """
+        with self._lock:
+            future = self._jobs.pop(draft_id, None)
+        if future is None:
+            return None
+
+        def deliver(done: Future):
+            try:
+                text = done.result()
+            except Exception:
+                text = None
+            if text is not None:
+                self.metrics.inc("alternative_drafts_total", outcome="used")
+            on_ready(text)
+
+        ready = future.done()
+        future.add_done_callback(deliver)
+        return ready
+
+    def cancel(self, draft_id: int):
+        """Drop a draft's alternative; it is never generated if it has not started."""
+        with self._lock:
+            future = self._jobs.pop(draft_id, None)
+        if future is not None:
+            self._drop(future)
+
+    def _drop(self, future: Future):
+        """Cancel a job, or discard its result if it already started."""
+        if future.cancel():
+            self.metrics.inc("alternative_drafts_total", outcome="cancelled")
+        else:
+            self.metrics.inc("alternative_drafts_total", outcome="discarded")
+
+    def pending_count(self) -> int:
+        """Alternatives held for drafts still under review."""
+        with self._lock:
+            return len(self._jobs)
+
+    def shutdown(self):
+        """Cancel alternatives that have not started and stop the pool without waiting."""
+        with self._lock:
+            jobs, self._jobs = self._jobs, {}
+            executor, self._executor = self._executor, None
+        for future in jobs.values():
+            future.cancel()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
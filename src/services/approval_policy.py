@@ -0,0 +1,117 @@
+"""
+Declarative auto-approval policy for generated drafts.
+
+A draft is sent without review only when auto replies are enabled, a trust rule
+matches the sender, and every guard passes. Replies reused from a near-duplicate
+email are always reviewed. While auto replies are enabled,
+each decision is appended to an audit log.
+"""
+
+import re
+from typing import Dict, Any, Iterable, List, Optional
+
+from config.agent_config import AI_AGENT_CONFIG, EMAIL_CONFIG, APPROVAL_POLICY_CONFIG
+from services.event_log import JsonLinesLog
+
+
+class ApprovalPolicy:
+    """Evaluates APPROVAL_POLICY_CONFIG rules for a draft."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, audit_log: Optional[JsonLinesLog] = None):
+        self.config = config or APPROVAL_POLICY_CONFIG
+        self.auto_reply = AI_AGENT_CONFIG.get("auto_reply", False)
+        self.require_approval = EMAIL_CONFIG.get("require_approval", True)
+        # Nothing is sent on its own when auto replies are off, so there is nothing to audit
+        audit_path = self.config.get("audit_log_path", "data/approval_audit.jsonl")
+        if audit_log is None and self.auto_reply and audit_path:
+            audit_log = JsonLinesLog(audit_path, flush_every_events=1)
+        self.audit_log = audit_log
+
+        self.rules = self.config.get("rules", [])
+        self.excluded_keywords = [k.lower() for k in self.config.get("excluded_keywords", [])]
+        # Whole words only: "legal" must not match "illegal"
+        self._keyword_patterns = [(k, re.compile(rf"(?<!\w){re.escape(k)}(?!\w)")) for k in self.excluded_keywords]
+        self.max_draft_length = self.config.get("max_draft_length", 1200)
+        self.auto_sent = 0
+        self.held = 0
+
+    def evaluate(self, sender_email: str, email_text: str, response: str, prior_replies: int = 0,
+                 thread_id: str = "", thread_participants: Iterable[str] = (),
+                 reused_from: Optional[str] = None) -> Dict[str, Any]:
+        """Decide whether a draft may be sent without review.
+
+        thread_participants are the earlier senders of a thread you have written in (empty otherwise);
+        reused_from is the thread whose reply was reused for this email.
+        """
+        known_participant = sender_email.lower() in {p.lower() for p in thread_participants}
+        decision = self._decide(sender_email.lower(), email_text, response, prior_replies, known_participant)
+        if reused_from:
+            # Written for another email, so a person checks it fits this one
+            decision["auto_send"] = False
+            decision["reasons"] = decision["reasons"] + [f"reused the reply drafted for thread {reused_from}"]
+        if decision["auto_send"]:
+            self.auto_sent += 1
+        else:
+            self.held += 1
+
+        if self.audit_log is not None:
+            self.audit_log.write(
+                "approval_decision",
+                sender=sender_email,
+                thread_id=thread_id,
+                auto_send=decision["auto_send"],
+                rule=decision["rule"],
+                reasons=decision["reasons"],
+                reused_from=reused_from,
+                draft_chars=len(response)
+            )
+        return decision
+
+    def _decide(self, sender_email: str, email_text: str, response: str, prior_replies: int,
+                known_participant: bool) -> Dict[str, Any]:
+        """Apply trust rules, then guards."""
+        if not self.auto_reply:
+            return {"auto_send": False, "rule": None, "reasons": ["auto_reply disabled"]}
+
+        rule = self._matching_rule(sender_email, prior_replies, known_participant)
+        if rule is None and self.require_approval:
+            return {"auto_send": False, "rule": None, "reasons": ["no trust rule matched"]}
+        rule_name = rule.get("name", "unnamed") if rule else "require_approval_disabled"
+
+        reasons = self._guard_failures(email_text, response, rule or {})
+        return {"auto_send": not reasons, "rule": rule_name, "reasons": reasons}
+
+    def _matching_rule(self, sender_email: str, prior_replies: int,
+                       known_participant: bool) -> Optional[Dict[str, Any]]:
+        """First trust rule that matches the sender."""
+        domain = sender_email.rpartition("@")[2]
+        for rule in self.rules:
+            senders = [s.lower() for s in rule.get("senders", [])]
+            domains = [d.lower().lstrip("@") for d in rule.get("domains", [])]
+            if sender_email in senders:
+                return rule
+            if any(domain == d or domain.endswith("." + d) for d in domains):
+                return rule
+            if rule.get("thread_participant") and known_participant:
+                return rule
+            min_replies = rule.get("min_prior_replies")
+            if min_replies is not None and prior_replies >= min_replies:
+                return rule
+        return None
+
+    def _guard_failures(self, email_text: str, response: str, rule: Dict[str, Any]) -> List[str]:
+        """Reasons the draft must still be reviewed."""
+        reasons = []
+        max_length = rule.get("max_draft_length", self.max_draft_length)
+        if len(response) > max_length:
+            reasons.append(f"draft longer than {max_length} characters")
+
+        text = f"{email_text}\n{response}".lower()
+        for keyword, pattern in self._keyword_patterns:
+            if pattern.search(text):
+                reasons.append(f"contains excluded keyword '{keyword}'")
+        return reasons
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Decision counters."""
+        return {"auto_reply": self.auto_reply, "auto_sent": self.auto_sent, "held_for_review": self.held}
@@ -0,0 +1,173 @@
+"""
+Email body normalization before extraction and generation.
+
+One pass over the body: HTML is converted to text, ``>`` quoted lines are
+dropped, the quoted reply chain after an "On ... wrote:" (or Outlook
+"-----Original Message-----") header is cut, the signature after a ``--``
+delimiter and mobile footers are removed, blank runs are collapsed and the
+result is capped. Each step looks at a line once, so the cost is linear in
+the size of the body. When almost nothing is left (e.g. a reply written below
+the quote, or inside the signature), the original text is kept, only capped.
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+from config.agent_config import EMAIL_CONFIG
+
+# Rough OpenAI tokenizer ratio for English text
+CHARS_PER_TOKEN = 4
+
+_HTML_TAG = re.compile(r"<(?:html|body|div|p|br|span|table|td|a|b|i|font|blockquote)\b", re.IGNORECASE)
+_REPLY_HEADER = re.compile(r"^\s*On\b.{0,300}\bwrote:\s*$", re.IGNORECASE)
+_REPLY_HEADER_START = re.compile(r"^\s*On\b", re.IGNORECASE)
+_FORWARD_HEADER = re.compile(
+    r"^\s*(-{2,}\s*(Original Message|Forwarded message)\s*-{2,}|_{10,}|From:\s.+\s(Sent|Date):\s)",
+    re.IGNORECASE
+)
+_SIGNATURE_DELIMITER = re.compile(r"^\s*--\s*$")
+_MOBILE_FOOTER = re.compile(r"^\s*(Sent from my \w+|Get Outlook for \w+|Sent from (Mail|Yahoo Mail|Gmail) for)\b",
+                            re.IGNORECASE)
+
+
+class _HTMLText(HTMLParser):
+    """Collects visible text, breaking lines at block elements."""
+
+    BLOCK_TAGS = {"p", "div", "br", "tr", "li", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "table"}
+    SKIP_TAGS = {"script", "style", "head", "title"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self._skip_depth = 0
+        self._quote_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "blockquote":
+            self._quote_depth += 1
+        if tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "blockquote" and self._quote_depth:
+            self._quote_depth -= 1
+        if tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        # Quoted HTML replies live in <blockquote>; they are dropped like "> " lines
+        if not self._skip_depth and not self._quote_depth:
+            self.parts.append(data)
+
+
+def html_to_text(html: str) -> str:
+    """Visible text of an HTML body."""
+    parser = _HTMLText()
+    parser.feed(html)
+    parser.close()
+    return "".join(parser.parts)
+
+
+def estimate_tokens(text_or_length) -> int:
+    """Approximate token count for a string or a character count."""
+    length = text_or_length if isinstance(text_or_length, int) else len(text_or_length)
+    return (length + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class BodyNormalizer:
+    """Strips quoted replies, signatures and HTML from email bodies and keeps savings counters."""
+
+    def __init__(self, max_length: Optional[int] = None, min_chars: Optional[int] = None):
+        self.max_length = max_length or EMAIL_CONFIG.get("max_email_length", 10000)
+        self.min_chars = min_chars if min_chars is not None else EMAIL_CONFIG.get("min_normalized_chars", 2)
+        self.emails = 0
+        self.fallbacks = 0
+        self.chars_in = 0
+        self.chars_out = 0
+
+    def normalize(self, text: str) -> Dict[str, Any]:
+        """Normalize one body; returns the text plus characters and estimated tokens saved."""
+        original_chars = len(text)
+        if _HTML_TAG.search(text):
+            text = html_to_text(text)
+
+        parts: List[str] = []
+        length = 0
+        for line in self._clean_lines(text.splitlines()):
+            if length + len(line) + 1 > self.max_length:
+                parts.append(line[:max(0, self.max_length - length)])
+                break
+            parts.append(line)
+            length += len(line) + 1
+        normalized = "\n".join(parts).strip()
+        # Short replies ("OK", "Yes.") are kept; only a body with no words left falls back
+        fallback = (sum(c.isalnum() for c in normalized) < self.min_chars
+                    and sum(c.isalnum() for c in text) > sum(c.isalnum() for c in normalized))
+        if fallback:
+            normalized = text.strip()[:self.max_length]
+            self.fallbacks += 1
+
+        self.emails += 1
+        self.chars_in += original_chars
+        self.chars_out += len(normalized)
+        chars_saved = original_chars - len(normalized)
+        return {
+            "text": normalized,
+            "original_chars": original_chars,
+            "chars": len(normalized),
+            "chars_saved": chars_saved,
+            "tokens_saved": estimate_tokens(original_chars) - estimate_tokens(normalized),
+            "fallback": fallback
+        }
+
+    @staticmethod
+    def _clean_lines(lines: Iterable[str]) -> Iterator[str]:
+        """Yield the lines worth keeping, stopping at the first reply header or signature."""
+        pending_header: Optional[str] = None
+        blank = True
+        for line in lines:
+            line = line.rstrip()
+
+            # "On <date>, <name> wrote:" is often wrapped over two lines
+            if pending_header is not None:
+                if _REPLY_HEADER.match(f"{pending_header} {line}"):
+                    return
+                kept, pending_header = pending_header, None
+                blank = False
+                yield kept
+
+            if _REPLY_HEADER.match(line) or _FORWARD_HEADER.match(line) or _SIGNATURE_DELIMITER.match(line):
+                return
+            if _REPLY_HEADER_START.match(line) and "wrote:" not in line.lower() and len(line) < 300:
+                pending_header = line
+                continue
+            if line.lstrip().startswith(">") or _MOBILE_FOOTER.match(line):
+                continue
+
+            if not line.strip():
+                if blank:
+                    continue
+                blank = True
+                yield ""
+                continue
+            blank = False
+            yield line
+
+        if pending_header is not None:
+            yield pending_header
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cumulative savings."""
+        saved = self.chars_in - self.chars_out
+        return {
+            "emails": self.emails,
+            "fallbacks": self.fallbacks,
+            "chars_saved": saved,
+            "tokens_saved": estimate_tokens(saved),
+            "reduction": saved / self.chars_in if self.chars_in else 0.0
+        }
@@ -0,0 +1,47 @@
+"""
+Control file read by headless runs, so drafts can be reviewed without a console.
+
+Append one command per line (``echo "approve 3" >> data/commands.txt``); each
+tick the daemon runs the lines added since it last looked. Lines already in the
+file at startup are ignored, so old commands are never replayed.
+"""
+
+import os
+from typing import List, Optional
+
+from config.paths import resolve_data_path
+
+
+class CommandFile:
+    """Reads the commands appended to a text file since the last poll."""
+
+    def __init__(self, path: str):
+        self.path = resolve_data_path(path)
+        self._offset = self._size()
+        self._partial = ""
+
+    def _size(self) -> Optional[int]:
+        """Current file size, or None when the file does not exist."""
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return None
+
+    def poll(self) -> List[str]:
+        """Complete, non-empty lines written since the last poll."""
+        size = self._size()
+        if size is None:
+            self._offset, self._partial = 0, ""
+            return []
+        if self._offset is None or size < self._offset:
+            # Created or truncated since the last poll: read it from the start
+            self._offset, self._partial = 0, ""
+        if size == self._offset:
+            return []
+        with open(self.path, "rb") as handle:
+            handle.seek(self._offset)
+            data = handle.read(size - self._offset)
+        self._offset = size
+        text = self._partial + data.decode("utf-8", errors="replace")
+        *lines, self._partial = text.split("\n")
+        return [line.strip() for line in lines if line.strip()]
@@ -0,0 +1,115 @@
+"""
+Pending-approval inbox for generated reply drafts.
+
+Pending drafts have their own index, so listing and counting them does not
+walk the history. Sent and rejected drafts are kept for a while for reference
+and evicted oldest first once there are more than ``max_finished`` of them;
+failed and unknown sends stay until they are retried.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+
+from config.agent_config import EMAIL_CONFIG
+
+
+class DraftInbox:
+    """Thread-safe store of generated drafts awaiting review."""
+
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+    UNKNOWN = "unknown"  # The send timed out; Gmail may or may not have sent it
+    REJECTED = "rejected"
+
+    FINISHED = (SENT, REJECTED)
+
+    def __init__(self, max_finished: Optional[int] = None):
+        self.max_finished = (max_finished if max_finished is not None
+                             else EMAIL_CONFIG.get("max_finished_drafts", 200))
+        self._drafts: Dict[int, Dict[str, Any]] = {}
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._finished: "OrderedDict[int, None]" = OrderedDict()
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def add(self, sender: str, sender_email: str, email_text: str, response: str, thread_id: str, **extra) -> Dict[str, Any]:
+        """Queue a new draft for review and return it."""
+        with self._lock:
+            draft = {
+                "id": self._next_id,
+                "sender": sender,
+                "sender_email": sender_email,
+                "email_text": email_text,
+                "response": response,
+                "thread_id": thread_id,
+                "status": self.PENDING,
+                "edited": False,
+                "created_at": time.time(),
+                **extra
+            }
+            self._drafts[draft["id"]] = draft
+            self._pending[draft["id"]] = draft
+            self._next_id += 1
+            return draft
+
+    def get(self, draft_id: int) -> Optional[Dict[str, Any]]:
+        """Get a draft by id."""
+        with self._lock:
+            return self._drafts.get(draft_id)
+
+    def list(self, status: Optional[str] = PENDING) -> List[Dict[str, Any]]:
+        """List drafts, oldest first, optionally filtered by status."""
+        with self._lock:
+            if status == self.PENDING:
+                return list(self._pending.values())
+            return [d for d in self._drafts.values() if status is None or d["status"] == status]
+
+    def claim(self, draft_id: int) -> Optional[Dict[str, Any]]:
+        """Move a pending draft to sending so it cannot be approved twice."""
+        with self._lock:
+            draft = self._pending.pop(draft_id, None)
+            if draft is None:
+                return None
+            draft["status"] = self.SENDING
+            return draft
+
+    def update_response(self, draft_id: int, response: str) -> Optional[Dict[str, Any]]:
+        """Replace the text of a pending draft."""
+        with self._lock:
+            draft = self._pending.get(draft_id)
+            if draft is None:
+                return None
+            draft["response"] = response
+            draft["edited"] = True
+            return draft
+
+    def set_status(self, draft_id: int, status: str, **fields):
+        """Set a draft's status, and any extra fields (e.g. the send key)."""
+        with self._lock:
+            draft = self._drafts.get(draft_id)
+            if draft is None:
+                return
+            draft.update(fields)
+            draft["status"] = status
+            draft["updated_at"] = time.time()
+            if status == self.PENDING:
+                self._pending[draft_id] = draft
+            else:
+                self._pending.pop(draft_id, None)
+            if status in self.FINISHED:
+                self._finished[draft_id] = None
+                self._finished.move_to_end(draft_id)
+                while len(self._finished) > self.max_finished:
+                    evicted, _ = self._finished.popitem(last=False)
+                    self._drafts.pop(evicted, None)
+            else:
+                self._finished.pop(draft_id, None)
+
+    def pending_count(self) -> int:
+        """Number of drafts awaiting review."""
+        with self._lock:
+            return len(self._pending)
@@ -0,0 +1,175 @@
+"""
+Durable work queue on SQLite, partitioned by sender, for handing trigger events to worker processes.
+
+Events are partitioned by a stable hash of the sender address, so every email
+from one sender goes to the same worker and is processed in arrival order. A
+row stays in the database until its worker acknowledges it; events claimed by a
+worker that died are handed out again when the partition is recovered.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from email.utils import parseaddr
+from typing import Dict, Any, Optional
+
+from config.agent_config import WORKER_CONFIG
+from config.paths import resolve_data_path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    partition INTEGER NOT NULL,
+    account TEXT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    enqueued_at REAL NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS events_partition ON events (partition, status, id);
+"""
+
+
+def sender_partition(sender: str, partitions: int) -> int:
+    """Partition of a sender address; stable across processes and restarts (unlike hash())."""
+    address = parseaddr(sender)[1] or sender
+    return zlib.crc32(address.strip().lower().encode("utf-8")) % partitions
+
+
+class DurableQueue:
+    """Per-partition FIFO of trigger payloads shared by the listener and worker processes."""
+
+    PENDING = "pending"
+    CLAIMED = "claimed"
+    FAILED = "failed"
+
+    def __init__(self, partitions: int, path: Optional[str] = None, max_attempts: Optional[int] = None,
+                 retry_delay_seconds: Optional[float] = None):
+        self.partitions = partitions
+        self.path = resolve_data_path(path or WORKER_CONFIG.get("queue_path", "data/work_queue.sqlite3"))
+        self.max_attempts = max_attempts or WORKER_CONFIG.get("max_attempts", 3)
+        self.retry_delay_seconds = (retry_delay_seconds if retry_delay_seconds is not None
+                                    else WORKER_CONFIG.get("retry_delay_seconds", 5.0))
+        self._local = threading.local()
+        self._db().executescript(_SCHEMA)
+
+    def _db(self) -> sqlite3.Connection:
+        """This thread's connection (SQLite connections are not shared across threads or processes)."""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def put(self, payload: Dict[str, Any], account: Optional[str] = None) -> int:
+        """Append an event to its sender's partition and return the partition."""
+        partition = sender_partition(payload.get("sender", ""), self.partitions)
+        now = time.time()
+        self._db().execute(
+            "INSERT INTO events (partition, account, payload, available_at, enqueued_at) VALUES (?, ?, ?, ?, ?)",
+            (partition, account, json.dumps(payload), now, now)
+        )
+        return partition
+
+    def rebalance(self) -> int:
+        """Re-partition unfinished events for the current partition count; run while no worker is active."""
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            moved = 0
+            rows = db.execute("SELECT id, partition, payload FROM events WHERE status != ?", (self.FAILED,)).fetchall()
+            for event_id, partition, payload in rows:
+                target = sender_partition(json.loads(payload).get("sender", ""), self.partitions)
+                if target != partition:
+                    db.execute("UPDATE events SET partition = ? WHERE id = ?", (target, event_id))
+                    moved += 1
+            self._release_claimed(db, "status = ?", (self.CLAIMED,))
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return moved
+
+    def _release_claimed(self, db: sqlite3.Connection, where: str, params: tuple) -> int:
+        """Return claimed events to pending; those already out of attempts are parked as failed."""
+        db.execute(
+            f"UPDATE events SET status = ?, error = COALESCE(error, ?) WHERE {where} AND attempts >= ?",
+            (self.FAILED, "worker stopped while processing", *params, self.max_attempts)
+        )
+        return db.execute(f"UPDATE events SET status = ? WHERE {where}", (self.PENDING, *params)).rowcount
+
+    def recover(self, partition: int) -> int:
+        """Hand out again the events a previous worker of this partition claimed but never finished.
+
+        A claim counts as an attempt, so an event that keeps killing its worker
+        is parked as failed after max_attempts instead of being retried forever.
+        """
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            released = self._release_claimed(db, "partition = ? AND status = ?", (partition, self.CLAIMED))
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return released
+
+    def claim(self, partition: int) -> Optional[Dict[str, Any]]:
+        """Oldest pending event of the partition, or None; a retry waiting out its delay blocks later events."""
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute(
+                "SELECT id, account, payload, attempts, available_at, enqueued_at FROM events "
+                "WHERE partition = ? AND status = ? ORDER BY id LIMIT 1",
+                (partition, self.PENDING)
+            ).fetchone()
+            if row is None or row[4] > time.time():
+                db.execute("COMMIT")
+                return None
+            db.execute("UPDATE events SET status = ?, attempts = attempts + 1 WHERE id = ?", (self.CLAIMED, row[0]))
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return {"id": row[0], "account": row[1], "payload": json.loads(row[2]),
+                "attempts": row[3] + 1, "enqueued_at": row[5]}
+
+    def ack(self, event_id: int):
+        """Remove a processed event."""
+        self._db().execute("DELETE FROM events WHERE id = ?", (event_id,))
+
+    def nack(self, event: Dict[str, Any], error: str):
+        """Retry a failed event after a delay, or park it as failed once it is out of attempts."""
+        if event["attempts"] >= self.max_attempts:
+            self._db().execute("UPDATE events SET status = ?, error = ? WHERE id = ?",
+                               (self.FAILED, error, event["id"]))
+        else:
+            self._db().execute("UPDATE events SET status = ?, error = ?, available_at = ? WHERE id = ?",
+                               (self.PENDING, error, time.time() + self.retry_delay_seconds * event["attempts"],
+                                event["id"]))
+
+    def depth(self) -> Dict[int, int]:
+        """Events waiting or in progress per partition."""
+        counts = dict(self._db().execute(
+            "SELECT partition, COUNT(*) FROM events WHERE status != ? GROUP BY partition", (self.FAILED,)
+        ).fetchall())
+        return {partition: counts.get(partition, 0) for partition in range(self.partitions)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth per partition and parked failures."""
+        failed = self._db().execute("SELECT COUNT(*) FROM events WHERE status = ?", (self.FAILED,)).fetchone()[0]
+        return {"partitions": self.partitions, "depth": self.depth(), "failed": failed}
+
+    def close(self):
+        """Close this thread's connection."""
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
@@ -2,24 +2,38 @@
 Email processor for handling email processing logic.
 """
 
-from typing import Optional
+from email.utils import parseaddr
+from typing import Optional, Dict, Any
 from .memory_manager import MemoryManager
+from .metrics import get_metrics
+from .near_duplicate import NearDuplicateIndex, first_name, personalize_greeting
 from .sender_info_extractor import SenderInfoExtractor
 from .response_generator import ResponseGenerator
+from .sender_address import parse_sender_email
+from .thread_context import ThreadContextFetcher
+from .tracing import Tracer, get_tracer
 
 
 class EmailProcessor:
     """Handles core email processing logic."""
     
-    def __init__(self, memory_manager: MemoryManager, sender_info_extractor: SenderInfoExtractor, response_generator: ResponseGenerator):
+    def __init__(self, memory_manager: MemoryManager, sender_info_extractor: SenderInfoExtractor, response_generator: ResponseGenerator,
+                 thread_context: Optional[ThreadContextFetcher] = None, tracer: Optional[Tracer] = None,
+                 duplicate_index: Optional[NearDuplicateIndex] = None):
         self.memory_manager = memory_manager
         self.sender_info_extractor = sender_info_extractor
         self.response_generator = response_generator
+        self.thread_context = thread_context
+        self.tracer = tracer or get_tracer()
+        self.duplicate_index = duplicate_index
     
-    def process_email(self, sender: str, email_text: str, thread_id: str, user_info: dict) -> dict:
+    def process_email(self, sender: str, email_text: str, thread_id: str, user_info: dict,
+                      message_id: Optional[str] = None) -> dict:
         """Process incoming email and return processing result."""
-        # Check if already processed
-        if self.memory_manager.is_thread_processed(thread_id):
+        # Deduplicate per message, so follow-ups in a known thread are answered; the
+        # thread id is the key only when the trigger carries no message id
+        dedup_key = message_id or thread_id
+        if self.memory_manager.is_thread_processed(dedup_key):
             return {
                 "success": False,
                 "reason": "already_processed",
@@ -27,11 +41,24 @@ class EmailProcessor:
             }
         
         # Mark as processed immediately to prevent duplicates
-        self.memory_manager.mark_thread_processed(thread_id)
+        self.memory_manager.mark_thread_processed(dedup_key)
         
         try:
+            # A first contact outside an existing thread can reuse the draft of a near-identical email
+            first_contact = not self.memory_manager.email_memory.get(sender)
+            thread_context = None
+            if self.duplicate_index is not None and first_contact:
+                thread_context = self._fetch_thread_context(thread_id, message_id)
+                if not thread_context:
+                    with self.tracer.span("near_duplicate_lookup"):
+                        duplicate = self.duplicate_index.find(email_text, sender)
+                    get_metrics().inc("near_duplicate_lookups_total", result="hit" if duplicate else "miss")
+                    if duplicate is not None:
+                        return self._reuse_draft(sender, email_text, thread_id, duplicate)
+            
             # Extract sender information
-            sender_info = self.sender_info_extractor.extract_sender_info(email_text)
+            with self.tracer.span("extract_sender_info"):
+                sender_info = self.sender_info_extractor.extract_sender_info(email_text, self.parse_sender_email(sender))
             
             # Add sender info to memory if any was extracted
             if sender_info:
@@ -41,22 +68,33 @@ class EmailProcessor:
             self.memory_manager.add_email_to_memory(sender, email_text, thread_id)
             
             # Get context for response generation
-            context = self.memory_manager.get_sender_context(sender)
+            with self.tracer.span("get_sender_context"):
+                context = self.memory_manager.get_sender_context(sender)
+            
+            # Earlier messages of this Gmail thread (cached, fetched incrementally)
+            if thread_context is None:
+                thread_context = self._fetch_thread_context(thread_id, message_id)
             
             # Generate response
-            response = self.response_generator.generate_response(sender, email_text, context, user_info)
+            with self.tracer.span("generate_response"):
+                response = self.response_generator.generate_response(sender, email_text, context, user_info, thread_context)
+            
+            if (self.duplicate_index is not None and first_contact and not thread_context
+                    and response != self.response_generator.fallback_response(user_info)):
+                self.duplicate_index.add(email_text, response, sender, sender_info, thread_id)
             
             return {
                 "success": True,
                 "response": response,
                 "context": context,
                 "sender_info": sender_info,
+                "thread_context": thread_context,
                 "thread_id": thread_id
             }
             
         except Exception as e:
             # Remove from processed threads if there was an error
-            self.memory_manager.unmark_thread_processed(thread_id)
+            self.memory_manager.unmark_thread_processed(dedup_key)
             return {
                 "success": False,
                 "reason": "processing_error",
@@ -64,19 +102,51 @@ class EmailProcessor:
                 "thread_id": thread_id
             }
     
+    def _fetch_thread_context(self, thread_id: str, message_id: Optional[str]) -> str:
+        """Earlier messages of the Gmail thread, or an empty string."""
+        if self.thread_context is None:
+            return ""
+        with self.tracer.span("fetch_thread_context"):
+            return self.thread_context.get_context(thread_id, message_id)
+    
+    def _reuse_draft(self, sender: str, email_text: str, thread_id: str, duplicate: Dict[str, Any]) -> dict:
+        """Answer with a near-duplicate's draft; only extracted details that also appear in this email are kept."""
+        text = email_text.lower()
+        sender_info = {key: value for key, value in duplicate["sender_info"].items()
+                       if key != "name" and str(value).lower() in text}
+        name = first_name(sender)
+        if name:
+            sender_info["name"] = parseaddr(sender)[0].strip().strip('"')
+        if sender_info:
+            self.memory_manager.add_sender_info(sender, sender_info)
+        self.memory_manager.add_email_to_memory(sender, email_text, thread_id)
+        return {
+            "success": True,
+            "response": personalize_greeting(duplicate["response"], name),
+            "context": "",
+            "sender_info": sender_info,
+            "thread_context": "",
+            "thread_id": thread_id,
+            "reused_from": duplicate["thread_id"],
+            "distance": duplicate["distance"]
+        }
+    
     def update_memory_with_response(self, sender: str, email_text: str, thread_id: str, response: str):
         """Update memory with sent response."""
         self.memory_manager.add_email_to_memory(sender, email_text, thread_id, response)
     
     def get_memory_stats(self) -> dict:
         """Get memory statistics."""
-        return self.memory_manager.get_memory_stats()
+        stats = self.memory_manager.get_memory_stats()
+        if self.thread_context is not None:
+            stats["thread_context"] = self.thread_context.get_stats()
+        if self.duplicate_index is not None:
+            stats["near_duplicates"] = self.duplicate_index.get_stats()
+        return stats
     
     def parse_sender_email(self, sender_email: str) -> str:
         """Parse sender email to extract just the email part."""
-        if "<" in sender_email and ">" in sender_email:
-            return sender_email.split("<")[1].split(">")[0].strip()
-        return sender_email.strip()
+        return parse_sender_email(sender_email)
     
     def generate_custom_response(self, prompt_text: str, user_info: dict) -> str:
         """Generate custom response for user prompts."""
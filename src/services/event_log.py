@@ -0,0 +1,61 @@
+"""
+Buffered JSON-lines event log for unattended runs and offline analysis.
+"""
+
+import json
+import threading
+import time
+from typing import Dict, Any, List, Optional, TextIO
+
+from config.paths import resolve_data_path
+
+
+class JsonLinesLog:
+    """Appends one JSON object per line, buffering writes and flushing by size or age."""
+
+    def __init__(self, path: Optional[str] = None, stream: Optional[TextIO] = None,
+                 flush_every_events: int = 50, flush_interval_seconds: float = 2.0):
+        self.path = resolve_data_path(path) if path else None
+        self.stream = stream
+        self.flush_every_events = flush_every_events
+        self.flush_interval_seconds = flush_interval_seconds
+        self._buffer: List[str] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self.events_written = 0
+
+    def write(self, event: str, **fields: Any):
+        """Record an event with a timestamp and arbitrary JSON-serializable fields."""
+        record: Dict[str, Any] = {"ts": round(time.time(), 6), "event": event}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._buffer.append(line)
+            due = (len(self._buffer) >= self.flush_every_events
+                   or time.monotonic() - self._last_flush >= self.flush_interval_seconds)
+            if due:
+                self._flush_locked()
+
+    def flush(self):
+        """Write buffered events."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        """Write buffered events (caller holds the lock)."""
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        data = "\n".join(self._buffer) + "\n"
+        self.events_written += len(self._buffer)
+        self._buffer = []
+        if self.stream is not None:
+            self.stream.write(data)
+            self.stream.flush()
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(data)
+
+    def close(self):
+        """Flush remaining events."""
+        self.flush()
@@ -2,43 +2,117 @@
 Memory manager for handling email memory and sender information.
 """
 
+import threading
 from typing import Dict, Any, Optional, List
 from config.agent_config import MEMORY_CONFIG
+from .sender_address import parse_sender_email
+from .thread_guard import ThreadGuard
 
 
 class MemoryManager:
     """Manages email memory and sender information."""
     
-    def __init__(self):
+    def __init__(self, summarizer=None):
         self.email_memory: Dict[str, List[Dict[str, Any]]] = {}
-        self.processed_threads: set = set()
+        self.processed_threads = ThreadGuard.from_config()
         self.sender_info: Dict[str, Dict[str, Any]] = {}
+        self.sender_summaries: Dict[str, str] = {}
+        self._compaction_backlog: Dict[str, List[Dict[str, Any]]] = {}
+        
+        # Guards mutations against concurrent snapshot export; version tracks unsaved changes
+        self._lock = threading.RLock()
+        self.version = 0
+        
+        # Optional background compaction of old exchanges into rolling summaries
+        self.summarizer = summarizer
+        self.summary_config = summarizer.config if summarizer is not None else MEMORY_CONFIG.get("summarization", {})
+        if self.summarizer is not None:
+            self.summarizer.attach(self)
     
     def add_email_to_memory(self, sender: str, email_text: str, thread_id: str, response: Optional[str] = None):
         """Add email to memory."""
+        with self._lock:
+            self._add_email(sender, email_text, thread_id, response)
+    
+    def _add_email(self, sender: str, email_text: str, thread_id: str, response: Optional[str]):
+        """Append an email to the sender's history (caller holds the lock)."""
+        self.version += 1
         if sender not in self.email_memory:
             self.email_memory[sender] = []
         
         self.email_memory[sender].append({
             "email": email_text[:MEMORY_CONFIG.get("max_email_length", 1000)],
             "thread_id": thread_id,
-            "response": response or ""
+            "response": response or "",
+            "summarized": False
         })
         
+        # Fold older emails into the rolling summary before they can be dropped
+        self._schedule_compaction(sender)
+        
         # Keep only last N emails per sender
         max_emails = MEMORY_CONFIG["max_emails_per_sender"]
         if len(self.email_memory[sender]) > max_emails:
             self.email_memory[sender] = self.email_memory[sender][-max_emails:]
     
+    def _schedule_compaction(self, sender: str):
+        """Hand emails that left the raw context window to the background summarizer."""
+        if self.summarizer is None:
+            return
+        
+        history = self.email_memory[sender]
+        keep_recent = self.summary_config.get("keep_recent_raw", 3)
+        older = history[:-keep_recent] if keep_recent else history
+        backlog = self._compaction_backlog.pop(sender, [])
+        pending = backlog + [e for e in older if not e.get("summarized")]
+        
+        overflow = len(history) - MEMORY_CONFIG["max_emails_per_sender"]
+        will_evict = overflow > 0 and any(not e.get("summarized") for e in history[:overflow])
+        if pending and (len(pending) >= self.summary_config.get("compact_batch_size", 3) or will_evict):
+            for email in pending:
+                email["summarized"] = True
+            self.summarizer.submit(sender, pending)
+        elif backlog:
+            # Evicted emails from a failed job wait for the next batch
+            self._compaction_backlog[sender] = backlog
+    
+    def requeue_compaction(self, sender: str, emails: List[Dict[str, Any]]):
+        """Return emails from a failed compaction job so they are retried."""
+        with self._lock:
+            for email in emails:
+                email["summarized"] = False
+            history = self.email_memory.get(sender, [])
+            evicted = [e for e in emails if not any(e is h for h in history)]
+            if evicted:
+                self._compaction_backlog.setdefault(sender, []).extend(evicted)
+    
+    def get_sender_summary(self, sender: str) -> str:
+        """Get the rolling summary of older exchanges with this sender."""
+        with self._lock:
+            return self.sender_summaries.get(sender, "")
+    
+    def set_sender_summary(self, sender: str, summary: str):
+        """Store the rolling summary for this sender."""
+        with self._lock:
+            self.version += 1
+            self.sender_summaries[sender] = summary
+    
     def add_sender_info(self, sender: str, info: Dict[str, Any]):
         """Add or update sender information."""
-        if sender not in self.sender_info:
-            self.sender_info[sender] = {}
-        
-        self.sender_info[sender].update(info)
+        with self._lock:
+            self.version += 1
+            if sender not in self.sender_info:
+                self.sender_info[sender] = {}
+            
+            self.sender_info[sender].update(info)
     
     def get_sender_context(self, sender: str) -> str:
         """Get context about previous interactions with this sender."""
+        with self._lock:
+            return self._sender_context(sender)
+    
+    def _sender_context(self, sender: str) -> str:
+        """Context text for a sender (caller holds the lock)."""
         context = ""
         
         # Add sender information if available
@@ -48,11 +122,18 @@ class MemoryManager:
                 context += f"- {info_type.title()}: {value}\n"
             context += "\n"
         
+        # Add rolling summary of older exchanges
+        summary = self.sender_summaries.get(sender)
+        if summary:
+            context += f"Summary of earlier conversations:\n{summary}\n\n"
+        
         # Add previous email context
         if sender not in self.email_memory:
             context += "No previous interactions."
         else:
             context_window = MEMORY_CONFIG["context_window"]
+            if self.summarizer is not None:
+                context_window = self.summary_config.get("keep_recent_raw", context_window)
             recent_emails = self.email_memory[sender][-context_window:]
             context += f"Previous {len(recent_emails)} emails from {sender}:\n"
             for i, email in enumerate(recent_emails, 1):
@@ -60,32 +141,51 @@ class MemoryManager:
         
         return context
     
+    def count_prior_replies(self, sender: str) -> int:
+        """Number of remembered emails from this sender that received a reply."""
+        with self._lock:
+            if sender not in self.email_memory:
+                return 0
+            return sum(1 for email in self.email_memory[sender] if email.get("response"))
+    
     def is_thread_processed(self, thread_id: str) -> bool:
-        """Check if thread has been processed."""
-        return thread_id in self.processed_threads
+        """Check if a message (or thread) id has been processed."""
+        with self._lock:
+            return thread_id in self.processed_threads
     
     def mark_thread_processed(self, thread_id: str):
-        """Mark thread as processed."""
-        self.processed_threads.add(thread_id)
+        """Mark a message (or thread) id as processed."""
+        with self._lock:
+            self.version += 1
+            self.processed_threads.add(thread_id)
     
     def unmark_thread_processed(self, thread_id: str):
         """Remove thread from processed list (for error handling)."""
-        self.processed_threads.discard(thread_id)
+        with self._lock:
+            self.version += 1
+            self.processed_threads.discard(thread_id)
     
     def get_memory_stats(self) -> Dict[str, Any]:
         """Get memory statistics for display."""
+        with self._lock:
+            return self._memory_stats()
+    
+    def _memory_stats(self) -> Dict[str, Any]:
+        """Memory statistics (caller holds the lock)."""
         stats: Dict[str, Any] = {
             "total_senders": len(self.email_memory),
             "processed_threads": len(self.processed_threads),
-            "senders_with_info": len(self.sender_info)
+            "senders_with_info": len(self.sender_info),
+            "senders_with_summary": len(self.sender_summaries),
+            "thread_guard": self.processed_threads.get_stats()
         }
         
         if self.email_memory:
             stats["email_history"] = {}
-            for sender, emails in self.email_memory.items():
+            for sender in self.email_memory:
                 # Parse sender email for display
                 sender_email = self._parse_sender_email(sender)
-                stats["email_history"][sender_email] = len(emails)
+                stats["email_history"][sender_email] = self._history_length(sender)
         
         if self.sender_info:
             stats["sender_info"] = {}
@@ -95,8 +195,40 @@ class MemoryManager:
         
         return stats
     
+    def _history_length(self, sender: str) -> int:
+        """Number of remembered emails for a sender, without decoding snapshot records."""
+        with self._lock:
+            if hasattr(self.email_memory, "item_count"):
+                return self.email_memory.item_count(sender)
+            return len(self.email_memory[sender])
+    
+    def export_state(self) -> Dict[str, Any]:
+        """Consistent shallow copy of all memory state for snapshotting."""
+        with self._lock:
+            histories = []
+            raw_record = getattr(self.email_memory, "raw_record", None)
+            for sender in self.email_memory:
+                record = raw_record(sender) if raw_record else None
+                histories.append((sender, record if record is not None else list(self.email_memory[sender])))
+            
+            return {
+                "email_memory": histories,
+                "sender_info": {sender: dict(info) for sender, info in self.sender_info.items()},
+                "sender_summaries": dict(self.sender_summaries),
+                "processed_threads": self.processed_threads.to_state()
+            }
+    
+    def restore_state(self, email_memory, sender_info: Dict[str, Dict[str, Any]],
+                      sender_summaries: Dict[str, str], processed_threads: Dict[str, Any]):
+        """Replace all memory state, e.g. from a snapshot."""
+        with self._lock:
+            self.email_memory = email_memory
+            self.sender_info = sender_info
+            self.sender_summaries = sender_summaries
+            self.processed_threads = ThreadGuard.from_config()
+            self.processed_threads.restore_state(processed_threads)
+            self._compaction_backlog = {}
+    
     def _parse_sender_email(self, sender_email: str) -> str:
         """Parse sender email to extract just the email part."""
-        if "<" in sender_email and ">" in sender_email:
-            return sender_email.split("<")[1].split(">")[0].strip()
-        return sender_email.strip()
+        return parse_sender_email(sender_email)
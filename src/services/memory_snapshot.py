@@ -0,0 +1,451 @@
+"""
+Binary snapshot format for MemoryManager state with memory-mapped, lazy loading.
+
+Layout (all integers little-endian):
+
+    magic   8 bytes  b"EMAILMEM"
+    version u16
+    count   u16      number of sections
+    section*         tag (4 ascii bytes) | length u64 | payload
+
+Sections:
+    META  JSON metadata (sender count, save time)
+    INFO  JSON sender_info
+    SUMM  JSON sender_summaries
+    THRD  JSON thread guard state (recent buckets, filter generation metadata)
+    BLOM  concatenated thread guard Bloom filter bit arrays
+    KEYS  sender keys joined by NUL
+    OFFS  u64 offsets into HIST, one per sender plus an end marker
+    HIST  concatenated history records, decoded only when a sender is accessed
+
+History record: u32 email count, then per email a u8 flags byte followed by
+the email text, thread id and response as u32 length-prefixed UTF-8 strings.
+"""
+
+import glob
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from array import array
+from collections.abc import MutableMapping
+from typing import Dict, Any, List, Optional, Iterator, Callable
+
+from config.agent_config import MEMORY_CONFIG
+from config.paths import resolve_data_path
+
+MAGIC = b"EMAILMEM"
+VERSION = 2
+
+_HEADER = struct.Struct("<8sHH")
+_SECTION = struct.Struct("<4sQ")
+_U32 = struct.Struct("<I")
+
+FLAG_SUMMARIZED = 0x01
+
+_SHARD = re.compile(r"shard(\d+)of(\d+)")
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing, corrupt or of an unsupported version."""
+
+
+def encode_history(emails: List[Dict[str, Any]]) -> bytes:
+    """Encode one sender's email history as a length-prefixed binary record."""
+    parts = [_U32.pack(len(emails))]
+    for email in emails:
+        parts.append(bytes([FLAG_SUMMARIZED if email.get("summarized") else 0]))
+        for field in ("email", "thread_id", "response"):
+            data = (email.get(field) or "").encode("utf-8")
+            parts.append(_U32.pack(len(data)))
+            parts.append(data)
+    return b"".join(parts)
+
+
+def decode_history(buffer, offset: int = 0) -> List[Dict[str, Any]]:
+    """Decode a history record produced by encode_history."""
+    (count,) = _U32.unpack_from(buffer, offset)
+    pos = offset + _U32.size
+    emails = []
+    for _ in range(count):
+        flags = buffer[pos]
+        pos += 1
+        fields = []
+        for _field in range(3):
+            (length,) = _U32.unpack_from(buffer, pos)
+            pos += _U32.size
+            fields.append(bytes(buffer[pos:pos + length]).decode("utf-8"))
+            pos += length
+        emails.append({
+            "email": fields[0],
+            "thread_id": fields[1],
+            "response": fields[2],
+            "summarized": bool(flags & FLAG_SUMMARIZED)
+        })
+    return emails
+
+
+class LazyHistoryMap(MutableMapping):
+    """
+    Sender -> history mapping backed by a memory-mapped snapshot, decoded on first access.
+    The map owns the mapping and closes it once no encoded record is left (or on close()).
+    A lock keeps a reader from decoding out of a mapping another thread has just closed.
+    """
+
+    def __init__(self, buffer, base: int, keys: List[str], offsets: array):
+        self._buffer = buffer
+        self._base = base
+        self._offsets = offsets
+        self._index: Dict[str, int] = dict(zip(keys, range(len(keys))))
+        self._decoded: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._release_if_decoded()
+
+    def __getitem__(self, sender: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            history = self._decoded.get(sender)
+            if history is not None:
+                return history
+            position = self._index.pop(sender)
+            history = decode_history(self._buffer, self._base + self._offsets[position])
+            self._decoded[sender] = history
+            self._release_if_decoded()
+            return history
+
+    def __setitem__(self, sender: str, history: List[Dict[str, Any]]):
+        with self._lock:
+            self._index.pop(sender, None)
+            self._decoded[sender] = history
+            self._release_if_decoded()
+
+    def __delitem__(self, sender: str):
+        with self._lock:
+            if sender in self._decoded:
+                del self._decoded[sender]
+            else:
+                del self._index[sender]
+                self._release_if_decoded()
+
+    def __contains__(self, sender) -> bool:
+        with self._lock:
+            return sender in self._decoded or sender in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            senders = list(self._decoded) + list(self._index)
+        yield from senders
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._decoded) + len(self._index)
+
+    def item_count(self, sender: str) -> int:
+        """Number of emails for a sender without decoding its record."""
+        with self._lock:
+            position = self._index.get(sender)
+            if position is None:
+                return len(self._decoded[sender])
+            return _U32.unpack_from(self._buffer, self._base + self._offsets[position])[0]
+
+    def raw_record(self, sender: str) -> Optional[bytes]:
+        """Encoded record for a sender that has not been decoded yet, else None."""
+        with self._lock:
+            position = self._index.get(sender)
+            if position is None:
+                return None
+            start = self._base + self._offsets[position]
+            end = self._base + self._offsets[position + 1]
+            return bytes(self._buffer[start:end])
+
+    @property
+    def decoded_count(self) -> int:
+        """Number of senders whose history has been decoded so far."""
+        return len(self._decoded)
+
+    def close(self):
+        """Decode every remaining history and release the mapped file."""
+        with self._lock:
+            for sender, position in list(self._index.items()):
+                self._decoded[sender] = decode_history(self._buffer, self._base + self._offsets[position])
+            self._index.clear()
+            self._release_if_decoded()
+
+    def _release_if_decoded(self):
+        """Close the mapping once every record has been decoded (caller holds the lock, or owns the map)."""
+        if not self._index and self._buffer is not None:
+            close = getattr(self._buffer, "close", None)
+            if close is not None:
+                close()
+            self._buffer = None
+
+
+def save_snapshot(memory_manager, path: str) -> Dict[str, Any]:
+    """Write the memory manager's state to path atomically and return save statistics."""
+    started = time.perf_counter()
+    state = memory_manager.export_state()
+
+    keys = []
+    offsets = array("Q")
+    records = []
+    position = 0
+    for sender, history in state["email_memory"]:
+        record = history if isinstance(history, bytes) else encode_history(history)
+        keys.append(sender)
+        offsets.append(position)
+        records.append(record)
+        position += len(record)
+    offsets.append(position)
+
+    guard_state = state["processed_threads"]
+    bloom_bits = []
+    for generation in guard_state["generations"]:
+        bloom_bits.append(generation.pop("bits"))
+        generation["bits_length"] = len(bloom_bits[-1])
+
+    meta = {"senders": len(keys), "saved_at": time.time()}
+    sections = [
+        (b"META", json.dumps(meta).encode("utf-8")),
+        (b"INFO", json.dumps(state["sender_info"], ensure_ascii=False).encode("utf-8")),
+        (b"SUMM", json.dumps(state["sender_summaries"], ensure_ascii=False).encode("utf-8")),
+        (b"THRD", json.dumps(guard_state).encode("utf-8")),
+        (b"BLOM", b"".join(bloom_bits)),
+        (b"KEYS", "\0".join(keys).encode("utf-8")),
+        (b"OFFS", offsets.tobytes()),
+    ]
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(sections) + 1))
+        for tag, payload in sections:
+            f.write(_SECTION.pack(tag, len(payload)))
+            f.write(payload)
+        f.write(_SECTION.pack(b"HIST", position))
+        for record in records:
+            f.write(record)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    return {
+        "senders": len(keys),
+        "bytes": os.path.getsize(path),
+        "seconds": time.perf_counter() - started
+    }
+
+
+def _read_sections(buffer) -> tuple:
+    """Return tag -> (payload offset, payload length) without copying payloads."""
+    if len(buffer) < _HEADER.size:
+        raise SnapshotError("Snapshot is truncated")
+    magic, version, count = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise SnapshotError("Not a memory snapshot file")
+    if version != VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {version}")
+
+    sections = {}
+    pos = _HEADER.size
+    for _ in range(count):
+        tag, length = _SECTION.unpack_from(buffer, pos)
+        pos += _SECTION.size
+        if pos + length > len(buffer):
+            raise SnapshotError(f"Section {tag!r} is truncated")
+        sections[tag] = (pos, length)
+        pos += length
+    return sections
+
+
+def load_snapshot(memory_manager, path: str) -> Dict[str, Any]:
+    """Load a snapshot into the memory manager; histories stay encoded until accessed."""
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise SnapshotError("Snapshot is empty")
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        state = _parse_snapshot(buffer)
+    except Exception as e:
+        buffer.close()
+        if isinstance(e, SnapshotError):
+            raise
+        raise SnapshotError(f"Snapshot is corrupt: {e}") from e
+
+    # From here on the history map owns the mapping
+    memory_manager.restore_state(**state)
+    return {"senders": len(state["email_memory"]), "seconds": time.perf_counter() - started}
+
+
+def _parse_snapshot(buffer) -> Dict[str, Any]:
+    """restore_state arguments read from a mapped snapshot; histories stay encoded in the buffer."""
+    sections = _read_sections(buffer)
+
+    def section_bytes(tag: bytes) -> bytes:
+        offset, length = sections[tag]
+        return buffer[offset:offset + length]
+
+    keys_blob = section_bytes(b"KEYS").decode("utf-8")
+    keys = keys_blob.split("\0") if keys_blob else []
+    offsets = array("Q")
+    offsets.frombytes(section_bytes(b"OFFS"))
+    if len(offsets) != len(keys) + 1:
+        raise SnapshotError("Snapshot index does not match sender keys")
+
+    processed_threads = json.loads(section_bytes(b"THRD"))
+    bits = section_bytes(b"BLOM")
+    position = 0
+    for generation in processed_threads["generations"]:
+        length = generation.pop("bits_length")
+        generation["bits"] = bits[position:position + length]
+        position += length
+
+    sender_info = json.loads(section_bytes(b"INFO"))
+    sender_summaries = json.loads(section_bytes(b"SUMM"))
+    return {
+        "email_memory": LazyHistoryMap(buffer, sections[b"HIST"][0], keys, offsets),
+        "sender_info": sender_info,
+        "sender_summaries": sender_summaries,
+        "processed_threads": processed_threads
+    }
+
+
+def snapshot_path(account: Optional[str] = None, shard: Optional[str] = None) -> str:
+    """Snapshot file of an account and worker shard; the plain path when neither is set."""
+    config = MEMORY_CONFIG.get("snapshot", {})
+    namespace = "_".join(filter(None, [account, shard]))
+    if not namespace:
+        return resolve_data_path(config.get("path", "data/memory.snapshot"))
+    return resolve_data_path(config.get("namespaced_path", "data/memory_{namespace}.snapshot").format(namespace=namespace))
+
+
+def shard_name(index: int, workers: int) -> str:
+    """Memory shard owned by a worker: its sender partition out of the worker count."""
+    return f"shard{index}of{workers}"
+
+
+def _shard_snapshots(account: Optional[str]) -> Dict[str, tuple]:
+    """Existing shard snapshot files of an account (or of the un-namespaced setup) -> (index, worker count)."""
+    shards = {}
+    for path in glob.glob(snapshot_path(glob.escape(account) if account else None, "shard*of*")):
+        match = _SHARD.search(os.path.basename(path))
+        if match and path == snapshot_path(account, shard_name(int(match.group(1)), int(match.group(2)))):
+            shards[path] = (int(match.group(1)), int(match.group(2)))
+    return shards
+
+
+def adopt_single_account_snapshots(account: str) -> List[str]:
+    """Move the snapshots written while one account ran alone (un-namespaced) into that account's namespace.
+
+    Returns the new paths; a namespaced snapshot that already exists is never overwritten.
+    """
+    moves = [(snapshot_path(), snapshot_path(account))]
+    for path, (index, workers) in _shard_snapshots(None).items():
+        moves.append((path, snapshot_path(account, shard_name(index, workers))))
+    adopted = []
+    for source, target in moves:
+        if os.path.exists(source) and not os.path.exists(target):
+            os.replace(source, target)
+            adopted.append(target)
+    return adopted
+
+
+def reshard_snapshots(account: Optional[str], workers: int, partition_of: Callable[[str], int]) -> Dict[str, Any]:
+    """Re-split an account's shard snapshots over `workers` shards when they were written with another count.
+
+    Senders move to the shard partition_of assigns them; every new shard keeps all
+    processed ids, so nothing is answered twice. Run while no worker is active.
+    """
+    targets = [snapshot_path(account, shard_name(index, workers)) for index in range(workers)]
+    sources = sorted(_shard_snapshots(account))
+    if not [path for path in sources if path not in targets]:
+        return {"sources": 0, "senders": 0}
+
+    from services.memory_manager import MemoryManager
+
+    shards = [MemoryManager() for _ in targets]
+    senders = 0
+    for path in sources:
+        old = MemoryManager()
+        load_snapshot(old, path)
+        for sender in set(old.email_memory) | set(old.sender_info) | set(old.sender_summaries):
+            shard = shards[partition_of(sender)]
+            if sender in old.email_memory:
+                shard.email_memory[sender] = old.email_memory[sender]
+            if sender in old.sender_info:
+                shard.sender_info[sender] = old.sender_info[sender]
+            if sender in old.sender_summaries:
+                shard.sender_summaries[sender] = old.sender_summaries[sender]
+            senders += 1
+        for shard in shards:
+            shard.processed_threads.merge_state(old.processed_threads.to_state())
+        old.email_memory.close()
+
+    for shard, path in zip(shards, targets):
+        save_snapshot(shard, path)
+    for path in sources:
+        if path not in targets:
+            os.remove(path)
+    return {"sources": len(sources), "senders": senders}
+
+
+class SnapshotScheduler:
+    """Periodically saves memory snapshots from a background thread when state has changed."""
+
+    def __init__(self, memory_manager, path: Optional[str] = None, interval_seconds: Optional[float] = None):
+        config = MEMORY_CONFIG.get("snapshot", {})
+        self.memory_manager = memory_manager
+        self.path = path or snapshot_path()
+        self.interval_seconds = interval_seconds or config.get("save_interval_seconds", 60)
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+        self.failures = 0
+        self._saved_version = memory_manager.version
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Load the snapshot if one exists."""
+        if not os.path.exists(self.path):
+            return None
+        result = load_snapshot(self.memory_manager, self.path)
+        self._saved_version = self.memory_manager.version
+        return result
+
+    def save_if_dirty(self) -> Optional[Dict[str, Any]]:
+        """Save a snapshot if memory changed since the last save.
+
+        Returns the save statistics, {"error": ...} when the save failed, or None when nothing changed.
+        """
+        version = self.memory_manager.version
+        if version == self._saved_version:
+            return None
+        try:
+            self.last_result = save_snapshot(self.memory_manager, self.path)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            return {"error": self.last_error}
+        self._saved_version = version
+        self.last_error = None
+        return self.last_result
+
+    def start(self):
+        """Start periodic background saving."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="memory-snapshot", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> Optional[Dict[str, Any]]:
+        """Stop background saving and write a final snapshot; returns its save_if_dirty result."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        return self.save_if_dirty()
+
+    def _run(self):
+        """Save loop."""
+        while not self._stop.wait(self.interval_seconds):
+            self.save_if_dirty()
@@ -0,0 +1,137 @@
+"""
+Background memory compaction that folds old exchanges into rolling per-sender summaries.
+"""
+
+import queue
+import threading
+from typing import Dict, Any, List, Optional
+from config.agent_config import MEMORY_CONFIG
+from services.usage_tracker import get_usage_tracker
+
+
+class LLMSummaryBackend:
+    """Summarizes exchanges with a (cheap) chat model."""
+
+    def __init__(self, config: Dict[str, Any]):
+        from langchain_openai import ChatOpenAI
+
+        self.config = config
+        self.model = ChatOpenAI(
+            model=config.get("model", "gpt-4o-mini"),
+            temperature=config.get("temperature", 0.2),
+            max_completion_tokens=400
+        )
+        self.budget_fallback = LocalSummaryBackend(config)
+
+    def summarize(self, sender: str, summary: str, emails: List[Dict[str, Any]]) -> str:
+        """Fold emails into the existing summary."""
+        from langchain_core.messages import HumanMessage
+
+        # Once the daily token budget is spent, summaries are built locally
+        usage = get_usage_tracker()
+        if usage.use_cheaper_behavior("summarize"):
+            return self.budget_fallback.summarize(sender, summary, emails)
+
+        max_chars = self.config.get("max_summary_chars", 1200)
+        prompt = self.config["summary_prompt"].format(
+            sender=sender,
+            summary=summary or "(none yet)",
+            exchanges=_format_exchanges(emails),
+            max_chars=max_chars
+        )
+        from services.metrics import get_metrics
+        model_name = self.config.get("model", "gpt-4o-mini")
+        with get_metrics().time_llm_call(model_name, "summarize"):
+            response = self.model.invoke([HumanMessage(content=prompt)])
+        usage.record("summarize", model_name, response, sender=sender)
+        return str(response.content).strip()[:max_chars]
+
+
+class LocalSummaryBackend:
+    """Deterministic offline stand-in that keeps the first sentence of each exchange."""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+
+    def summarize(self, sender: str, summary: str, emails: List[Dict[str, Any]]) -> str:
+        """Append one line per email and keep the most recent tail within the size cap."""
+        max_chars = self.config.get("max_summary_chars", 1200)
+        lines = [summary] if summary else []
+        for email in emails:
+            first_sentence = email["email"].strip().split("\n")[0].split(". ")[0][:160]
+            line = f"- They wrote: {first_sentence}"
+            if email.get("response"):
+                line += f" (replied: {email['response'].strip().split(chr(10))[0][:80]})"
+            lines.append(line)
+
+        text = "\n".join(lines)
+        if len(text) > max_chars:
+            text = text[-max_chars:]
+            text = text[text.find("\n") + 1:] if "\n" in text else text
+        return text
+
+
+def _format_exchanges(emails: List[Dict[str, Any]]) -> str:
+    """Render emails and replies for the summary prompt."""
+    parts = []
+    for i, email in enumerate(emails, 1):
+        parts.append(f"{i}. They wrote: {email['email']}")
+        if email.get("response"):
+            parts.append(f"   You replied: {email['response']}")
+    return "\n".join(parts)
+
+
+class MemorySummarizer:
+    """Runs summary compaction jobs on a background worker thread."""
+
+    def __init__(self, backend=None, config: Optional[Dict[str, Any]] = None):
+        self.config = config or MEMORY_CONFIG.get("summarization", {})
+        self.backend = backend or self._create_backend()
+        self.memory_manager = None
+        self._jobs: "queue.Queue" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self.completed_jobs = 0
+        self.failed_jobs = 0
+
+    def _create_backend(self):
+        """Create the configured summarization backend."""
+        if self.config.get("backend") == "local":
+            return LocalSummaryBackend(self.config)
+        return LLMSummaryBackend(self.config)
+
+    def attach(self, memory_manager):
+        """Attach the memory manager whose summaries this summarizer maintains."""
+        self.memory_manager = memory_manager
+
+    def submit(self, sender: str, emails: List[Dict[str, Any]]):
+        """Queue emails to be folded into the sender's summary."""
+        self._ensure_worker()
+        self._jobs.put((sender, list(emails)))
+
+    def wait_idle(self):
+        """Block until all queued jobs have been processed (used by tests and shutdown)."""
+        self._jobs.join()
+
+    def _ensure_worker(self):
+        """Start the worker thread on first use."""
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="memory-summarizer", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        """Process compaction jobs one at a time so per-sender order is preserved."""
+        while True:
+            sender, emails = self._jobs.get()
+            try:
+                if self.memory_manager is not None:
+                    summary = self.memory_manager.get_sender_summary(sender)
+                    new_summary = self.backend.summarize(sender, summary, emails)
+                    self.memory_manager.set_sender_summary(sender, new_summary)
+                self.completed_jobs += 1
+            except Exception:
+                # Keep the emails so the next compaction retries them
+                self.failed_jobs += 1
+                if self.memory_manager is not None:
+                    self.memory_manager.requeue_compaction(sender, emails)
+            finally:
+                self._jobs.task_done()
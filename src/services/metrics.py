@@ -0,0 +1,280 @@
+"""
+Process metrics exposed in the Prometheus text format over a local HTTP endpoint.
+
+Counters and histograms are sharded per thread: the hot path only updates a
+dict owned by the calling thread, and a scrape sums the shards. Shards of threads
+that have exited are folded into one retired shard, so short-lived threads do
+not accumulate. Values that
+already live elsewhere (pending drafts, memory sizes, send counters) are read
+through callbacks at scrape time instead of being mirrored.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Callable, Tuple, Iterator
+
+from config.agent_config import METRICS_CONFIG
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Shard:
+    """Metric values written by one thread."""
+
+    def __init__(self, thread: Optional[threading.Thread] = None):
+        self.thread = thread
+        self.counters: Dict[Tuple[str, LabelKey], float] = {}
+        self.histograms: Dict[Tuple[str, LabelKey], List[float]] = {}
+
+    def merge(self, other: "_Shard"):
+        """Add another shard's values to this one."""
+        for key, value in other.counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, values in other.histograms.items():
+            total = self.histograms.get(key)
+            self.histograms[key] = list(values) if total is None else [a + b for a, b in zip(total, values)]
+
+
+class MetricsRegistry:
+    """Counters, histograms and scrape-time callbacks."""
+
+    def __init__(self, prefix: str = "email_agent"):
+        self.prefix = prefix
+        self._definitions: Dict[str, Dict[str, Any]] = {}
+        self._callbacks: Dict[str, Dict[LabelKey, Callable[[], Any]]] = {}
+        self._shards: List[_Shard] = []
+        self._retired = _Shard()  # Values of threads that have exited
+        self._shards_lock = threading.Lock()
+        self._local = threading.local()
+
+    def counter(self, name: str, help_text: str):
+        """Declare a counter."""
+        self._definitions[name] = {"type": "counter", "help": help_text}
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """Declare a histogram (observations in seconds)."""
+        self._definitions[name] = {"type": "histogram", "help": help_text, "buckets": tuple(buckets)}
+
+    def register_callback(self, name: str, metric_type: str, help_text: str, func: Callable[[], Any],
+                          **labels: str):
+        """Read a gauge or counter at scrape time; func returns a number or {labels dict items: value}.
+
+        Callbacks registered under different labels (e.g. one per account) are reported side by side;
+        registering the same name and labels twice raises ValueError.
+        """
+        key = tuple(sorted(labels.items()))
+        callbacks = self._callbacks.setdefault(name, {})
+        if key in callbacks:
+            raise ValueError(f"Metric callback {name}{_format_labels(key)} is already registered")
+        self._definitions[name] = {"type": metric_type, "help": help_text}
+        callbacks[key] = func
+
+    def _shard(self) -> _Shard:
+        """This thread's shard, created on first use."""
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard(threading.current_thread())
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        """Increment a counter."""
+        counters = self._shard().counters
+        key = (name, tuple(sorted(labels.items())))
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels: str):
+        """Add an observation to a histogram."""
+        histograms = self._shard().histograms
+        key = (name, tuple(sorted(labels.items())))
+        buckets = self._definitions.get(name, {}).get("buckets", DEFAULT_BUCKETS)
+        values = histograms.get(key)
+        if values is None:
+            # One slot per bucket, then +Inf, sum and count
+            values = histograms[key] = [0.0] * (len(buckets) + 3)
+        for i, bound in enumerate(buckets):
+            if seconds <= bound:
+                values[i] += 1
+                break
+        else:
+            values[len(buckets)] += 1
+        values[-2] += seconds
+        values[-1] += 1
+
+    @contextmanager
+    def time_llm_call(self, model: str, stage: str) -> Iterator[None]:
+        """Count an LLM call and its latency and errors per model and stage."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc("llm_errors_total", model=model, stage=stage)
+            raise
+        finally:
+            self.inc("llm_calls_total", model=model, stage=stage)
+            self.observe("llm_latency_seconds", time.perf_counter() - started, model=model, stage=stage)
+
+    def _collect(self) -> Tuple[Dict[Tuple[str, LabelKey], float], Dict[Tuple[str, LabelKey], List[float]]]:
+        """Sum all thread shards, folding those of exited threads into the retired shard."""
+        with self._shards_lock:
+            live = []
+            for shard in self._shards:
+                if shard.thread.is_alive():
+                    live.append(shard)
+                else:
+                    # Its thread is gone, so nothing writes to it any more
+                    self._retired.merge(shard)
+            self._shards = live
+            shards = live + [self._retired]
+        counters: Dict[Tuple[str, LabelKey], float] = {}
+        histograms: Dict[Tuple[str, LabelKey], List[float]] = {}
+        for shard in shards:
+            # dict.copy() is atomic under the GIL, so owners never wait for a scrape
+            for key, value in shard.counters.copy().items():
+                counters[key] = counters.get(key, 0) + value
+            for key, values in shard.histograms.copy().items():
+                values = list(values)
+                total = histograms.get(key)
+                histograms[key] = values if total is None else [a + b for a, b in zip(total, values)]
+        return counters, histograms
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        counters, histograms = self._collect()
+        lines: List[str] = []
+        for name, definition in sorted(self._definitions.items()):
+            full_name = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {full_name} {definition['help']}")
+            lines.append(f"# TYPE {full_name} {definition['type']}")
+
+            if name in self._callbacks:
+                for base_labels, func in sorted(self._callbacks[name].items()):
+                    try:
+                        value = func()
+                    except Exception:
+                        continue
+                    samples = value.items() if isinstance(value, dict) else [((), value)]
+                    for labels, sample in samples:
+                        labels = tuple(sorted(base_labels + tuple(labels)))
+                        lines.append(f"{full_name}{_format_labels(labels)} {_format_value(sample)}")
+            elif definition["type"] == "histogram":
+                buckets = definition["buckets"]
+                for (metric, labels), values in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0.0
+                    for bound, count in zip(buckets + (float("inf"),), values):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{full_name}_bucket{_format_labels(labels + (('le', le),))} {_format_value(cumulative)}")
+                    lines.append(f"{full_name}_sum{_format_labels(labels)} {_format_value(values[-2])}")
+                    lines.append(f"{full_name}_count{_format_labels(labels)} {_format_value(values[-1])}")
+            else:
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{full_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: LabelKey) -> str:
+    """{a="1",b="2"} with Prometheus escaping."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value: Any) -> str:
+    """Escape a label value."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    """Integers without a decimal point."""
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class MetricsServer:
+    """Serves /metrics from a daemon thread."""
+
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9464):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self):
+        """Bind and serve in the background."""
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+
+    def stop(self):
+        """Stop serving."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _define_pipeline_metrics(registry: MetricsRegistry):
+    """Metrics recorded by the pipeline itself; scrape-time values are registered by their owners."""
+    registry.counter("events_received_total", "Trigger events received")
+    registry.counter("events_deduplicated_total", "Trigger events dropped as duplicates")
+    registry.counter("events_unrouted_total", "Trigger events for an account this process does not serve")
+    registry.counter("events_filtered_total", "Trigger events dropped by the sender filter")
+    registry.histogram("priority_wait_seconds", "Time emails waited in the priority queue by priority",
+                       buckets=(0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0))
+    registry.counter("events_enqueued_total", "Trigger events queued for a worker process, by partition")
+    registry.counter("worker_events_processed_total", "Queued events processed by this worker")
+    registry.counter("worker_events_failed_total", "Queued events that failed in this worker and were retried or parked")
+    registry.counter("llm_calls_total", "LLM calls by model and stage")
+    registry.counter("llm_errors_total", "Failed LLM calls by model and stage")
+    registry.histogram("llm_latency_seconds", "LLM call latency by model and stage")
+    registry.counter("llm_tokens_total", "LLM tokens by model, stage and type (input or output)")
+    registry.counter("usage_save_errors_total", "Failed writes of the daily usage totals")
+    registry.counter("fallback_responses_total", "Replies that fell back to the canned response")
+    registry.counter("near_duplicate_lookups_total", "Near-duplicate draft lookups by result (hit or miss)")
+    registry.counter("alternative_drafts_total",
+                     "Background alternative drafts by outcome (generated, failed, used, cancelled, discarded)")
+    registry.counter("emails_processed_total", "Emails that produced a draft or reply")
+    registry.counter("processing_errors_total", "Emails that failed during processing")
+
+
+_default_registry: Optional[MetricsRegistry] = None
+_default_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Process-wide metrics registry."""
+    global _default_registry
+    if _default_registry is None:
+        with _default_lock:
+            if _default_registry is None:
+                registry = MetricsRegistry(METRICS_CONFIG.get("prefix", "email_agent"))
+                _define_pipeline_metrics(registry)
+                _default_registry = registry
+    return _default_registry
@@ -0,0 +1,242 @@
+"""
+Near-duplicate index of recently answered emails, for reusing drafts on templated mail.
+
+Bodies are reduced to a 64-bit SimHash over word shingles, with greetings,
+addresses and the sender's own name masked, so form submissions and the same
+question asked by different people land within a few bits of each other. The
+fingerprint is split into bands; two fingerprints within ``max_distance`` bits
+agree exactly on at least one band whenever ``bands > max_distance``
+(pigeonhole), so a lookup only compares against entries sharing a band instead
+of the whole index.
+
+A similar body is not enough to reuse a draft: every specific token of the
+draft (numbers, addresses, and capitalized words it quotes from the email it
+answered) must also appear in the new email, so one sender's order numbers,
+amounts or names are never sent to another.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parseaddr
+from typing import Dict, Any, List, Optional, Tuple
+
+from config.agent_config import EMAIL_CONFIG
+
+_GREETING = re.compile(
+    r"^(\s*)(hi|hello|hey|dear|greetings|good (?:morning|afternoon|evening))\b(?:[ \t]+[^\s,!:]+){0,3}[ \t]*([,!:])?[ \t]*$",
+    re.IGNORECASE
+)
+_ADDRESS = re.compile(r"\S+@\S+|https?://\S+")
+_WORD = re.compile(r"[a-z0-9']+")
+_CAPITALIZED = re.compile(r"\b[A-Z][A-Za-z'-]*")
+
+
+def first_name(sender: str, sender_info: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """First name from the sender's display name, else from extracted details."""
+    display = parseaddr(sender)[0].strip().strip('"')
+    if display and "@" not in display:
+        return display.split()[0].strip(",")
+    name = str((sender_info or {}).get("name", "")).strip()
+    return name.split()[0] if name else None
+
+
+def _split_greeting(text: str) -> Tuple[Optional[re.Match], str]:
+    """The greeting line (if the text starts with one) and the rest of the text."""
+    stripped = text.lstrip("\n")
+    line, _, rest = stripped.partition("\n")
+    match = _GREETING.match(line) if len(line) <= 60 else None
+    return (match, rest) if match else (None, stripped)
+
+
+def personalize_greeting(response: str, name: Optional[str]) -> str:
+    """Address a reused reply to a new recipient by rewriting its greeting line."""
+    match, rest = _split_greeting(response)
+    if match is None:
+        return response
+    indent, word, punctuation = match.group(1), match.group(2), match.group(3) or ","
+    greeting = f"{indent}{word} {name}{punctuation}" if name else f"{indent}{word}{punctuation}"
+    return f"{greeting}\n{rest}"
+
+
+def _tokens(text: str) -> set:
+    """Lowercased words and addresses of a text, for containment checks."""
+    lowered = text.lower()
+    return set(_WORD.findall(lowered)) | {a.rstrip(".,;:)>") for a in _ADDRESS.findall(lowered)}
+
+
+def specific_tokens(response: str, email_text: str) -> set:
+    """Tokens of a reply that belong to the email it answered: numbers, addresses, quoted capitalized words."""
+    _, body = _split_greeting(response)
+    lowered = body.lower()
+    specific = {a.rstrip(".,;:)>") for a in _ADDRESS.findall(lowered)}
+    specific |= {word for word in _WORD.findall(lowered) if any(c.isdigit() for c in word)}
+    _, email_body = _split_greeting(email_text)
+    email_words = set(_WORD.findall(email_body.lower()))
+    specific |= {word.lower() for word in _CAPITALIZED.findall(body) if word.lower() in email_words}
+    return specific
+
+
+# Per-bit counters live in 32-bit lanes of one big integer; each byte of a hash
+# adds its eight bits with a single table lookup instead of eight shifts
+_LANE_BITS = 32
+_BYTE_LANES = [sum(1 << (_LANE_BITS * i) for i in range(8) if byte >> i & 1) for byte in range(256)]
+
+
+def simhash(words: List[str], shingle_words: int = 3) -> int:
+    """64-bit SimHash of a word sequence, weighting each shingle once."""
+    shingles = {" ".join(words[i:i + shingle_words]) for i in range(max(1, len(words) - shingle_words + 1))}
+    lanes = 0
+    for shingle in shingles:
+        digest = hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest()
+        for k, byte in enumerate(digest):
+            lanes += _BYTE_LANES[byte] << (_LANE_BITS * 8 * k)
+    lane_mask = (1 << _LANE_BITS) - 1
+    fingerprint = 0
+    for bit in range(64):
+        # Bit set when more shingles have it set than not
+        if 2 * (lanes >> (_LANE_BITS * bit) & lane_mask) > len(shingles):
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+class NearDuplicateIndex:
+    """Bounded, time-limited SimHash index mapping email fingerprints to the draft they received."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = config or EMAIL_CONFIG.get("near_duplicate", {})
+        self.max_distance = self.config.get("max_distance", 5)
+        self.bands = self.config.get("bands", 8)
+        if self.bands <= self.max_distance:
+            raise ValueError("near_duplicate bands must exceed max_distance so every match shares a band")
+        self.band_bits = 64 // self.bands
+        self.shingle_words = self.config.get("shingle_words", 3)
+        self.min_words = self.config.get("min_words", 20)
+        self.scan_chars = self.config.get("scan_chars", 4000)
+        self.max_entries = self.config.get("max_entries", 5000)
+        self.ttl_seconds = self.config.get("ttl_seconds", 7 * 24 * 3600)
+
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, int], List[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.skipped = 0
+        self.rejected = 0
+
+    def fingerprint(self, email_text: str, sender: str = "") -> Optional[int]:
+        """Fingerprint of a body, or None when it is too short to compare reliably."""
+        _, body = _split_greeting(email_text[:self.scan_chars])
+        display, address = parseaddr(sender)
+        own = set(_WORD.findall(f"{display} {address.split('@')[0]}".lower()))
+        words = ["#" if word in own else word for word in _WORD.findall(_ADDRESS.sub(" ", body.lower()))]
+        if len(words) < self.min_words:
+            return None
+        return simhash(words, self.shingle_words)
+
+    def _bands(self, fingerprint: int) -> List[Tuple[int, int]]:
+        """(band, value) keys of a fingerprint."""
+        mask = (1 << self.band_bits) - 1
+        return [(band, fingerprint >> (band * self.band_bits) & mask) for band in range(self.bands)]
+
+    def find(self, email_text: str, sender: str = "") -> Optional[Dict[str, Any]]:
+        """
+        Closest recent entry within max_distance bits whose draft is safe to send for this
+        email (with its `distance`), or None; counts the lookup.
+        """
+        fingerprint = self.fingerprint(email_text, sender)
+        with self._lock:
+            if fingerprint is None:
+                self.skipped += 1
+                return None
+            self.lookups += 1
+            self._expire()
+            candidates: Dict[int, int] = {}
+            for key in self._bands(fingerprint):
+                for entry_id in self._buckets.get(key, ()):
+                    distance = bin(self._entries[entry_id]["fingerprint"] ^ fingerprint).count("1")
+                    if distance <= self.max_distance:
+                        candidates[entry_id] = distance
+            if not candidates:
+                return None
+            present = _tokens(email_text)
+            for entry_id in sorted(candidates, key=candidates.get):
+                entry = self._entries[entry_id]
+                if entry["specific"] <= present:
+                    self.hits += 1
+                    entry["reuses"] += 1
+                    return {**entry, "distance": candidates[entry_id]}
+            # Similar text, but the draft carries details of the email it answered
+            self.rejected += 1
+            return None
+
+    def add(self, email_text: str, response: str, sender: str, sender_info: Dict[str, Any], thread_id: str) -> bool:
+        """Remember the draft an email received; replies that name their recipient past the greeting are skipped."""
+        name = first_name(sender, sender_info)
+        _, body = _split_greeting(response)
+        if name and re.search(rf"\b{re.escape(name)}\b", body, re.IGNORECASE):
+            return False
+        fingerprint = self.fingerprint(email_text, sender)
+        if fingerprint is None:
+            return False
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = {
+                "fingerprint": fingerprint,
+                "response": response,
+                "sender_info": dict(sender_info or {}),
+                "specific": specific_tokens(response, email_text),
+                "thread_id": thread_id,
+                "added_at": time.monotonic(),
+                "reuses": 0
+            }
+            for key in self._bands(fingerprint):
+                self._buckets.setdefault(key, []).append(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._evict_oldest()
+        return True
+
+    def discard(self, thread_id: str) -> int:
+        """Forget the drafts remembered for a thread (e.g. after the reviewer rejected one)."""
+        with self._lock:
+            stale = [entry_id for entry_id, entry in self._entries.items() if entry["thread_id"] == thread_id]
+            for entry_id in stale:
+                entry = self._entries.pop(entry_id)
+                self._remove_from_buckets(entry_id, entry["fingerprint"])
+        return len(stale)
+
+    def _expire(self):
+        """Drop entries older than the TTL (oldest first)."""
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._entries and next(iter(self._entries.values()))["added_at"] < cutoff:
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        """Remove the oldest entry and its band keys."""
+        entry_id, entry = self._entries.popitem(last=False)
+        self._remove_from_buckets(entry_id, entry["fingerprint"])
+
+    def _remove_from_buckets(self, entry_id: int, fingerprint: int):
+        """Unlink an entry from its band buckets."""
+        for key in self._bands(fingerprint):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.remove(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Lookups, hits and hit rate since start, and the index size."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "skipped": self.skipped,
+                "rejected": self.rejected,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0
+            }
@@ -0,0 +1,346 @@
+"""
+Asynchronous outbound reply queue with retries, idempotency keys and a dead-letter list.
+
+Sent keys and dead letters are kept on disk, so a restart neither re-sends a
+reply nor forgets one that failed. A send that times out is not retried: Gmail
+may have sent it, so it is dead-lettered as "unknown" for the user to check
+before resending.
+
+The state file is an append-only JSON-lines log: each send, dead letter and
+retry appends one fsynced line instead of rewriting the whole state. The log is
+compacted to the live state on startup and once it has grown to twice that size.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, Any, List, Optional, Callable
+
+from config.agent_config import EMAIL_CONFIG
+from config.paths import resolve_data_path
+from services.tracing import Tracer, get_tracer
+
+# Dead-letter fields written to disk; callbacks are rebuilt from the account's registered sender
+_PERSISTED_FIELDS = ("key", "recipient_email", "thread_id", "message_text", "trace_id", "account",
+                     "attempts", "error", "outcome", "failed_at")
+
+
+def reply_idempotency_key(thread_id: str, recipient_email: str, message_text: str) -> str:
+    """Stable key for one reply: the same text to the same thread is only ever sent once."""
+    digest = hashlib.sha256(f"{recipient_email}\n{message_text}".encode("utf-8")).hexdigest()[:16]
+    return f"{thread_id}:{digest}"
+
+
+def _is_timeout(error: Exception) -> bool:
+    """Whether a send failed by timing out, leaving its outcome unknown."""
+    return isinstance(error, TimeoutError) or "timeout" in type(error).__name__.lower()
+
+
+class OutboundQueue:
+    """Sends replies on a pool of worker threads; results are delivered through futures."""
+
+    def __init__(self, send_func: Optional[Callable[..., Any]], workers: Optional[int] = None,
+                 max_attempts: Optional[int] = None, base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None, sent_key_capacity: int = 10000,
+                 tracer: Optional[Tracer] = None, path: Optional[str] = None):
+        self.send_func = send_func
+        self.tracer = tracer or get_tracer()
+        self.workers = workers or EMAIL_CONFIG.get("send_workers", 4)
+        self.max_attempts = max_attempts or EMAIL_CONFIG.get("max_retry_attempts", 3)
+        self.base_delay = base_delay if base_delay is not None else EMAIL_CONFIG.get("retry_base_delay_seconds", 1.0)
+        self.max_delay = max_delay if max_delay is not None else EMAIL_CONFIG.get("retry_max_delay_seconds", 30.0)
+        self.sent_key_capacity = sent_key_capacity
+        path = path or EMAIL_CONFIG.get("outbound_state_path")
+        self.path = resolve_data_path(path) if path else None
+
+        self._jobs: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._log_lock = threading.Lock()  # Taken before _lock, never while holding it
+        self._log_records = 0
+        self._sent_keys: "OrderedDict[str, float]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self.dead_letters: List[Dict[str, Any]] = []
+        self._senders: Dict[Optional[str], Callable[..., Any]] = {}
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+
+        self.sent = 0
+        self.retries = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.duplicates = 0
+        self.callback_errors = 0
+        self.last_error: Optional[str] = None
+        self._load()
+
+    def register_sender(self, account: Optional[str], send_func: Callable[..., Any]):
+        """Send function for an account's dead letters that were loaded from disk."""
+        with self._lock:
+            self._senders[account] = send_func
+
+    def submit(self, recipient_email: str, message_text: str, thread_id: str,
+               on_sent: Optional[Callable[[], None]] = None, key: Optional[str] = None,
+               trace_id: Optional[str] = None, send_func: Optional[Callable[..., Any]] = None,
+               account: Optional[str] = None) -> Future:
+        """Queue a reply; a key that was already sent or is in flight is never sent twice.
+
+        send_func and account let one queue serve several mailboxes; the default is the queue's send_func.
+        """
+        key = key or reply_idempotency_key(thread_id, recipient_email, message_text)
+        with self._lock:
+            if key in self._sent_keys:
+                self.duplicates += 1
+                future: Future = Future()
+                future.set_result({"success": True, "key": key, "duplicate": True, "attempts": 0, "seconds": 0.0})
+                return future
+            if key in self._inflight:
+                self.duplicates += 1
+                return self._inflight[key]
+
+            future = Future()
+            self._inflight[key] = future
+
+        self._ensure_workers()
+        job = {
+            "key": key,
+            "recipient_email": recipient_email,
+            "message_text": message_text,
+            "thread_id": thread_id,
+            "on_sent": on_sent,
+            "trace_id": trace_id or self.tracer.current_trace_id,
+            "send_func": send_func or self.send_func,
+            "account": account,
+            "future": future,
+            "submitted_at": time.perf_counter()
+        }
+        self._jobs.put(job)
+        return future
+
+    def _ensure_workers(self):
+        """Start worker threads on first use."""
+        with self._lock:
+            if self._threads:
+                return
+            self._stop.clear()  # Restarting after stop()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"outbound-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self):
+        """Worker loop."""
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                self._jobs.task_done()
+                return
+            try:
+                self._deliver(job)
+            finally:
+                self._jobs.task_done()
+
+    def _deliver(self, job: Dict[str, Any]):
+        """Send one reply, retrying transient failures with jittered exponential backoff."""
+        error = ""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                with self.tracer.span("reply_to_thread", trace_id=job["trace_id"], attempt=attempt):
+                    job["send_func"](
+                        recipient_email=job["recipient_email"],
+                        message_text=job["message_text"],
+                        thread_id=job["thread_id"]
+                    )
+                self._complete(job, {"success": True, "attempts": attempt})
+                if job["on_sent"]:
+                    try:
+                        job["on_sent"]()
+                    except Exception as e:
+                        with self._lock:
+                            self.callback_errors += 1
+                            self.last_error = f"After sending {job['key']}: {e}"
+                return
+            except Exception as e:
+                error = str(e)
+                if _is_timeout(e):
+                    # Gmail may have sent it; retrying could deliver the reply twice
+                    with self._lock:
+                        self.timeouts += 1
+                    self._dead_letter(job, f"timed out, the reply may have been sent: {error}", attempt, "unknown")
+                    return
+                if attempt < self.max_attempts:
+                    with self._lock:
+                        self.retries += 1
+                    delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+                    if self._stop.wait(delay * random.uniform(0.5, 1.5)):
+                        break
+
+        self._dead_letter(job, error, attempt, "failed")
+
+    def _complete(self, job: Dict[str, Any], outcome: Dict[str, Any]):
+        """Record success and resolve the job's future."""
+        sent_at = time.time()
+        with self._lock:
+            self.sent += 1
+            self._sent_keys[job["key"]] = sent_at
+            while len(self._sent_keys) > self.sent_key_capacity:
+                self._sent_keys.popitem(last=False)
+            self._inflight.pop(job["key"], None)
+        self._append({"op": "sent", "key": job["key"], "at": sent_at})
+        outcome.update({"key": job["key"], "duplicate": False,
+                        "seconds": time.perf_counter() - job["submitted_at"]})
+        job["future"].set_result(outcome)
+
+    def _dead_letter(self, job: Dict[str, Any], error: str, attempts: int, outcome: str):
+        """Move a reply that exhausted its retries (or timed out) to the dead-letter list."""
+        with self._lock:
+            self.failed += 1
+            self._inflight.pop(job["key"], None)
+            letter = {
+                "key": job["key"],
+                "recipient_email": job["recipient_email"],
+                "thread_id": job["thread_id"],
+                "message_text": job["message_text"],
+                "on_sent": job["on_sent"],
+                "trace_id": job["trace_id"],
+                "send_func": job["send_func"],
+                "account": job["account"],
+                "attempts": attempts,
+                "error": error,
+                "outcome": outcome,
+                "failed_at": time.time()
+            }
+            self.dead_letters.append(letter)
+        self._append({"op": "dead", "letter": {field: letter.get(field) for field in _PERSISTED_FIELDS}})
+        job["future"].set_result({
+            "success": False, "key": job["key"], "duplicate": False, "attempts": attempts,
+            "error": error, "unknown": outcome == "unknown",
+            "seconds": time.perf_counter() - job["submitted_at"]
+        })
+
+    def list_dead_letters(self, account: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Replies that could not be sent, optionally for one account only."""
+        with self._lock:
+            return [d for d in self.dead_letters if account is None or d["account"] == account]
+
+    def retry_dead_letter(self, key: str, account: Optional[str] = None) -> Optional[Future]:
+        """Re-queue a dead-lettered reply by key (a unique prefix is enough)."""
+        with self._lock:
+            matches = [d for d in self.dead_letters
+                       if d["key"].startswith(key) and (account is None or d["account"] == account)]
+            if len(matches) != 1:
+                return None
+            letter = matches[0]
+            send_func = letter.get("send_func") or self._senders.get(letter["account"]) or self.send_func
+            if send_func is None:
+                return None
+            self.dead_letters.remove(letter)
+        self._append({"op": "retry", "key": letter["key"]})
+        return self.submit(letter["recipient_email"], letter["message_text"], letter["thread_id"],
+                           on_sent=letter.get("on_sent"), key=letter["key"], trace_id=letter["trace_id"],
+                           send_func=send_func, account=letter["account"])
+
+    def _load(self):
+        """Replay the state log written by an earlier run, then compact it."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except Exception as e:
+            self.last_error = f"Could not read outbound state: {e}"
+            return
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # A line torn by a crash mid-append
+            if record.get("op") == "sent":
+                self._sent_keys[record["key"]] = record["at"]
+                self._sent_keys.move_to_end(record["key"])
+            elif record.get("op") == "dead":
+                self.dead_letters.append({**record["letter"], "on_sent": None, "send_func": None})
+            elif record.get("op") == "retry":
+                self.dead_letters = [d for d in self.dead_letters if d["key"] != record["key"]]
+        while len(self._sent_keys) > self.sent_key_capacity:
+            self._sent_keys.popitem(last=False)
+        with self._log_lock:
+            self._compact_locked()
+
+    def _append(self, record: Dict[str, Any]):
+        """Append one state change to the log and flush it to disk."""
+        if not self.path:
+            return
+        line = json.dumps(record) + "\n"
+        with self._log_lock:
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._log_records += 1
+                with self._lock:
+                    live = len(self._sent_keys) + len(self.dead_letters)
+                if self._log_records > 2 * live + 100:
+                    self._compact_locked()
+            except Exception as e:
+                self.last_error = f"Could not write outbound state: {e}"
+
+    def _compact_locked(self):
+        """Rewrite the log as the current state, atomically (caller holds the log lock)."""
+        with self._lock:
+            records = [{"op": "sent", "key": key, "at": at} for key, at in self._sent_keys.items()]
+            records += [{"op": "dead", "letter": {field: d.get(field) for field in _PERSISTED_FIELDS}}
+                        for d in self.dead_letters]
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(record) + "\n" for record in records)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._log_records = len(records)
+        except Exception as e:
+            self.last_error = f"Could not write outbound state: {e}"
+
+    def register_metrics(self, metrics):
+        """Expose the send counters on a MetricsRegistry; they are read when the endpoint is scraped."""
+        metrics.register_callback("send_queue_depth", "gauge", "Replies queued or in flight",
+                                  lambda: self._jobs.qsize() + len(self._inflight))
+        metrics.register_callback("replies_sent_total", "counter", "Replies sent", lambda: self.sent)
+        metrics.register_callback("replies_failed_total", "counter", "Replies dead-lettered after all retries",
+                                  lambda: self.failed)
+        metrics.register_callback("send_retries_total", "counter", "Reply send retries", lambda: self.retries)
+        metrics.register_callback("replies_deduplicated_total", "counter", "Duplicate replies suppressed",
+                                  lambda: self.duplicates)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue counters."""
+        return {
+            "queued": self._jobs.qsize(),
+            "in_flight": len(self._inflight),
+            "sent": self.sent,
+            "retries": self.retries,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "duplicates_suppressed": self.duplicates,
+            "callback_errors": self.callback_errors,
+            "dead_letters": len(self.dead_letters)
+        }
+
+    def stop(self, timeout: float = 10.0):
+        """Finish queued sends, then stop the workers."""
+        deadline = time.monotonic() + timeout
+        while self._jobs.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self._stop.set()
+        for _ in self._threads:
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join(timeout=1)
+        self._threads = []
@@ -0,0 +1,218 @@
+"""
+Priority scheduling of inbound emails ahead of processing.
+
+Each email gets a score from cheap local signals: a known sender, prior replies
+to them, urgency keywords, an active thread and bulk-mail markers. Emails wait
+in a heap ordered by score with linear aging. The effective priority
+``score + rate * (now - arrival)`` ranks emails the same as the static key
+``score - rate * arrival``, so the heap never needs re-sorting, and a waiting
+low-priority email eventually overtakes newer high-priority ones.
+
+Emails of one thread keep their arrival order: only the oldest waiting email of
+a thread is in the heap, and the next one enters it when that one has been
+processed. A thread counts as active once one of its emails has been processed
+(or is in the sender's history), never because of emails still waiting.
+"""
+
+import heapq
+import itertools
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Any, List, Optional, Callable
+
+from config.agent_config import EMAIL_CONFIG
+from services.metrics import get_metrics
+from services.tracing import get_tracer
+
+PRIORITIES = ("high", "normal", "low")
+
+
+def _keyword_pattern(keywords: List[str]) -> Optional["re.Pattern"]:
+    """Case-insensitive whole-word alternation, or None for an empty list."""
+    if not keywords:
+        return None
+    return re.compile(r"\b(?:" + "|".join(re.escape(k) for k in keywords) + r")\b", re.IGNORECASE)
+
+
+class PriorityScheduler:
+    """Orders inbound emails by priority and hands them to `process` on worker threads."""
+
+    def __init__(self, memory_manager, process: Callable[..., None], config: Optional[Dict[str, Any]] = None):
+        self.config = config or EMAIL_CONFIG.get("priority_scheduling", {})
+        self.memory_manager = memory_manager
+        self.process = process
+        self.weights = self.config.get("weights", {})
+        self.high_score = self.config.get("high_score", 4)
+        self.low_score = self.config.get("low_score", -1)
+        self.aging_rate = self.config.get("aging_points_per_minute", 1.0) / 60.0
+        self.scan_chars = self.config.get("scan_chars", 2000)
+        self.recent_thread_seconds = self.config.get("recent_thread_seconds", 3600)
+        self._urgent = _keyword_pattern(self.config.get("urgency_keywords", []))
+        self._bulk = _keyword_pattern(self.config.get("bulk_keywords", []))
+
+        self.tracer = get_tracer()
+        self.metrics = get_metrics()
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        self._busy = 0
+        self._recent_threads: "OrderedDict[str, float]" = OrderedDict()
+        # Threads with an email in the heap or in progress -> later emails of the thread, oldest first
+        self._thread_backlog: Dict[str, deque] = {}
+        self.submitted = {priority: 0 for priority in PRIORITIES}
+        self.dropped = 0
+
+    def score(self, sender: str, email_text: str, thread_id: str) -> Dict[str, Any]:
+        """Priority score, level and the signals that contributed."""
+        signals: Dict[str, float] = {}
+        memory = self.memory_manager
+        if sender in memory.sender_info:
+            signals["known_sender"] = self.weights.get("known_sender", 2)
+        replies = memory.count_prior_replies(sender)
+        if replies:
+            signals["prior_replies"] = self.weights.get("per_prior_reply", 1) * min(replies, self.weights.get("max_prior_replies", 3))
+        if self._thread_is_active(sender, thread_id):
+            signals["active_thread"] = self.weights.get("active_thread", 2)
+        text = email_text[:self.scan_chars]
+        if self._urgent is not None and self._urgent.search(text):
+            signals["urgent"] = self.weights.get("urgent", 3)
+        if self._bulk is not None and self._bulk.search(text):
+            signals["bulk"] = self.weights.get("bulk", -3)
+
+        score = sum(signals.values())
+        if score >= self.high_score:
+            priority = "high"
+        elif score <= self.low_score:
+            priority = "low"
+        else:
+            priority = "normal"
+        return {"score": score, "priority": priority, "signals": signals}
+
+    def _thread_is_active(self, sender: str, thread_id: str) -> bool:
+        """Thread processed recently by this scheduler, or part of the remembered conversation with the sender."""
+        seen = self._recent_threads.get(thread_id)
+        if seen is not None and time.monotonic() - seen <= self.recent_thread_seconds:
+            return True
+        history = self.memory_manager.email_memory.get(sender) or []
+        return any(email.get("thread_id") == thread_id for email in history)
+
+    def _note_thread(self, thread_id: str):
+        """Remember that an email of the thread was processed (bounded)."""
+        self._recent_threads[thread_id] = time.monotonic()
+        self._recent_threads.move_to_end(thread_id)
+        while len(self._recent_threads) > 10000:
+            self._recent_threads.popitem(last=False)
+
+    def submit(self, sender: str, email_text: str, thread_id: str, message_id: Optional[str] = None) -> Dict[str, Any]:
+        """Queue an email; returns its score, priority and how many emails are ahead of the workers."""
+        scored = self.score(sender, email_text, thread_id)
+        arrival = time.monotonic()
+        item = {
+            "args": (sender, email_text, thread_id, message_id),
+            "priority": scored["priority"],
+            "arrival": arrival,
+            "trace_id": self.tracer.current_trace_id
+        }
+        entry = (self.aging_rate * arrival - scored["score"], next(self._sequence), item)
+        self._ensure_workers()
+        with self._cond:
+            if thread_id and thread_id in self._thread_backlog:
+                # An earlier email of the thread is waiting or in progress: this one follows it
+                self._thread_backlog[thread_id].append(entry)
+            else:
+                if thread_id:
+                    self._thread_backlog[thread_id] = deque()
+                heapq.heappush(self._heap, entry)
+            self.submitted[scored["priority"]] += 1
+            scored["waiting"] = self._waiting_locked() - 1 + self._busy
+            self._cond.notify_all()
+        return scored
+
+    def _waiting_locked(self) -> int:
+        """Emails waiting in the heap or behind an earlier email of their thread (caller holds the lock)."""
+        return len(self._heap) + sum(len(backlog) for backlog in self._thread_backlog.values())
+
+    def _finish_thread_locked(self, thread_id: str):
+        """Let the next email of a thread into the heap once the previous one is done (caller holds the lock)."""
+        if not thread_id:
+            return
+        self._note_thread(thread_id)
+        backlog = self._thread_backlog.get(thread_id)
+        if backlog:
+            heapq.heappush(self._heap, backlog.popleft())
+        else:
+            self._thread_backlog.pop(thread_id, None)
+
+    def _ensure_workers(self):
+        """Start worker threads on first use."""
+        with self._cond:
+            if self._threads:
+                return
+            for i in range(self.config.get("workers", 1)):
+                thread = threading.Thread(target=self._run, name=f"priority-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self):
+        """Worker loop: process the highest (aged) priority email next."""
+        while True:
+            with self._cond:
+                while not self._heap and not self._stopping:
+                    self._cond.wait()
+                if not self._heap:
+                    return
+                _, _, item = heapq.heappop(self._heap)
+                self._busy += 1
+            try:
+                wait = time.monotonic() - item["arrival"]
+                with self.tracer.trace(item["trace_id"]):
+                    self.tracer.record(f"priority_wait.{item['priority']}", wait * 1000)
+                    self.metrics.observe("priority_wait_seconds", wait, priority=item["priority"])
+                    self.process(*item["args"])
+            except Exception:
+                pass  # process reports its own errors; keep the worker alive
+            finally:
+                with self._cond:
+                    self._busy -= 1
+                    self._finish_thread_locked(item["args"][2])
+                    self._cond.notify_all()
+
+    def depth_by_priority(self) -> Dict[tuple, int]:
+        """Waiting emails per priority, keyed by metric labels."""
+        with self._cond:
+            counts = {priority: 0 for priority in PRIORITIES}
+            for _, _, item in self._waiting_entries_locked():
+                counts[item["priority"]] += 1
+        return {(("priority", priority),): count for priority, count in counts.items()}
+
+    def _waiting_entries_locked(self) -> List[tuple]:
+        """Heap entries plus those held behind an earlier email of their thread (caller holds the lock)."""
+        return self._heap + [entry for backlog in self._thread_backlog.values() for entry in backlog]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and emails submitted per priority."""
+        with self._cond:
+            return {"waiting": self._waiting_locked(), "in_progress": self._busy, "submitted": dict(self.submitted),
+                    "dropped": self.dropped}
+
+    def stop(self, timeout: float = 30.0) -> List[Dict[str, Any]]:
+        """Process what is already queued (up to timeout), then stop the workers; returns the emails left unprocessed."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while (self._heap or self._busy) and time.monotonic() < deadline:
+                self._cond.wait(max(0.0, deadline - time.monotonic()))
+            self._stopping = True
+            dropped = [
+                {"sender": item["args"][0], "thread_id": item["args"][2], "message_id": item["args"][3],
+                 "priority": item["priority"]}
+                for _, _, item in sorted(self._waiting_entries_locked())
+            ]
+            self.dropped += len(dropped)
+            self._heap.clear()
+            self._thread_backlog.clear()
+            self._cond.notify_all()
+        return dropped
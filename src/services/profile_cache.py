@@ -0,0 +1,100 @@
+"""
+Gmail profile cache with TTL, stale-while-revalidate refresh and an on-disk copy.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, Optional, Callable
+
+from config.paths import resolve_data_path
+
+
+class ProfileCache:
+    """Serves the last known profile immediately and refreshes it in the background when stale."""
+
+    def __init__(self, loader: Callable[[], Optional[Dict[str, Any]]], path: Optional[str] = None,
+                 ttl_seconds: float = 3600, retry_seconds: float = 60):
+        self.loader = loader
+        self.path = resolve_data_path(path) if path else None
+        self.ttl_seconds = ttl_seconds
+        self.retry_seconds = retry_seconds
+        self._profile: Optional[Dict[str, Any]] = None
+        self._fetched_at = 0.0
+        self._attempted_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self.last_error: Optional[str] = None
+
+    def load_from_disk(self) -> bool:
+        """Load the on-disk copy, if any. Returns True when a profile is available."""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            with self._lock:
+                self._profile = data["profile"]
+                self._fetched_at = data.get("fetched_at", 0.0)
+            return True
+        except Exception as e:
+            self.last_error = f"Could not read profile cache: {e}"
+            return False
+
+    def get(self) -> Optional[Dict[str, Any]]:
+        """Current profile; triggers a background refresh when it is older than the TTL (at most once per retry interval)."""
+        if (self._profile is not None and self.is_stale() and not self._refreshing
+                and time.time() - self._attempted_at >= self.retry_seconds):
+            self.refresh_async()
+        return self._profile
+
+    def is_stale(self) -> bool:
+        """Whether the cached profile is older than the TTL."""
+        return time.time() - self._fetched_at > self.ttl_seconds
+
+    def set(self, profile: Dict[str, Any]):
+        """Store a freshly fetched profile and persist it."""
+        with self._lock:
+            self._profile = profile
+            self._fetched_at = time.time()
+        self._save()
+
+    def refresh(self) -> Optional[Dict[str, Any]]:
+        """Fetch the profile synchronously."""
+        profile = self.loader()
+        if profile is not None:
+            self.set(profile)
+        return profile
+
+    def refresh_async(self):
+        """Fetch the profile on a background thread, keeping the stale copy until it arrives."""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+            # Recorded before the fetch so a failing refresh is not retried on every get()
+            self._attempted_at = time.time()
+        threading.Thread(target=self._refresh_in_background, name="profile-refresh", daemon=True).start()
+
+    def _refresh_in_background(self):
+        """Background refresh body."""
+        try:
+            self.refresh()
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+        finally:
+            self._refreshing = False
+
+    def _save(self):
+        """Write the on-disk copy atomically."""
+        if not self.path:
+            return
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"fetched_at": self._fetched_at, "profile": self._profile}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            self.last_error = f"Could not write profile cache: {e}"
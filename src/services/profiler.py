@@ -0,0 +1,222 @@
+"""
+On-demand profiling of a live agent.
+
+Two modes, started and stopped at runtime (CLI command or SIGUSR1):
+
+- ``sampling``: a background thread samples the stacks of the listener and
+  worker threads and writes them in the folded-stack format read by
+  speedscope, flamegraph.pl and inferno. Stacks sampled while an email is
+  being processed are rooted at ``email <trace id>``.
+- ``cprofile``: every email processed during the window is profiled
+  deterministically on its own thread and written as a pstats file
+  (snakeviz, ``python -m pstats``).
+
+With ``min_email_seconds`` set, only emails slower than that are kept.
+"""
+
+import cProfile
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Iterator
+
+from config.agent_config import PROFILER_CONFIG
+from config.paths import resolve_data_path
+
+
+class ProfilerController:
+    """Starts and stops profiling windows and attributes samples to emails."""
+
+    SAMPLING = "sampling"
+    CPROFILE = "cprofile"
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = config or PROFILER_CONFIG
+        self.output_dir = self.config.get("output_dir", "data/profiles")
+        self.interval = self.config.get("sample_interval_seconds", 0.005)
+        self.default_window = self.config.get("default_window_seconds", 60)
+        self.max_stack_depth = self.config.get("max_stack_depth", 64)
+
+        self._lock = threading.Lock()
+        self.mode: Optional[str] = None
+        self.started_at = 0.0
+        self.min_email_seconds = 0.0
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._timer: Optional[threading.Timer] = None
+
+        # thread ident -> [trace id, folded stacks sampled while that email was processed]
+        self._emails: Dict[int, List[Any]] = {}
+        self._folded: Dict[str, int] = {}
+        self.samples = 0
+        self.emails_kept = 0
+        self.emails_dropped = 0
+        self.files: List[str] = []
+
+    @property
+    def active(self) -> bool:
+        return self.mode is not None
+
+    def start(self, mode: str = SAMPLING, seconds: Optional[float] = None,
+              min_email_seconds: float = 0.0) -> Dict[str, Any]:
+        """Start a profiling window; it stops by itself after `seconds` (0 means until stopped)."""
+        if mode not in (self.SAMPLING, self.CPROFILE):
+            raise ValueError(f"Unknown profiling mode '{mode}' (use '{self.SAMPLING}' or '{self.CPROFILE}')")
+        with self._lock:
+            if self.mode is not None:
+                raise RuntimeError(f"Profiler already running ({self.mode})")
+            self.mode = mode
+            self.started_at = time.time()
+            self.min_email_seconds = min_email_seconds
+            self._folded = {}
+            self._emails = {}
+            self.samples = self.emails_kept = self.emails_dropped = 0
+            self.files = []
+            self._stop.clear()
+
+        if mode == self.SAMPLING:
+            self._sampler = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+            self._sampler.start()
+
+        seconds = self.default_window if seconds is None else seconds
+        if seconds:
+            self._timer = threading.Timer(seconds, self.stop)
+            self._timer.daemon = True
+            self._timer.start()
+        return self.status()
+
+    def stop(self) -> Dict[str, Any]:
+        """Stop the current window and write the sampled profile."""
+        with self._lock:
+            mode = self.mode
+            if mode is None:
+                return self.status()
+            self.mode = None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join(timeout=2)
+            self._sampler = None
+
+        if mode == self.SAMPLING and self._folded:
+            path = self._output_path("sampled", "folded")
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in sorted(self._folded.items()):
+                    f.write(f"{stack} {count}\n")
+            self.files.append(path)
+        status = self.status()
+        status["stopped_mode"] = mode
+        return status
+
+    def status(self) -> Dict[str, Any]:
+        """Current mode, window age, counters and written files."""
+        return {
+            "mode": self.mode,
+            "running_seconds": time.time() - self.started_at if self.mode else 0.0,
+            "samples": self.samples,
+            "emails_kept": self.emails_kept,
+            "emails_dropped": self.emails_dropped,
+            "min_email_seconds": self.min_email_seconds,
+            "files": list(self.files)
+        }
+
+    @contextmanager
+    def email(self, trace_id: Optional[str]) -> Iterator[None]:
+        """Attribute profiling data recorded on this thread to one email."""
+        mode = self.mode
+        if mode is None:
+            yield
+            return
+
+        ident = threading.get_ident()
+        trace_id = trace_id or f"{ident}-{time.time():.0f}"
+        started = time.perf_counter()
+        profile = None
+        if mode == self.SAMPLING:
+            with self._lock:
+                self._emails[ident] = [trace_id, {}]
+        else:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler is already active on this thread
+                profile = None
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            keep = elapsed >= self.min_email_seconds
+            if profile is not None:
+                profile.disable()
+                if keep:
+                    path = self._output_path(f"email-{trace_id}", "prof")
+                    profile.dump_stats(path)
+                    with self._lock:
+                        self.files.append(path)
+            if mode == self.SAMPLING:
+                with self._lock:
+                    _, stacks = self._emails.pop(ident, (None, {}))
+                    if keep:
+                        for stack, count in stacks.items():
+                            self._folded[stack] = self._folded.get(stack, 0) + count
+            with self._lock:
+                if keep:
+                    self.emails_kept += 1
+                else:
+                    self.emails_dropped += 1
+
+    def _sample_loop(self):
+        """Sample every thread except the profiler's own until stopped."""
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, frame in frames.items():
+                    if ident == own:
+                        continue
+                    stack = self._fold(frame)
+                    email = self._emails.get(ident)
+                    if email is not None:
+                        trace_id, stacks = email
+                        key = f"email {trace_id};{stack}"
+                        stacks[key] = stacks.get(key, 0) + 1
+                    elif not self.min_email_seconds:
+                        key = f"{names.get(ident, ident)};{stack}"
+                        self._folded[key] = self._folded.get(key, 0) + 1
+                    else:
+                        continue
+                    self.samples += 1
+
+    def _fold(self, frame) -> str:
+        """Root-first 'func (file:line);...' representation of a stack."""
+        parts = []
+        while frame is not None and len(parts) < self.max_stack_depth:
+            code = frame.f_code
+            parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ";".join(reversed(parts))
+
+    def _output_path(self, name: str, extension: str) -> str:
+        """data/profiles/<timestamp>-<name>.<extension>"""
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started_at))
+        return resolve_data_path(os.path.join(self.output_dir, f"{stamp}-{name}.{extension}"))
+
+
+_default_profiler: Optional[ProfilerController] = None
+_default_lock = threading.Lock()
+
+
+def get_profiler() -> ProfilerController:
+    """Process-wide profiler controller."""
+    global _default_profiler
+    if _default_profiler is None:
+        with _default_lock:
+            if _default_profiler is None:
+                _default_profiler = ProfilerController()
+    return _default_profiler
@@ -2,24 +2,56 @@
 Response generator for creating AI-powered email responses.
 """
 
-from typing import Dict, Any
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage
-from config.agent_config import AI_AGENT_CONFIG
+from typing import Dict, Any, Tuple
+from config.agent_config import AI_AGENT_CONFIG, USAGE_CONFIG
+from services.metrics import get_metrics
+from services.sender_address import parse_sender_email
+from services.usage_tracker import get_usage_tracker
 
 
 class ResponseGenerator:
     """Generates AI-powered email responses."""
     
-    def __init__(self):
-        self.model = ChatOpenAI(
-            model=AI_AGENT_CONFIG["model"],
-            temperature=AI_AGENT_CONFIG["temperature"],
-            max_completion_tokens=AI_AGENT_CONFIG["max_tokens"]
-        )
+    def __init__(self, model=None, budget_model=None):
+        # The chat models (and the langchain import) are created on first use
+        self._model = model
+        self._budget_model = budget_model or model
     
-    def generate_response(self, sender: str, email_text: str, context: str, user_info: Dict[str, Any]) -> str:
-        """Generate AI response using user profile and context."""
+    @property
+    def model(self):
+        """Chat model used for generation."""
+        if self._model is None:
+            from langchain_openai import ChatOpenAI
+            self._model = ChatOpenAI(
+                model=AI_AGENT_CONFIG["model"],
+                temperature=AI_AGENT_CONFIG["temperature"],
+                max_completion_tokens=AI_AGENT_CONFIG["max_tokens"]
+            )
+        return self._model
+    
+    @property
+    def budget_model(self):
+        """Cheaper model used once the daily token budget is spent."""
+        if self._budget_model is None:
+            from langchain_openai import ChatOpenAI
+            self._budget_model = ChatOpenAI(
+                model=USAGE_CONFIG.get("budget_model", AI_AGENT_CONFIG["model"]),
+                temperature=AI_AGENT_CONFIG["temperature"],
+                max_completion_tokens=USAGE_CONFIG.get("budget_max_tokens", 300)
+            )
+        return self._budget_model
+    
+    def _select_model(self, stage: str) -> Tuple[Any, str]:
+        """The model to call and its name, honoring the daily token budget."""
+        if get_usage_tracker().use_cheaper_behavior(stage):
+            return self.budget_model, USAGE_CONFIG.get("budget_model", AI_AGENT_CONFIG["model"])
+        return self.model, AI_AGENT_CONFIG["model"]
+    
+    def generate_response(self, sender: str, email_text: str, context: str, user_info: Dict[str, Any],
+                          thread_context: str = "", style: str = "", stage: str = "generate_response") -> str:
+        """Generate AI response using user profile and context; `style` asks for a different version."""
+        thread_section = f"\nEarlier messages in this thread:\n{thread_context}\n" if thread_context else ""
+        style_section = f"\n\nStyle for this version: {style}" if style else ""
         prompt = f"""You are {user_info['name']} responding to an email from your {user_info['email']} account.
 
 {AI_AGENT_CONFIG['system_prompt']}
@@ -34,15 +66,25 @@ Content: {email_text}
 
 Context about sender:
 {context}
-
-Write a personal, helpful response as {user_info['name']}. Address any specific questions or information mentioned in the email (like names, ages, etc.). Be natural and conversational."""
+{thread_section}
+Write a personal, helpful response as {user_info['name']}. Address any specific questions or information mentioned in the email (like names, ages, etc.). Be natural and conversational.{style_section}"""
         
         try:
+            from langchain_core.messages import HumanMessage
             messages = [HumanMessage(content=prompt)]
-            response = self.model.invoke(messages)
+            model, model_name = self._select_model(stage)
+            with get_metrics().time_llm_call(model_name, stage):
+                response = model.invoke(messages)
+            get_usage_tracker().record(stage, model_name, response, sender=parse_sender_email(sender).lower())
             return str(response.content)
         except Exception as e:
-            return f"Thank you for your email. I appreciate you reaching out and will get back to you soon.\n\nBest regards,\n{user_info['name']}"
+            get_metrics().inc("fallback_responses_total")
+            return self.fallback_response(user_info)
+    
+    @staticmethod
+    def fallback_response(user_info: Dict[str, Any]) -> str:
+        """Canned reply used when generation fails."""
+        return f"Thank you for your email. I appreciate you reaching out and will get back to you soon.\n\nBest regards,\n{user_info['name']}"
     
     def generate_custom_response(self, prompt_text: str, user_info: Dict[str, Any], system_status: Dict[str, Any]) -> str:
         """Generate response for custom user prompts."""
@@ -73,8 +115,12 @@ User question: {prompt_text}
 Provide a helpful, professional response as {user_info['name']}'s email assistant. Always refer to the user as {user_info['name']}, not as generic terms like "User" or with placeholders.
 """
             
+            from langchain_core.messages import HumanMessage
             messages = [HumanMessage(content=enhanced_prompt)]
-            response = self.model.invoke(messages)
+            model, model_name = self._select_model("custom_prompt")
+            with get_metrics().time_llm_call(model_name, "custom_prompt"):
+                response = model.invoke(messages)
+            get_usage_tracker().record("custom_prompt", model_name, response)
             return str(response.content)
         except Exception as e:
             return f"Error: {e}"
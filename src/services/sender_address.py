@@ -0,0 +1,13 @@
+"""
+Sender address parsing shared by the pipeline, memory, filter and usage tracking.
+
+Kept in its own module so services that EmailProcessor imports (e.g. the
+response generator) can use it without a circular import.
+"""
+
+
+def parse_sender_email(sender: str) -> str:
+    """Address part of a 'Name <address>' sender string (case preserved)."""
+    if "<" in sender and ">" in sender:
+        return sender.split("<")[1].split(">")[0].strip()
+    return sender.strip()
@@ -0,0 +1,160 @@
+"""
+Pre-LLM sender filter compiled from SECURITY_CONFIG.
+
+Rules in ``blocked_senders`` are classified when the filter is built:
+
+- ``alice@example.com``       exact address
+- ``@example.com`` / ``example.com``  domain, also matching its subdomains
+- ``*@news.*`` / ``promo-?@*``        wildcard pattern (fnmatch syntax)
+- ``news*.example.com``               wildcard without ``@``, matched against the domain
+
+Exact and domain rules are hash lookups (domains walk the sender's domain
+labels). Wildcards are indexed by their longest literal token between ``@``
+and ``.`` separators, so only patterns sharing a token with the address are
+tried; the few patterns without such a token share one compiled regular
+expression. The cost per email stays flat as the rule list grows.
+"""
+
+import fnmatch
+import re
+from typing import Dict, Any, List, Optional
+
+from config.agent_config import SECURITY_CONFIG
+from services.sender_address import parse_sender_email
+
+_TOKEN_SPLIT = re.compile(r"[@.]")
+
+DEFAULT_NOREPLY_PATTERN = (
+    r"^(no[-_.]?reply|do[-_.]?not[-_.]?reply|mailer[-_.]?daemon|postmaster|"
+    r"bounces?|notifications?|newsletters?|mailing[-_.]?list)([-+_.].*)?$"
+)
+
+
+def parse_address(sender: str) -> str:
+    """Lower-cased address from a 'Name <address>' sender string."""
+    return parse_sender_email(sender).lower()
+
+
+class SenderFilter:
+    """Decides whether an inbound sender should be processed, with per-rule hit counters."""
+
+    def __init__(self, blocked_senders: List[str], allowed_domains: List[str],
+                 block_noreply: bool = True, noreply_pattern: str = DEFAULT_NOREPLY_PATTERN):
+        self._exact: Dict[str, str] = {}
+        self._domains: Dict[str, str] = {}
+        self._allowed_domains = {d.strip().lower().lstrip("@") for d in allowed_domains if d.strip()}
+        self._noreply = re.compile(noreply_pattern, re.IGNORECASE) if block_noreply else None
+
+        wildcard_rules = []
+        for rule in blocked_senders:
+            rule = rule.strip().lower()
+            if not rule:
+                continue
+            if any(ch in rule for ch in "*?["):
+                # A pattern without a local part applies to the domain, like a plain domain rule
+                pattern = rule if "@" in rule and not rule.startswith("@") else "*@" + rule.lstrip("@")
+                wildcard_rules.append((rule, pattern))
+            elif "@" not in rule or rule.startswith("@"):
+                self._domains[rule.lstrip("@")] = f"domain:{rule}"
+            else:
+                self._exact[rule] = f"exact:{rule}"
+
+        self._wildcard_count = len(wildcard_rules)
+        self._wildcard_index: Dict[str, List[tuple]] = {}
+        fallback_rules = []
+        for rule, pattern in wildcard_rules:
+            literal_tokens = [t for t in _TOKEN_SPLIT.split(pattern) if t and not any(ch in t for ch in "*?[]")]
+            if literal_tokens:
+                anchor = max(literal_tokens, key=len)
+                self._wildcard_index.setdefault(anchor, []).append(
+                    (f"wildcard:{rule}", re.compile(fnmatch.translate(pattern)))
+                )
+            else:
+                fallback_rules.append((rule, pattern))
+
+        self._fallback_names = [f"wildcard:{rule}" for rule, _ in fallback_rules]
+        self._fallback = None
+        if fallback_rules:
+            alternation = "|".join(f"(?P<w{i}>{fnmatch.translate(pattern)})"
+                                   for i, (_, pattern) in enumerate(fallback_rules))
+            self._fallback = re.compile(alternation)
+
+        self.hits: Dict[str, int] = {}
+        self.checked = 0
+        self.blocked = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]] = None) -> "SenderFilter":
+        """Build the filter from SECURITY_CONFIG."""
+        config = config or SECURITY_CONFIG
+        return cls(
+            blocked_senders=config.get("blocked_senders", []),
+            allowed_domains=config.get("allowed_domains", []),
+            block_noreply=config.get("block_noreply", True),
+            noreply_pattern=config.get("noreply_pattern", DEFAULT_NOREPLY_PATTERN)
+        )
+
+    def check(self, sender: str) -> Optional[str]:
+        """Return the name of the rule that blocks this sender, or None if it may be processed."""
+        self.checked += 1
+        rule = self._match(parse_address(sender))
+        if rule:
+            self.blocked += 1
+            self.hits[rule] = self.hits.get(rule, 0) + 1
+        return rule
+
+    def _match(self, address: str) -> Optional[str]:
+        """Find the first matching rule for an address."""
+        local, _, domain = address.rpartition("@")
+        if not local:
+            return "invalid_address"
+
+        rule = self._exact.get(address)
+        if rule:
+            return rule
+
+        if self._domains or self._allowed_domains:
+            suffixes = self._domain_suffixes(domain)
+            for suffix in suffixes:
+                rule = self._domains.get(suffix)
+                if rule:
+                    return rule
+            if self._allowed_domains and not any(s in self._allowed_domains for s in suffixes):
+                return "not_in_allowed_domains"
+
+        if self._wildcard_index:
+            for token in set(_TOKEN_SPLIT.split(address)):
+                for name, pattern in self._wildcard_index.get(token, ()):
+                    if pattern.match(address):
+                        return name
+
+        if self._fallback is not None:
+            match = self._fallback.match(address)
+            if match:
+                return self._fallback_names[int(match.lastgroup[1:])]
+
+        if self._noreply is not None and self._noreply.match(local):
+            return "noreply_heuristic"
+
+        return None
+
+    @staticmethod
+    def _domain_suffixes(domain: str) -> List[str]:
+        """'a.b.com' -> ['a.b.com', 'b.com', 'com']."""
+        labels = domain.split(".")
+        return [".".join(labels[i:]) for i in range(len(labels))]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Rule counts and hit counters."""
+        return {
+            "rules": {
+                "exact": len(self._exact),
+                "domain": len(self._domains),
+                "wildcard": self._wildcard_count,
+                "allowed_domains": len(self._allowed_domains),
+                "noreply_heuristic": self._noreply is not None
+            },
+            "checked": self.checked,
+            "blocked": self.blocked,
+            "hits": dict(sorted(self.hits.items(), key=lambda item: -item[1]))
+        }
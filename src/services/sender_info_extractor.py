@@ -4,29 +4,48 @@ Sender information extractor for learning about email senders.
 
 import re
 from typing import Dict, Any
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage
 from config.agent_config import MEMORY_CONFIG
+from services.metrics import get_metrics
+from services.usage_tracker import get_usage_tracker
 
 
 class SenderInfoExtractor:
     """Extracts and manages sender information from emails."""
     
-    def __init__(self):
+    def __init__(self, model=None):
         self.extraction_enabled = MEMORY_CONFIG.get("extract_sender_info", True)
+        # The extraction model (and the langchain import) is created on first use
+        self._model = model
     
-    def extract_sender_info(self, email_text: str) -> Dict[str, Any]:
+    @property
+    def model(self):
+        """Chat model used for extraction."""
+        if self._model is None:
+            from langchain_openai import ChatOpenAI
+            ai_config = MEMORY_CONFIG.get("ai_extraction", {})
+            self._model = ChatOpenAI(
+                model=ai_config.get("model", "gpt-4o-mini"),
+                temperature=ai_config.get("temperature", 0.1),
+                max_completion_tokens=500
+            )
+        return self._model
+    
+    def extract_sender_info(self, email_text: str, sender: str = "") -> Dict[str, Any]:
         """Extract information about the sender from email text."""
         if not self.extraction_enabled:
             return {}
         
+        # Pattern matching only, once the daily token budget is spent
+        if get_usage_tracker().use_cheaper_behavior("extract_sender_info"):
+            return self._basic_extract_info(email_text)
+        
         # Try AI extraction first, fall back to basic if it fails
         try:
-            return self._simple_ai_extract(email_text)
+            return self._simple_ai_extract(email_text, sender)
         except Exception:
             return self._basic_extract_info(email_text)
     
-    def _simple_ai_extract(self, email_text: str) -> Dict[str, Any]:
+    def _simple_ai_extract(self, email_text: str, sender: str = "") -> Dict[str, Any]:
         """Simple AI extraction with robust error handling."""
         try:
             # Get prompt from configuration
@@ -34,15 +53,12 @@ class SenderInfoExtractor:
             prompt_template = ai_config.get("simple_extraction_prompt", "")
             prompt = prompt_template.format(email_text=email_text)
             
-            # Create model for extraction
-            model = ChatOpenAI(
-                model=ai_config.get("model", "gpt-4o-mini"),
-                temperature=ai_config.get("temperature", 0.1),
-                max_completion_tokens=500
-            )
-            
+            from langchain_core.messages import HumanMessage
             messages = [HumanMessage(content=prompt)]
-            response = model.invoke(messages)
+            model_name = ai_config.get("model", "gpt-4o-mini")
+            with get_metrics().time_llm_call(model_name, "extract_sender_info"):
+                response = self.model.invoke(messages)
+            get_usage_tracker().record("extract_sender_info", model_name, response, sender=sender)
             response_text = str(response.content).strip()
             
             # Parse the simple format
@@ -0,0 +1,160 @@
+"""
+Gmail thread context with a local LRU cache.
+
+Each cached thread remembers the ids of the messages it holds, so a follow-up
+in a known thread costs one message fetch instead of a full thread refetch.
+Replies sent by the agent are appended locally.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Callable, Set
+
+from config.agent_config import EMAIL_CONFIG
+from services.sender_address import parse_sender_email
+
+
+class ThreadContextFetcher:
+    """Fetches and caches thread messages, keyed by thread id and the latest message seen."""
+
+    def __init__(self, fetch_thread: Callable[[str], List[Dict[str, Any]]],
+                 fetch_message: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None,
+                 config: Optional[Dict[str, Any]] = None):
+        self.fetch_thread = fetch_thread
+        self.fetch_message = fetch_message
+        self.config = config or EMAIL_CONFIG.get("thread_context", {})
+        self.capacity = self.config.get("cache_size", 256)
+        self.max_messages = self.config.get("max_messages", 10)
+        self.max_chars_per_message = self.config.get("max_chars_per_message", 1500)
+
+        # thread_id -> {"version": latest message id, "messages": [...], "ids": {...}}
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.incremental_fetches = 0
+        self.full_fetches = 0
+        self.errors = 0
+
+    def get_messages(self, thread_id: str, message_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Messages of a thread, oldest first, fetching only what the cache does not have."""
+        if not thread_id:
+            return []
+
+        with self._lock:
+            entry = self._cache.get(thread_id)
+            if entry is not None:
+                self._cache.move_to_end(thread_id)
+                if message_id is None or message_id in entry["ids"]:
+                    self.hits += 1
+                    return list(entry["messages"])
+
+        try:
+            if entry is not None and self.fetch_message is not None:
+                message = self.fetch_message(message_id)
+                if message is not None:
+                    self.incremental_fetches += 1
+                    self._append(thread_id, message)
+                    return self._messages(thread_id)
+
+            messages = self.fetch_thread(thread_id)
+            self.full_fetches += 1
+        except Exception:
+            self.errors += 1
+            return list(entry["messages"]) if entry else []
+
+        self._store(thread_id, messages)
+        return list(messages)
+
+    def get_context(self, thread_id: str, message_id: Optional[str] = None) -> str:
+        """Earlier messages of the thread formatted for the prompt (the current message is excluded)."""
+        if message_id:
+            messages = [m for m in self.get_messages(thread_id, message_id) if m["id"] != message_id]
+        else:
+            messages = self._fetch_earlier_messages(thread_id)
+        if not messages:
+            return ""
+
+        lines = []
+        for message in messages[-self.max_messages:]:
+            text = message.get("text", "").strip()
+            if len(text) > self.max_chars_per_message:
+                text = text[:self.max_chars_per_message] + "..."
+            lines.append(f"From: {message.get('sender', 'Unknown')}\n{text}")
+        return "\n\n---\n\n".join(lines)
+
+    def _fetch_earlier_messages(self, thread_id: str) -> List[Dict[str, Any]]:
+        """Without the trigger's message id the cache cannot tell what is new: refetch and drop the newest (current) message."""
+        if not thread_id:
+            return []
+        try:
+            messages = self.fetch_thread(thread_id)
+        except Exception:
+            self.errors += 1
+            with self._lock:
+                entry = self._cache.get(thread_id)
+            return list(entry["messages"]) if entry else []
+        self.full_fetches += 1
+        self._store(thread_id, messages)
+        return list(messages[:-1])
+
+    def get_participants(self, thread_id: str, message_id: Optional[str] = None) -> Set[str]:
+        """Lower-cased sender addresses of the cached messages that came before the given (or newest) message."""
+        messages = self._messages(thread_id)
+        if message_id is not None:
+            ids = [m["id"] for m in messages]
+            messages = messages[:ids.index(message_id)] if message_id in ids else messages
+        else:
+            messages = messages[:-1]
+        return {parse_sender_email(m.get("sender", "")).lower() for m in messages if m.get("sender")}
+
+    def add_local_message(self, thread_id: str, sender: str, text: str, message_id: Optional[str] = None):
+        """Record a message we sent so the cached thread stays complete without a refetch."""
+        with self._lock:
+            if thread_id not in self._cache:
+                return
+        self._append(thread_id, {"id": message_id or f"local-{thread_id}-{len(self._messages(thread_id))}",
+                                 "sender": sender, "text": text})
+
+    def invalidate(self, thread_id: str):
+        """Drop a thread from the cache."""
+        with self._lock:
+            self._cache.pop(thread_id, None)
+
+    def _store(self, thread_id: str, messages: List[Dict[str, Any]]):
+        """Cache a freshly fetched thread, evicting the least recently used one when full."""
+        with self._lock:
+            self._cache[thread_id] = {
+                "version": messages[-1]["id"] if messages else None,
+                "messages": list(messages),
+                "ids": {m["id"] for m in messages}
+            }
+            self._cache.move_to_end(thread_id)
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+
+    def _append(self, thread_id: str, message: Dict[str, Any]):
+        """Add one message to a cached thread."""
+        with self._lock:
+            entry = self._cache.get(thread_id)
+            if entry is None or message["id"] in entry["ids"]:
+                return
+            entry["messages"].append(message)
+            entry["ids"].add(message["id"])
+            entry["version"] = message["id"]
+
+    def _messages(self, thread_id: str) -> List[Dict[str, Any]]:
+        """Copy of the cached messages for a thread."""
+        with self._lock:
+            entry = self._cache.get(thread_id)
+            return list(entry["messages"]) if entry else []
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache counters."""
+        return {
+            "cached_threads": len(self._cache),
+            "hits": self.hits,
+            "incremental_fetches": self.incremental_fetches,
+            "full_fetches": self.full_fetches,
+            "errors": self.errors
+        }
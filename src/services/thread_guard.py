@@ -0,0 +1,234 @@
+"""
+Bounded-memory guard for processed thread ids.
+
+Recent ids live in an exact, time-bucketed store so they can still be un-marked
+(e.g. after a processing error). When a bucket ages out of the exact window its
+ids are folded into the current Bloom filter generation; a new generation starts
+every ``ttl_seconds / 2``. A generation is dropped once the newest id it can hold
+is ``ttl_seconds`` old, so every id is remembered for at least ``ttl_seconds``
+(and at most about 1.5 times that). Three generations are alive at a time
+(four for one bucket after a rotation), so memory stays fixed regardless of how
+many threads have been seen.
+"""
+
+import hashlib
+import math
+import sys
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Set, Callable
+
+from config.agent_config import MEMORY_CONFIG
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over a blake2b digest."""
+
+    def __init__(self, capacity: int, false_positive_rate: float, bits: Optional[bytearray] = None, count: int = 0):
+        self.capacity = max(1, capacity)
+        self.false_positive_rate = false_positive_rate
+        self.size_bits = max(8, int(math.ceil(-self.capacity * math.log(false_positive_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.size_bits / self.capacity * math.log(2))))
+        self.bits = bits if bits is not None else bytearray((self.size_bits + 7) // 8)
+        self.count = count
+
+    def _positions(self, item: str):
+        """Bit positions for an item."""
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size_bits
+
+    def add(self, item: str):
+        """Add an item."""
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        for position in self._positions(item):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def estimated_fp_rate(self) -> float:
+        """Expected false-positive rate for the current number of items."""
+        return (1 - math.exp(-self.hash_count * self.count / self.size_bits)) ** self.hash_count
+
+    @property
+    def memory_bytes(self) -> int:
+        """Size of the bit array."""
+        return len(self.bits)
+
+
+class ThreadGuard:
+    """Set-like record of processed thread ids with TTL expiry and bounded memory."""
+
+    def __init__(self, ttl_seconds: float, exact_window_seconds: float, bucket_seconds: float,
+                 expected_ids_per_generation: int, false_positive_rate: float,
+                 clock: Callable[[], float] = time.time):
+        self.ttl_seconds = ttl_seconds
+        self.bucket_seconds = bucket_seconds
+        self.window_buckets = max(1, int(exact_window_seconds // bucket_seconds))
+        self.generation_seconds = ttl_seconds / 2
+        self.expected_ids_per_generation = expected_ids_per_generation
+        self.false_positive_rate = false_positive_rate
+        self.clock = clock
+
+        # Exact store: id -> bucket, plus buckets in time order for expiry
+        self._recent: Dict[str, int] = {}
+        self._buckets: "deque[tuple]" = deque()
+        # Bloom generations as (start time, filter), oldest first
+        self._generations: "deque[tuple]" = deque()
+
+        self.lookups = 0
+        self.exact_hits = 0
+        self.probabilistic_hits = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]] = None) -> "ThreadGuard":
+        """Create a guard from MEMORY_CONFIG["thread_guard"]."""
+        config = config or MEMORY_CONFIG.get("thread_guard", {})
+        return cls(
+            ttl_seconds=config.get("ttl_seconds", 30 * 24 * 3600),
+            exact_window_seconds=config.get("exact_window_seconds", 6 * 3600),
+            bucket_seconds=config.get("bucket_seconds", 600),
+            expected_ids_per_generation=config.get("expected_ids_per_generation", 20_000),
+            false_positive_rate=config.get("false_positive_rate", 1e-6)
+        )
+
+    def add(self, thread_id: str):
+        """Record a processed thread id."""
+        now = self.clock()
+        self._expire(now)
+        bucket_id = int(now // self.bucket_seconds)
+        previous = self._recent.get(thread_id)
+        if previous == bucket_id:
+            return
+        if previous is not None:
+            self._bucket_set(previous).discard(thread_id)
+        if not self._buckets or self._buckets[-1][0] != bucket_id:
+            self._buckets.append((bucket_id, set()))
+        self._buckets[-1][1].add(thread_id)
+        self._recent[thread_id] = bucket_id
+
+    def discard(self, thread_id: str):
+        """Forget a recently added thread id (ids already folded into the filter cannot be removed)."""
+        bucket_id = self._recent.pop(thread_id, None)
+        if bucket_id is not None:
+            self._bucket_set(bucket_id).discard(thread_id)
+
+    def __contains__(self, thread_id: str) -> bool:
+        self.lookups += 1
+        self._expire(self.clock())
+        if thread_id in self._recent:
+            self.exact_hits += 1
+            return True
+        for _start, bloom in self._generations:
+            if thread_id in bloom:
+                self.probabilistic_hits += 1
+                return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._recent) + sum(bloom.count for _start, bloom in self._generations)
+
+    def _bucket_set(self, bucket_id: int) -> Set[str]:
+        """Ids stored in a bucket."""
+        for candidate, ids in self._buckets:
+            if candidate == bucket_id:
+                return ids
+        return set()
+
+    def _expire(self, now: float):
+        """Fold buckets that left the exact window into the filter and drop expired generations."""
+        oldest_exact = int(now // self.bucket_seconds) - self.window_buckets
+        while self._buckets and self._buckets[0][0] <= oldest_exact:
+            bucket_id, ids = self._buckets.popleft()
+            bloom = self._current_generation(bucket_id * self.bucket_seconds)
+            for thread_id in ids:
+                bloom.add(thread_id)
+                del self._recent[thread_id]
+
+        # A generation takes ids folded up to generation_seconds after it starts, from buckets that began
+        # up to bucket_seconds before that; it goes once even the newest of those is ttl_seconds old
+        lifetime = self.generation_seconds + self.bucket_seconds + self.ttl_seconds
+        while self._generations and self._generations[0][0] + lifetime <= now:
+            self._generations.popleft()
+
+    def _current_generation(self, timestamp: float) -> BloomFilter:
+        """Filter generation covering timestamp, rotating in a fresh one when needed."""
+        if not self._generations or self._generations[-1][0] + self.generation_seconds <= timestamp:
+            self._generations.append((timestamp, BloomFilter(self.expected_ids_per_generation, self.false_positive_rate)))
+        return self._generations[-1][1]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Memory use, population and false-positive estimates."""
+        recent_bytes = sys.getsizeof(self._recent) + sum(sys.getsizeof(i) for i in self._recent)
+        recent_bytes += sum(sys.getsizeof(ids) for _bucket, ids in self._buckets)
+        bloom_bytes = sum(bloom.memory_bytes for _start, bloom in self._generations)
+        fp_rates = [bloom.estimated_fp_rate() for _start, bloom in self._generations]
+        return {
+            "recent_ids": len(self._recent),
+            "filtered_ids": sum(bloom.count for _start, bloom in self._generations),
+            "bloom_generations": len(self._generations),
+            "memory_bytes": recent_bytes + bloom_bytes,
+            "estimated_false_positive_rate": 1 - math.prod(1 - rate for rate in fp_rates) if fp_rates else 0.0,
+            "lookups": self.lookups,
+            "exact_hits": self.exact_hits,
+            "probabilistic_hits": self.probabilistic_hits
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        """Serializable state; bloom bit arrays are returned as bytes."""
+        return {
+            "buckets": [[bucket_id, sorted(ids)] for bucket_id, ids in self._buckets],
+            "generations": [
+                {"start": start, "count": bloom.count, "capacity": bloom.capacity,
+                 "false_positive_rate": bloom.false_positive_rate, "bits": bytes(bloom.bits)}
+                for start, bloom in self._generations
+            ]
+        }
+
+    def restore_state(self, state: Dict[str, Any]):
+        """Restore state produced by to_state."""
+        self._recent = {}
+        self._buckets = deque()
+        for bucket_id, ids in state.get("buckets", []):
+            self._buckets.append((bucket_id, set(ids)))
+            for thread_id in ids:
+                self._recent[thread_id] = bucket_id
+
+        self._generations = deque()
+        for generation in state.get("generations", []):
+            bloom = BloomFilter(generation["capacity"], generation["false_positive_rate"],
+                                bytearray(generation["bits"]), generation["count"])
+            self._generations.append((generation["start"], bloom))
+
+    def merge_state(self, state: Dict[str, Any]):
+        """Add the ids recorded in another guard's to_state output (e.g. when memory shards are combined)."""
+        buckets = {bucket_id: ids for bucket_id, ids in self._buckets}
+        for bucket_id, ids in state.get("buckets", []):
+            for thread_id in ids:
+                if thread_id not in self._recent:
+                    buckets.setdefault(bucket_id, set()).add(thread_id)
+                    self._recent[thread_id] = bucket_id
+        self._buckets = deque(sorted(buckets.items()))
+
+        generations = list(self._generations)
+        for generation in state.get("generations", []):
+            for start, bloom in generations:
+                if (start == generation["start"] and bloom.capacity == generation["capacity"]
+                        and bloom.false_positive_rate == generation["false_positive_rate"]):
+                    for i, byte in enumerate(generation["bits"]):
+                        bloom.bits[i] |= byte
+                    bloom.count += generation["count"]
+                    break
+            else:
+                generations.append((generation["start"], BloomFilter(
+                    generation["capacity"], generation["false_positive_rate"],
+                    bytearray(generation["bits"]), generation["count"]
+                )))
+        self._generations = deque(sorted(generations, key=lambda item: item[0]))
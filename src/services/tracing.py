@@ -0,0 +1,180 @@
+"""
+Per-stage latency tracing for the email pipeline.
+
+Every email gets a trace id when its trigger arrives. Spans recorded while
+handling it (on the same thread, or with the trace id passed explicitly to
+other threads) share that id. Span durations feed in-process histograms with
+logarithmic buckets, so p50/p95/p99 per stage are available in constant memory,
+and every span can be exported as a JSON line for offline analysis.
+"""
+
+import math
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Iterator
+
+from config.agent_config import TRACING_CONFIG
+from services.event_log import JsonLinesLog
+
+# Stages in pipeline order, used to order the latency report
+PIPELINE_STAGES = [
+    "handle_trigger",
+    "queue_wait",
+    "priority_wait.high",
+    "priority_wait.normal",
+    "priority_wait.low",
+    "near_duplicate_lookup",
+    "extract_sender_info",
+    "get_sender_context",
+    "fetch_thread_context",
+    "generate_response",
+    "generate_alternative",
+    "approval_wait",
+    "reply_to_thread"
+]
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram; percentiles are accurate to the bucket growth factor."""
+
+    def __init__(self, growth: float = 1.05):
+        self._log_growth = math.log(growth)
+        self.growth = growth
+        self._buckets: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float):
+        """Add one observation in milliseconds."""
+        bucket = math.floor(math.log(ms) / self._log_growth) if ms > 0.001 else -1000
+        with self._lock:
+            self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+            self.count += 1
+            self.total_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, fraction: float) -> float:
+        """Approximate latency at the given fraction (0.5 for p50)."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = math.ceil(fraction * self.count)
+            seen = 0
+            for bucket in sorted(self._buckets):
+                seen += self._buckets[bucket]
+                if seen >= rank:
+                    # Upper edge of the bucket, never above the largest observation
+                    return min(self.growth ** (bucket + 1), self.max_ms)
+            return self.max_ms
+
+    def summary(self) -> Dict[str, float]:
+        """Count, mean, max and p50/p95/p99."""
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.max_ms
+        }
+
+
+class Tracer:
+    """Records spans into per-stage histograms and, optionally, a JSON-lines export."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, export_log: Optional[JsonLinesLog] = None):
+        self.config = config or TRACING_CONFIG
+        self.enabled = self.config.get("enabled", True)
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self._histograms_lock = threading.Lock()
+        self._local = threading.local()
+
+        export_path = self.config.get("export_path")
+        self.export_log = export_log
+        if self.export_log is None and self.enabled and export_path:
+            self.export_log = JsonLinesLog(export_path,
+                                           flush_every_events=self.config.get("flush_every_events", 200),
+                                           flush_interval_seconds=self.config.get("flush_interval_seconds", 5.0))
+
+    @property
+    def current_trace_id(self) -> Optional[str]:
+        """Trace id of the email being handled on this thread."""
+        return getattr(self._local, "trace_id", None)
+
+    @contextmanager
+    def trace(self, trace_id: Optional[str] = None) -> Iterator[str]:
+        """Make a (new) trace id current on this thread for the duration of the block."""
+        previous = self.current_trace_id
+        self._local.trace_id = trace_id or uuid.uuid4().hex[:16]
+        try:
+            yield self._local.trace_id
+        finally:
+            self._local.trace_id = previous
+
+    @contextmanager
+    def span(self, stage: str, trace_id: Optional[str] = None, **fields: Any) -> Iterator[None]:
+        """Time a block as one span of the current (or given) trace."""
+        if not self.enabled:
+            yield
+            return
+        started_at = time.time()
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self._finish(stage, trace_id or self.current_trace_id, started_at,
+                         (time.perf_counter() - started) * 1000, error, fields)
+
+    def record(self, stage: str, duration_ms: float, trace_id: Optional[str] = None,
+               started_at: Optional[float] = None, **fields: Any):
+        """Record a span measured elsewhere (e.g. time a draft spent waiting for approval)."""
+        if not self.enabled:
+            return
+        started_at = started_at if started_at is not None else time.time() - duration_ms / 1000
+        self._finish(stage, trace_id or self.current_trace_id, started_at, duration_ms, None, fields)
+
+    def _finish(self, stage: str, trace_id: Optional[str], started_at: float, duration_ms: float,
+                error: Optional[str], fields: Dict[str, Any]):
+        """Feed the histogram and export the span."""
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._histograms_lock:
+                histogram = self.histograms.setdefault(stage, LatencyHistogram(self.config.get("bucket_growth", 1.05)))
+        histogram.record(duration_ms)
+
+        if self.export_log is not None:
+            self.export_log.write("span", trace_id=trace_id, stage=stage, start=round(started_at, 6),
+                                  duration_ms=round(duration_ms, 3), error=error, **fields)
+
+    def get_latency_report(self) -> List[Dict[str, Any]]:
+        """Percentiles per stage, pipeline stages first."""
+        order = {stage: i for i, stage in enumerate(PIPELINE_STAGES)}
+        stages = sorted(self.histograms, key=lambda s: (order.get(s, len(order)), s))
+        return [{"stage": stage, **self.histograms[stage].summary()} for stage in stages]
+
+    def flush(self):
+        """Write buffered spans to the export file."""
+        if self.export_log is not None:
+            self.export_log.flush()
+
+
+_default_tracer: Optional[Tracer] = None
+_default_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer built from TRACING_CONFIG."""
+    global _default_tracer
+    if _default_tracer is None:
+        with _default_lock:
+            if _default_tracer is None:
+                _default_tracer = Tracer()
+    return _default_tracer
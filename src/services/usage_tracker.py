@@ -0,0 +1,194 @@
+"""
+Token and cost accounting for LLM calls, with a daily token budget.
+
+Every model call reports its prompt and completion tokens (from the
+response's ``usage_metadata``). Totals are kept per sender, per pipeline stage
+and per model; the day's totals are persisted so the budget survives restarts.
+Once the daily budget is used up, callers switch to cheaper behavior.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import date
+from typing import Dict, Any, List, Optional
+
+from config.agent_config import USAGE_CONFIG
+from config.paths import resolve_data_path
+
+
+def usage_from_response(response: Any) -> Dict[str, int]:
+    """Prompt and completion tokens of a langchain chat response (zeros when not reported)."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    if not usage:
+        token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+        usage = {"input_tokens": token_usage.get("prompt_tokens", 0),
+                 "output_tokens": token_usage.get("completion_tokens", 0)}
+    return {"input_tokens": int(usage.get("input_tokens", 0) or 0),
+            "output_tokens": int(usage.get("output_tokens", 0) or 0)}
+
+
+def _empty_totals() -> Dict[str, float]:
+    return {"calls": 0, "input_tokens": 0, "output_tokens": 0, "cost": 0.0}
+
+
+class UsageTracker:
+    """Aggregates token usage and enforces the daily budget."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = config or USAGE_CONFIG
+        self.daily_token_budget = self.config.get("daily_token_budget", 0)
+        self.prices = self.config.get("prices_per_million_tokens", {})
+        self.path = resolve_data_path(self.config["path"]) if self.config.get("path") else None
+        self.save_interval_seconds = self.config.get("save_interval_seconds", 30)
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        self.save_errors = 0
+        self.last_error: Optional[str] = None
+        self._reset(date.today().isoformat())
+        self.load()
+
+    def _reset(self, day: str):
+        """Start a new accounting day."""
+        self.day = day
+        self.by_sender: Dict[str, Dict[str, float]] = {}
+        self.by_stage: Dict[str, Dict[str, float]] = {}
+        self.by_model: Dict[str, Dict[str, float]] = {}
+        self.total = _empty_totals()
+        self.budget_fallbacks: Dict[str, int] = {}
+
+    def _roll_day(self):
+        """Reset totals at midnight."""
+        today = date.today().isoformat()
+        if today != self.day:
+            self._reset(today)
+
+    def cost(self, model: str, input_tokens: int, output_tokens: int) -> float:
+        """Estimated cost in USD from the configured price table."""
+        price = self.prices.get(model, {})
+        return (input_tokens * price.get("input", 0.0) + output_tokens * price.get("output", 0.0)) / 1_000_000
+
+    def record(self, stage: str, model: str, response: Any, sender: Optional[str] = None):
+        """Account for one model call."""
+        usage = usage_from_response(response)
+        input_tokens, output_tokens = usage["input_tokens"], usage["output_tokens"]
+        cost = self.cost(model, input_tokens, output_tokens)
+
+        with self._lock:
+            self._roll_day()
+            buckets = [self.total,
+                       self.by_stage.setdefault(stage, _empty_totals()),
+                       self.by_model.setdefault(model, _empty_totals())]
+            if sender:
+                buckets.append(self.by_sender.setdefault(sender, _empty_totals()))
+            for totals in buckets:
+                totals["calls"] += 1
+                totals["input_tokens"] += input_tokens
+                totals["output_tokens"] += output_tokens
+                totals["cost"] += cost
+
+        from services.metrics import get_metrics
+        metrics = get_metrics()
+        metrics.inc("llm_tokens_total", input_tokens, model=model, stage=stage, type="input")
+        metrics.inc("llm_tokens_total", output_tokens, model=model, stage=stage, type="output")
+
+        if time.monotonic() - self._last_save > self.save_interval_seconds:
+            self.save()
+
+    def tokens_used_today(self) -> int:
+        """Prompt plus completion tokens spent today."""
+        with self._lock:
+            self._roll_day()
+            return int(self.total["input_tokens"] + self.total["output_tokens"])
+
+    def budget_exhausted(self) -> bool:
+        """Whether today's token budget is used up (0 means unlimited)."""
+        return bool(self.daily_token_budget) and self.tokens_used_today() >= self.daily_token_budget
+
+    def use_cheaper_behavior(self, stage: str) -> bool:
+        """True when the caller should fall back to its cheaper path; counts the fallback."""
+        if not self.budget_exhausted():
+            return False
+        with self._lock:
+            self.budget_fallbacks[stage] = self.budget_fallbacks.get(stage, 0) + 1
+        return True
+
+    def get_report(self, top: int = 10) -> Dict[str, Any]:
+        """Today's usage by sender, stage and model."""
+        def ranked(groups: Dict[str, Dict[str, float]], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+            rows = [{"name": name, **totals} for name, totals in groups.items()]
+            rows.sort(key=lambda r: -(r["input_tokens"] + r["output_tokens"]))
+            return rows[:limit] if limit else rows
+
+        with self._lock:
+            self._roll_day()
+            return {
+                "day": self.day,
+                "total": dict(self.total),
+                "daily_token_budget": self.daily_token_budget,
+                "budget_exhausted": bool(self.daily_token_budget) and
+                                    self.total["input_tokens"] + self.total["output_tokens"] >= self.daily_token_budget,
+                "budget_fallbacks": dict(self.budget_fallbacks),
+                "save_errors": self.save_errors,
+                "last_error": self.last_error,
+                "by_sender": ranked(self.by_sender, top),
+                "senders": len(self.by_sender),
+                "by_stage": ranked(self.by_stage),
+                "by_model": ranked(self.by_model)
+            }
+
+    def save(self):
+        """Persist today's totals."""
+        if not self.path:
+            return
+        with self._lock:
+            state = {"day": self.day, "total": self.total, "by_sender": self.by_sender, "by_stage": self.by_stage,
+                     "by_model": self.by_model, "budget_fallbacks": self.budget_fallbacks}
+            data = json.dumps(state)
+            self._last_save = time.monotonic()
+        try:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            # Totals stay in memory; the next save retries
+            with self._lock:
+                self.save_errors += 1
+                self.last_error = f"Could not write usage totals: {e}"
+            from services.metrics import get_metrics
+            get_metrics().inc("usage_save_errors_total")
+
+    def load(self):
+        """Restore today's totals after a restart; older days are ignored."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            self.last_error = f"Could not read usage totals: {e}"
+            return
+        if state.get("day") != self.day:
+            return
+        with self._lock:
+            self.total = state.get("total", _empty_totals())
+            self.by_sender = state.get("by_sender", {})
+            self.by_stage = state.get("by_stage", {})
+            self.by_model = state.get("by_model", {})
+            self.budget_fallbacks = state.get("budget_fallbacks", {})
+
+
+_default_tracker: Optional[UsageTracker] = None
+_default_lock = threading.Lock()
+
+
+def get_usage_tracker() -> UsageTracker:
+    """Process-wide usage tracker built from USAGE_CONFIG."""
+    global _default_tracker
+    if _default_tracker is None:
+        with _default_lock:
+            if _default_tracker is None:
+                _default_tracker = UsageTracker()
+    return _default_tracker
@@ -1,9 +1,22 @@
 """
 UI module for console formatting and display logic.
+
+Exports are resolved lazily so that headless runs can import ui.headless_interface
+without loading rich.
 """
 
-from .console_manager import ConsoleManager
-from .email_display import EmailDisplay
-from .user_interface import UserInterface
+__all__ = ['ConsoleManager', 'EmailDisplay', 'UserInterface', 'HeadlessInterface']
+
+_EXPORTS = {
+    'ConsoleManager': '.console_manager',
+    'EmailDisplay': '.email_display',
+    'UserInterface': '.user_interface',
+    'HeadlessInterface': '.headless_interface',
+}
+
 
-__all__ = ['ConsoleManager', 'EmailDisplay', 'UserInterface']
+def __getattr__(name):
+    if name in _EXPORTS:
+        from importlib import import_module
+        return getattr(import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
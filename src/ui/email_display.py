@@ -37,6 +37,36 @@ class EmailDisplay:
         self.console.print(f"📧 Total senders: {stats.get('total_senders', 0)}")
         self.console.print(f"🔄 Processed threads: {stats.get('processed_threads', 0)}")
         self.console.print(f"👤 Senders with extracted info: {stats.get('senders_with_info', 0)}")
+        self.console.print(f"📝 Senders with rolling summary: {stats.get('senders_with_summary', 0)}")
+        
+        guard = stats.get('thread_guard')
+        if guard:
+            self.console.print(
+                f"🛡️ Thread guard: {guard['recent_ids']} recent, {guard['filtered_ids']} filtered, "
+                f"{guard['memory_bytes'] / 1024:.0f} KiB, est. false positives {guard['estimated_false_positive_rate']:.1e}"
+            )
+        
+        threads = stats.get('thread_context')
+        if threads:
+            self.console.print(
+                f"🧵 Thread cache: {threads['cached_threads']} threads, {threads['hits']} hits, "
+                f"{threads['incremental_fetches']} incremental / {threads['full_fetches']} full fetches"
+            )
+        
+        bodies = stats.get('body_normalizer')
+        if bodies and bodies['emails']:
+            self.console.print(
+                f"✂️ Body normalization: {bodies['chars_saved']} characters (~{bodies['tokens_saved']} tokens) "
+                f"removed from {bodies['emails']} emails ({bodies['reduction']:.0%})"
+            )
+        
+        duplicates = stats.get('near_duplicates')
+        if duplicates and duplicates['lookups']:
+            self.console.print(
+                f"♻️ Reused drafts: {duplicates['hits']} of {duplicates['lookups']} lookups "
+                f"({duplicates['hit_rate']:.0%} hit rate), {duplicates['entries']} indexed, "
+                f"{duplicates.get('rejected', 0)} similar but carrying another sender's details"
+            )
         
         if stats.get('email_history'):
             self.console.print(f"\n📊 [bold green]Email History:[/bold green]")
@@ -51,10 +81,88 @@ class EmailDisplay:
         else:
             self.console.print(f"\n👤 [bold dim]No sender information learned yet[/bold dim]")
     
+    def show_latency_report(self, report: List[Dict[str, Any]]):
+        """Display per-stage latency percentiles."""
+        self.console.print_header("Pipeline Latency")
+        if not report:
+            self.console.print("⏱️ [bold dim]No spans recorded yet[/bold dim]")
+            return
+        self.console.print(f"{'stage':<22}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+        for row in report:
+            self.console.print(
+                f"{row['stage']:<22}{row['count']:>7}{self._format_ms(row['p50_ms']):>10}"
+                f"{self._format_ms(row['p95_ms']):>10}{self._format_ms(row['p99_ms']):>10}{self._format_ms(row['max_ms']):>10}"
+            )
+    
+    @staticmethod
+    def _format_ms(ms: float) -> str:
+        """Milliseconds, switching to seconds above one second."""
+        return f"{ms / 1000:.2f}s" if ms >= 1000 else f"{ms:.1f}ms"
+    
+    def show_usage_report(self, report: Dict[str, Any]):
+        """Display today's token usage and estimated cost."""
+        self.console.print_header(f"LLM Usage ({report['day']})")
+        total = report['total']
+        tokens = int(total['input_tokens'] + total['output_tokens'])
+        budget = report['daily_token_budget']
+        budget_text = f" of {budget:,} budget ({tokens / budget:.0%})" if budget else ""
+        self.console.print(f"🔢 {tokens:,} tokens{budget_text} in {int(total['calls'])} calls, est. ${total['cost']:.4f}")
+        if report['budget_exhausted']:
+            fallbacks = ", ".join(f"{stage}: {count}" for stage, count in report['budget_fallbacks'].items())
+            self.console.print_warning(f"Daily budget used up - cheaper behavior active ({fallbacks or 'no calls yet'})")
+        if report.get('last_error'):
+            self.console.print_warning(f"{report['last_error']} ({report['save_errors']} failed saves)")
+        
+        for title, key in (("By stage", "by_stage"), ("By model", "by_model"),
+                           (f"Top senders (of {report['senders']})", "by_sender")):
+            if not report[key]:
+                continue
+            self.console.print(f"\n📊 [bold green]{title}:[/bold green]")
+            for row in report[key]:
+                self.console.print(
+                    f"  • {row['name']}: {int(row['input_tokens']):,} in / {int(row['output_tokens']):,} out "
+                    f"in {int(row['calls'])} calls, ${row['cost']:.4f}"
+                )
+    
+    def show_accounts(self, accounts: List[Dict[str, Any]]):
+        """Display the Gmail accounts served by this process."""
+        self.console.print_header("Accounts")
+        for account in accounts:
+            marker = "👉" if account['current'] else "  "
+            self.console.print(f"{marker} [bold]{account['id']}[/bold] ({account['email']}) - "
+                               f"{account['pending_drafts']} drafts pending")
+    
+    def show_profiler_status(self, status: Dict[str, Any]):
+        """Display the profiler state and the files it wrote."""
+        self.console.print_header("Profiler")
+        if status['mode']:
+            self.console.print(f"⏱️ Running ({status['mode']}) for {status['running_seconds']:.0f}s")
+        else:
+            self.console.print("⏱️ Not running" + (f" (stopped {status['stopped_mode']})" if status.get('stopped_mode') else ""))
+        slow_only = f", slower than {status['min_email_seconds']:g}s" if status['min_email_seconds'] else ""
+        self.console.print(f"📈 {status['samples']} samples, {status['emails_kept']} emails kept{slow_only}, "
+                           f"{status['emails_dropped']} dropped")
+        for path in status['files']:
+            self.console.print(f"  • {path}")
+    
+    def show_filter_stats(self, stats: Dict[str, Any]):
+        """Display sender filter rules and hit counters."""
+        self.console.print_header("Sender Filter")
+        rules = stats['rules']
+        self.console.print(f"📏 Rules: {rules['exact']} exact, {rules['domain']} domain, {rules['wildcard']} wildcard, "
+                           f"{rules['allowed_domains']} allowed domains, no-reply heuristic {'on' if rules['noreply_heuristic'] else 'off'}")
+        self.console.print(f"🔍 Checked: {stats['checked']}  🚫 Blocked: {stats['blocked']}")
+        for rule, hits in stats['hits'].items():
+            self.console.print(f"  • {rule}: {hits}")
+    
     def show_sender_info_learned(self, details: str):
         """Show when sender information is learned."""
         self.console.print_info(f"Learned key details about sender: {details}")
     
+    def show_sender_filtered(self, sender: str, thread_id: str, rule: str):
+        """Show an email skipped by the sender filter."""
+        self.console.print(f"\n🚫 [dim]Skipped email from {sender} (Thread: {thread_id}): {rule}[/dim]")
+    
     def show_email_processing_start(self, sender_email: str, thread_id: str):
         """Show when email processing starts."""
         self.console.print(f"\n📧 Processing email from {sender_email} (Thread: {thread_id})")
@@ -75,9 +183,73 @@ class EmailDisplay:
         """Show when response is cancelled."""
         self.console.print_error("Response cancelled")
     
-    def ask_send_approval(self) -> bool:
-        """Ask user for approval to send response."""
-        return self.console.ask_confirmation("Send this response?", default=True)
+    def show_draft_queued(self, draft: Dict[str, Any], pending_count: int):
+        """Show that a draft was added to the approval inbox."""
+        self.console.print_info(
+            f"Draft #{draft['id']} for {draft['sender_email']} is ready for review "
+            f"({pending_count} pending) - use 'view {draft['id']}' or 'drafts'"
+        )
+    
+    def show_auto_sent(self, sender_email: str, rule: str):
+        """Show that a reply was sent by the approval policy."""
+        self.console.print_success(f"Reply to {sender_email} sent automatically (policy rule: {rule})")
+    
+    def show_drafts_list(self, drafts: List[Dict[str, Any]]):
+        """Show drafts awaiting approval."""
+        if not drafts:
+            self.console.print("\n📭 [bold dim]No drafts awaiting approval[/bold dim]")
+            return
+        
+        self.console.print(f"\n📥 [bold cyan]Drafts awaiting approval ({len(drafts)}):[/bold cyan]")
+        for draft in drafts:
+            preview = draft['response'].strip().replace("\n", " ")[:60]
+            edited = " (edited)" if draft.get('edited') else ""
+            self.console.print(f"  • [bold]#{draft['id']}[/bold] {draft['sender_email']}{edited}: {preview}...")
+    
+    def show_send_report(self, report: Dict[str, Any]):
+        """Show per-reply results of a bulk approval."""
+        self.console.print(f"\n📤 [bold cyan]Sent {report['sent']} of {len(report['results'])} replies "
+                           f"in {report['wall_seconds']:.2f}s[/bold cyan]")
+        for result in report['results']:
+            icon = "✅" if result['success'] else "❌"
+            detail = result.get('error') or f"{result.get('seconds', 0):.2f}s"
+            self.console.print(f"  {icon} #{result['draft_id']} {result.get('sender_email', '')} - {detail}")
+    
+    def show_startup_timings(self, report: Dict[str, Any]):
+        """Show how long each initialization step took."""
+        self.console.print(f"\n⏱️ [bold cyan]Ready in {report['ready_seconds']:.2f}s[/bold cyan]")
+        for step in report['steps']:
+            if step['seconds'] is not None:
+                detail = f"{step['seconds']:.2f}s (started at {step['started_at']:.2f}s)"
+            else:
+                detail = step['status']
+            suffix = " [dim](background)[/dim]" if step['background'] else ""
+            self.console.print(f"  • {step['name']}: {detail}{suffix}")
+    
+    def show_dead_letters(self, letters: List[Dict[str, Any]]):
+        """Show replies that could not be sent."""
+        if not letters:
+            self.console.print("\n📭 [bold dim]No failed sends[/bold dim]")
+            return
+        
+        self.console.print(f"\n💀 [bold red]Failed sends ({len(letters)}):[/bold red]")
+        for letter in letters:
+            self.console.print(f"  • [bold]{letter['key']}[/bold] to {letter['recipient_email']} "
+                               f"after {letter['attempts']} attempts: {letter['error']}")
+        self.console.print("💡 Use 'resend <key>' to try again")
+    
+    def show_draft(self, draft: Dict[str, Any]):
+        """Show the original email and the draft reply."""
+        self.show_email_panel(draft['sender_email'], draft['email_text'])
+        if draft.get('review_reasons'):
+            self.console.print_warning(f"Needs review: {'; '.join(draft['review_reasons'])}")
+        if draft.get('alternative_of'):
+            self.console.print_info(f"Alternative to rejected draft #{draft['alternative_of']}")
+        self.console.print_panel(
+            draft['response'],
+            title=f"🤖 Draft #{draft['id']} ({draft['status']})",
+            border_style="green"
+        )
     
     def show_processing_status(self, status: str):
         """Show processing status."""
@@ -96,13 +268,25 @@ class EmailDisplay:
         """Show help information."""
         self.console.print("\n📋 [bold cyan]Available Commands:[/bold cyan]")
         self.console.print("• [bold]prompt <text>[/bold] - Ask AI a question")
+        self.console.print("• [bold]drafts[/bold] - List drafts awaiting approval")
+        self.console.print("• [bold]view <id>[/bold] - Show a draft with its original email")
+        self.console.print("• [bold]approve <id ...>|sender <email>|all[/bold] - Send drafts (in parallel)")
+        self.console.print("• [bold]edit <id> [text][/bold] - Replace a draft's text (multi-line input if no text given)")
+        self.console.print("• [bold]reject <id>[/bold] - Discard a draft and show its pre-written alternative")
+        self.console.print("• [bold]deadletters[/bold] - List replies that failed after all retries")
+        self.console.print("• [bold]resend <key>[/bold] - Retry a failed reply")
+        self.console.print("• [bold]filters[/bold] - Show sender filter rules and hit counts")
+        self.console.print("• [bold]latency[/bold] - Show p50/p95/p99 per pipeline stage")
+        self.console.print("• [bold]usage[/bold] - Show today's tokens and cost by sender, stage and model")
+        self.console.print("• [bold]profiler start [sampling|cprofile] [seconds] [min_email_seconds]|stop|status[/bold] - Profile the live agent")
         self.console.print("• [bold]memory[/bold] - Show email memory and sender info")
         self.console.print("• [bold]profile[/bold] - Show Gmail profile")
+        self.console.print("• [bold]account [id][/bold] - List accounts or switch the one commands act on")
         self.console.print("• [bold]quit[/bold] - Exit the application")
-        self.console.print("\n💡 [bold yellow]Note:[/bold yellow] Email responses are handled automatically with approval prompts")
+        self.console.print("\n💡 [bold yellow]Note:[/bold yellow] Generated replies wait in the drafts inbox until you approve them")
     
     def show_commands_info(self):
         """Show available commands at startup."""
-        self.console.print("\n📋 [bold cyan]Commands:[/bold cyan] prompt <text> | memory | profile | quit")
-        self.console.print("💡 [bold yellow]Note:[/bold yellow] Email responses are handled automatically with approval prompts\n")
+        self.console.print("\n📋 [bold cyan]Commands:[/bold cyan] drafts | view | approve | edit | reject | prompt <text> | memory | profile | quit")
+        self.console.print("💡 [bold yellow]Note:[/bold yellow] Generated replies wait in the drafts inbox until you approve them\n")
         self.console.print("🔄 [bold green]Email listener is active. You can use commands or wait for emails.[/bold green]\n")
@@ -0,0 +1,174 @@
+"""
+Headless user interface that records pipeline events as JSON lines instead of rendering them.
+
+This module must not import rich (directly or through ui.console_manager).
+"""
+
+from typing import Dict, Any, List
+
+from services.event_log import JsonLinesLog
+
+
+class HeadlessInterface:
+    """Drop-in replacement for UserInterface in unattended (daemon) runs."""
+
+    def __init__(self, event_log: JsonLinesLog):
+        self.log = event_log
+
+    def show_startup_message(self):
+        """Record startup."""
+        self.log.write("startup")
+
+    def show_system_ready(self):
+        """Record system ready."""
+        self.log.write("system_ready")
+
+    def show_startup_timings(self, report: Dict[str, Any]):
+        """Record initialization step timings."""
+        self.log.write("startup_timings", ready_seconds=report["ready_seconds"],
+                       steps={s["name"]: s["seconds"] for s in report["steps"]})
+    
+    def show_system_error(self, error: str):
+        """Record initialization failure."""
+        self.log.write("system_error", error=error)
+        self.log.flush()
+
+    def show_listening_started(self):
+        """Record listener start."""
+        self.log.write("listening_started")
+
+    def show_listening_stopped(self):
+        """Record listener stop."""
+        self.log.write("listening_stopped")
+
+    def show_goodbye(self):
+        """Record shutdown."""
+        self.log.write("shutdown")
+        self.log.flush()
+
+    def show_interrupt(self):
+        """Record interrupt."""
+        self.log.write("interrupted")
+        self.log.flush()
+
+    def show_error(self, error: str):
+        """Record an error."""
+        self.log.write("error", error=error)
+
+    def show_fatal_error(self, error: str):
+        """Record a fatal error."""
+        self.log.write("fatal_error", error=error)
+        self.log.flush()
+
+    def show_processing_status(self, status: str):
+        """Record a status message."""
+        self.log.write("status", message=status)
+
+    def show_sender_filtered(self, sender: str, thread_id: str, rule: str):
+        """Record an email skipped by the sender filter."""
+        self.log.write("email_filtered", sender=sender, thread_id=thread_id, rule=rule)
+
+    def show_email_processing_start(self, sender_email: str, thread_id: str):
+        """Record email processing start."""
+        self.log.write("email_received", sender=sender_email, thread_id=thread_id)
+
+    def show_response_generation(self):
+        """Record response generation."""
+        self.log.write("response_generation")
+
+    def show_sender_info_learned(self, details: str):
+        """Record learned sender details."""
+        self.log.write("sender_info_learned", details=details)
+
+    def show_draft_queued(self, draft: Dict[str, Any], pending_count: int):
+        """Record a draft awaiting approval."""
+        self.log.write("draft_queued", draft_id=draft["id"], sender=draft["sender_email"],
+                       thread_id=draft["thread_id"], pending=pending_count)
+
+    def show_auto_sent(self, sender_email: str, rule: str):
+        """Record a reply sent by the approval policy."""
+        self.log.write("reply_auto_sent", sender=sender_email, rule=rule)
+
+    def show_email_sent_success(self):
+        """Record a sent reply."""
+        self.log.write("reply_sent")
+
+    def show_email_sent_failure(self):
+        """Record a failed reply."""
+        self.log.write("reply_failed")
+
+    def show_response_cancelled(self):
+        """Record a rejected reply."""
+        self.log.write("reply_cancelled")
+
+    def show_send_report(self, report: Dict[str, Any]):
+        """Record bulk send results."""
+        self.log.write("send_report", sent=report["sent"], failed=report["failed"],
+                       wall_seconds=report["wall_seconds"])
+
+    def show_drafts_list(self, drafts: List[Dict[str, Any]]):
+        """Record pending drafts with their sender and a preview."""
+        self.log.write("drafts", drafts=[
+            {"id": d["id"], "sender_email": d["sender_email"], "edited": bool(d.get("edited")),
+             "preview": d["response"].strip().replace("\n", " ")[:60]}
+            for d in drafts
+        ])
+
+    def show_draft(self, draft: Dict[str, Any]):
+        """Record a draft in full with its original email."""
+        self.log.write("draft", id=draft["id"], status=draft["status"], sender_email=draft["sender_email"],
+                       email_text=draft["email_text"], response=draft["response"],
+                       review_reasons=draft.get("review_reasons", []), alternative_of=draft.get("alternative_of"))
+
+    def show_dead_letters(self, letters: List[Dict[str, Any]]):
+        """Record replies that could not be sent."""
+        self.log.write("dead_letters", letters=[
+            {"key": l["key"], "recipient_email": l["recipient_email"], "attempts": l["attempts"],
+             "outcome": l.get("outcome"), "error": l["error"]}
+            for l in letters
+        ])
+
+    def show_accounts(self, accounts: List[Dict[str, Any]]):
+        """Record the accounts served by this process."""
+        self.log.write("accounts", accounts=accounts)
+
+    def show_filter_stats(self, stats: Dict[str, Any]):
+        """Record sender filter statistics."""
+        self.log.write("filter_stats", stats=stats)
+
+    def show_latency_report(self, report: List[Dict[str, Any]]):
+        """Record per-stage latency percentiles."""
+        self.log.write("latency_report", stages=report)
+
+    def show_usage_report(self, report: Dict[str, Any]):
+        """Record today's token usage."""
+        self.log.write("usage_report", report=report)
+
+    def show_command(self, command: str):
+        """Record a command read from the control file."""
+        self.log.write("command", command=command)
+
+    def show_unknown_command(self):
+        """Record a command headless mode does not run."""
+        self.log.write("unknown_command")
+
+    def show_usage_error(self, usage: str):
+        """Record a malformed command."""
+        self.log.write("usage_error", usage=usage)
+
+    def get_multiline_input(self, prompt: str) -> str:
+        """No console to read from; commands must carry their text."""
+        return ""
+
+    def show_profiler_status(self, status: Dict[str, Any]):
+        """Log the profiler state (toggled with SIGUSR1)."""
+        self.log.write("profiler", mode=status["mode"], stopped_mode=status.get("stopped_mode"),
+                       samples=status["samples"], emails_kept=status["emails_kept"], files=status["files"])
+
+    def show_memory_stats(self, stats: Dict[str, Any]):
+        """Record memory statistics."""
+        self.log.write("memory_stats", total_senders=stats.get("total_senders", 0),
+                       processed_threads=stats.get("processed_threads", 0))
+
+    def show_command_prompt(self):
+        """No interactive prompt in headless mode."""
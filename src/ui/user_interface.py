@@ -2,7 +2,7 @@
 Main user interface coordinator for the email agent.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, List
 from .console_manager import ConsoleManager
 from .email_display import EmailDisplay
 
@@ -50,6 +50,26 @@ class UserInterface:
         """Show memory statistics."""
         self.email_display.show_memory_stats(stats)
     
+    def show_latency_report(self, report: List[Dict[str, Any]]):
+        """Show per-stage latency percentiles."""
+        self.email_display.show_latency_report(report)
+    
+    def show_usage_report(self, report: Dict[str, Any]):
+        """Show token usage and cost."""
+        self.email_display.show_usage_report(report)
+    
+    def show_accounts(self, accounts: List[Dict[str, Any]]):
+        """Show served accounts."""
+        self.email_display.show_accounts(accounts)
+    
+    def show_profiler_status(self, status: Dict[str, Any]):
+        """Show the profiler state."""
+        self.email_display.show_profiler_status(status)
+    
+    def show_filter_stats(self, stats: Dict[str, Any]):
+        """Show sender filter statistics."""
+        self.email_display.show_filter_stats(stats)
+    
     def show_ai_response(self, response: str):
         """Show AI response to user prompt."""
         self.console.print(f"\n🤖 [bold green]Assistant Response:[/bold green]")
@@ -57,7 +77,7 @@ class UserInterface:
     
     def show_unknown_command(self):
         """Show unknown command message."""
-        self.console.print_error("Unknown command. Available: prompt, memory, profile, quit")
+        self.console.print_error("Unknown command. Available: drafts, view, approve, edit, reject, deadletters, resend, prompt, filters, latency, usage, profiler, memory, profile, account, quit")
     
     def show_usage_error(self, usage: str):
         """Show usage error."""
@@ -67,6 +87,17 @@ class UserInterface:
         """Get command input from user."""
         return input("Command> ").strip()
     
+    def get_multiline_input(self, prompt: str) -> str:
+        """Get multi-line input from user, finished by a line containing only '.'."""
+        self.console.print(f"{prompt} (finish with a single '.' line):")
+        lines = []
+        while True:
+            line = input()
+            if line.strip() == ".":
+                break
+            lines.append(line)
+        return "\n".join(lines).strip()
+    
     def show_error(self, error: str):
         """Show general error message."""
         self.console.print_error(f"Error: {error}")
@@ -80,12 +111,38 @@ class UserInterface:
         self.console.print_error(f"Fatal error: {error}")
     
     # Email-specific UI methods
-    def show_email_for_approval(self, sender_email: str, email_content: str, response: str) -> bool:
-        """Show email and response for approval."""
-        self.email_display.show_email_panel(sender_email, email_content)
-        self.email_display.show_response_panel(response)
+    def show_draft_queued(self, draft: Dict[str, Any], pending_count: int):
+        """Show draft queued for approval."""
+        self.email_display.show_draft_queued(draft, pending_count)
+    
+    def show_auto_sent(self, sender_email: str, rule: str):
+        """Show automatically sent reply."""
+        self.email_display.show_auto_sent(sender_email, rule)
+    
+    def show_drafts_list(self, drafts: List[Dict[str, Any]]):
+        """Show drafts awaiting approval."""
+        self.email_display.show_drafts_list(drafts)
+    
+    def show_send_report(self, report: Dict[str, Any]):
+        """Show bulk send results."""
+        self.email_display.show_send_report(report)
+    
+    def show_startup_timings(self, report: Dict[str, Any]):
+        """Show initialization step timings."""
+        self.email_display.show_startup_timings(report)
+    
+    def show_dead_letters(self, letters: List[Dict[str, Any]]):
+        """Show failed sends."""
+        self.email_display.show_dead_letters(letters)
+    
+    def show_draft(self, draft: Dict[str, Any]):
+        """Show a draft with its original email."""
+        self.email_display.show_draft(draft)
         self.console.flush()
-        return self.email_display.ask_send_approval()
+    
+    def show_sender_filtered(self, sender: str, thread_id: str, rule: str):
+        """Show an email skipped by the sender filter."""
+        self.email_display.show_sender_filtered(sender, thread_id, rule)
     
     def show_email_processing_start(self, sender_email: str, thread_id: str):
         """Show email processing start."""
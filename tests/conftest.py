@@ -0,0 +1,103 @@
+import os
+import sys
+
+import pytest
+
+# Modules are imported as top-level packages (services, config, ...) from src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+@pytest.fixture(autouse=True)
+def isolate_globals(monkeypatch):
+    """Keep process-wide services from writing trace, usage or send state files under data/."""
+    import services.metrics as metrics
+    import services.tracing as tracing
+    import services.usage_tracker as usage_tracker
+    from config.agent_config import EMAIL_CONFIG
+
+    monkeypatch.setitem(EMAIL_CONFIG, "outbound_state_path", None)
+    tracing._default_tracer = tracing.Tracer({"enabled": True, "export_path": None})
+    usage_tracker._default_tracker = usage_tracker.UsageTracker({"daily_token_budget": 0, "path": None})
+    # Every test registers its own scrape callbacks
+    metrics._default_registry = None
+    yield
+
+
+class FakeMessage:
+    """Chat model response with content and token usage."""
+
+    def __init__(self, content):
+        self.content = content
+        self.usage_metadata = {"input_tokens": 10, "output_tokens": 10, "total_tokens": 20}
+        self.response_metadata = {}
+
+
+class FakeChatModel:
+    """Answers every prompt with the same short reply."""
+
+    def __init__(self, reply="Thanks, Tuesday works for me."):
+        self.reply = reply
+
+    def invoke(self, messages):
+        return FakeMessage(self.reply)
+
+
+class FakeEmailHandler:
+    """EmailHandler stand-in: a profile, an empty thread store and sends that are recorded."""
+
+    def __init__(self):
+        self.user_profile = {"emailAddress": "me@example.com"}
+        self.sent = []
+
+    def fetch_thread_messages(self, thread_id):
+        return []
+
+    def fetch_message(self, message_id):
+        return None
+
+    def send_reply(self, recipient_email, message_text, thread_id):
+        self.sent.append((recipient_email, message_text, thread_id))
+        return {"successful": True}
+
+
+class RecordingUI:
+    """Answers every show_* call and records the draft-queued ones."""
+
+    def __init__(self):
+        self.queued = []
+        self.errors = []
+
+    def show_draft_queued(self, draft, pending_count):
+        self.queued.append(draft)
+
+    def show_error(self, error):
+        self.errors.append(error)
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+@pytest.fixture
+def email_manager(monkeypatch):
+    """A real EmailManager built on fake Gmail and model clients, without snapshots or background schedulers."""
+    from config.agent_config import AI_AGENT_CONFIG, EMAIL_CONFIG, MEMORY_CONFIG
+    from core.email_manager import EmailManager
+    from core.shared_resources import SharedResources
+    from services.response_generator import ResponseGenerator
+    from services.sender_info_extractor import SenderInfoExtractor
+
+    monkeypatch.setitem(MEMORY_CONFIG, "snapshot", {**MEMORY_CONFIG["snapshot"], "enabled": False})
+    monkeypatch.setitem(MEMORY_CONFIG, "summarization", {**MEMORY_CONFIG["summarization"], "enabled": False})
+    monkeypatch.setitem(MEMORY_CONFIG, "extract_sender_info", False)
+    monkeypatch.setitem(EMAIL_CONFIG, "priority_scheduling", {**EMAIL_CONFIG["priority_scheduling"], "enabled": False})
+    monkeypatch.setitem(EMAIL_CONFIG, "near_duplicate", {**EMAIL_CONFIG["near_duplicate"], "enabled": False})
+    monkeypatch.setitem(AI_AGENT_CONFIG, "alternative_draft", {**AI_AGENT_CONFIG["alternative_draft"], "enabled": False})
+    monkeypatch.setitem(AI_AGENT_CONFIG, "auto_reply", False)
+
+    shared = SharedResources()
+    shared.response_generator = ResponseGenerator(model=FakeChatModel())
+    shared.sender_info_extractor = SenderInfoExtractor(model=FakeChatModel())
+    manager = EmailManager(FakeEmailHandler(), RecordingUI(), shared)
+    yield manager
+    manager.shutdown()
+    shared.shutdown()
@@ -0,0 +1,47 @@
+import threading
+
+from services.alternative_drafts import AlternativeDrafts
+from services.response_generator import ResponseGenerator
+
+USER = {"name": "Dana", "email": "dana@example.com"}
+
+
+class StubGenerator:
+    """Returns a scripted reply instead of calling a model."""
+
+    fallback_response = staticmethod(ResponseGenerator.fallback_response)
+
+    def __init__(self, reply):
+        self.reply = reply
+
+    def generate_response(self, sender, email_text, context, user_info, thread_context="", style="", stage=""):
+        return self.reply if self.reply is not None else self.fallback_response(user_info)
+
+
+def generation():
+    return {"sender": "a@example.com", "email_text": "Hi", "context": "", "user_info": USER}
+
+
+def taken(alternatives, draft_id):
+    done = threading.Event()
+    result = []
+    alternatives.take(draft_id, lambda text: (result.append(text), done.set()))
+    assert done.wait(2)
+    return result[0]
+
+
+def test_fallback_reply_is_not_offered_as_an_alternative():
+    alternatives = AlternativeDrafts(StubGenerator(None), {"workers": 1})
+    alternatives.start({"id": 1}, generation())
+    assert taken(alternatives, 1) is None
+    alternatives.shutdown()
+
+
+def test_generated_alternative_is_delivered_and_old_jobs_are_dropped():
+    alternatives = AlternativeDrafts(StubGenerator("Short reply."), {"workers": 1, "max_pending": 2})
+    for draft_id in (1, 2, 3):
+        alternatives.start({"id": draft_id}, generation())
+    assert alternatives.pending_count() == 2
+    assert alternatives.take(1, lambda text: None) is None
+    assert taken(alternatives, 3) == "Short reply."
+    alternatives.shutdown()
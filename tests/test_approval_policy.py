@@ -0,0 +1,69 @@
+import io
+import json
+
+from config.agent_config import AI_AGENT_CONFIG, EMAIL_CONFIG
+from services.approval_policy import ApprovalPolicy
+from services.event_log import JsonLinesLog
+
+CONFIG = {
+    "rules": [{"name": "partners", "domains": ["example.com"]}],
+    "excluded_keywords": ["legal", "invoice"],
+    "max_draft_length": 1200,
+    "audit_log_path": "data/approval_audit.jsonl"
+}
+
+
+def test_no_audit_log_when_auto_reply_is_off(monkeypatch):
+    monkeypatch.setitem(AI_AGENT_CONFIG, "auto_reply", False)
+    policy = ApprovalPolicy(CONFIG)
+    assert policy.audit_log is None
+    assert policy.evaluate("a@example.com", "Hi", "Thanks")["auto_send"] is False
+
+
+def test_keywords_match_whole_words_and_decisions_are_audited(monkeypatch):
+    monkeypatch.setitem(AI_AGENT_CONFIG, "auto_reply", True)
+    monkeypatch.setitem(EMAIL_CONFIG, "require_approval", True)
+    stream = io.StringIO()
+    policy = ApprovalPolicy(CONFIG, audit_log=JsonLinesLog(stream=stream, flush_every_events=1))
+
+    assert policy.evaluate("a@example.com", "That would be illegal parking.", "Noted, thanks.")["auto_send"]
+    held = policy.evaluate("a@example.com", "Please ask Legal.", "Will do.")
+    assert held["reasons"] == ["contains excluded keyword 'legal'"]
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [r["auto_send"] for r in records] == [True, False]
+
+
+def test_known_participant_rule_uses_the_thread_senders(monkeypatch):
+    from services.thread_context import ThreadContextFetcher
+
+    monkeypatch.setitem(AI_AGENT_CONFIG, "auto_reply", True)
+    monkeypatch.setitem(EMAIL_CONFIG, "require_approval", True)
+    policy = ApprovalPolicy({"rules": [{"name": "known_participant", "thread_participant": True}],
+                             "audit_log_path": None})
+    threads = ThreadContextFetcher(lambda thread_id: [
+        {"id": "m1", "sender": "Bob <bob@corp.com>", "text": "Kickoff"},
+        {"id": "m2", "sender": "me@corp.com", "text": "Sounds good"},
+        {"id": "m3", "sender": "Eve <eve@corp.com>", "text": "Hi all"},
+    ])
+    threads.get_messages("t1")
+
+    assert threads.get_participants("t1", "m3") == {"bob@corp.com", "me@corp.com"}
+    assert policy.evaluate("bob@corp.com", "Update?", "Done.", thread_participants={"bob@corp.com"})["auto_send"]
+    # Eve's first message in the thread is the one being answered
+    held = policy.evaluate("eve@corp.com", "Hi all", "Hello.", thread_participants=threads.get_participants("t1", "m3"))
+    assert held["reasons"] == ["no trust rule matched"]
+
+
+def test_reused_replies_are_always_reviewed(monkeypatch):
+    monkeypatch.setitem(AI_AGENT_CONFIG, "auto_reply", True)
+    monkeypatch.setitem(EMAIL_CONFIG, "require_approval", True)
+    stream = io.StringIO()
+    policy = ApprovalPolicy(CONFIG, audit_log=JsonLinesLog(stream=stream, flush_every_events=1))
+
+    held = policy.evaluate("a@example.com", "Hi", "Thanks", reused_from="t0")
+
+    assert held["auto_send"] is False
+    assert held["reasons"] == ["reused the reply drafted for thread t0"]
+    assert policy.get_stats()["held_for_review"] == 1
+    assert json.loads(stream.getvalue())["reused_from"] == "t0"
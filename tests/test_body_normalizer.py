@@ -0,0 +1,15 @@
+from services.body_normalizer import BodyNormalizer
+
+
+def test_body_with_nothing_left_after_normalizing_keeps_the_original_text():
+    normalizer = BodyNormalizer(min_chars=2)
+    result = normalizer.normalize("> Can we meet on Friday?\n> Thanks")
+    assert result["fallback"]
+    assert result["text"] == "> Can we meet on Friday?\n> Thanks"
+    assert normalizer.get_stats()["fallbacks"] == 1
+
+
+def test_short_reply_above_a_quote_is_still_normalized():
+    result = BodyNormalizer(min_chars=2).normalize("Yes.\n\nOn Mon, Bob wrote:\n> Can we meet on Friday?")
+    assert not result["fallback"]
+    assert result["text"] == "Yes."
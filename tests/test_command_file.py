@@ -0,0 +1,26 @@
+from services.command_file import CommandFile
+
+
+def test_only_lines_appended_after_startup_are_returned(tmp_path):
+    path = tmp_path / "commands.txt"
+    path.write_text("approve all\n")
+    commands = CommandFile(str(path))
+    assert commands.poll() == []
+
+    with open(path, "a") as handle:
+        handle.write("drafts\n\napprove 3")
+    assert commands.poll() == ["drafts"]
+    with open(path, "a") as handle:
+        handle.write(" 4\n")
+    assert commands.poll() == ["approve 3 4"]
+    assert commands.poll() == []
+
+
+def test_created_or_truncated_file_is_read_from_the_start(tmp_path):
+    path = tmp_path / "commands.txt"
+    commands = CommandFile(str(path))
+    assert commands.poll() == []
+    path.write_text("reject 1\n")
+    assert commands.poll() == ["reject 1"]
+    path.write_text("view 2\n")
+    assert commands.poll() == ["view 2"]
@@ -0,0 +1,28 @@
+from services.draft_inbox import DraftInbox
+
+
+def add(inbox, n):
+    return [inbox.add("Ann <a@example.com>", "a@example.com", "Hi", f"Reply {i}", "t")["id"] for i in range(n)]
+
+
+def test_pending_index_follows_claims_and_rejections():
+    inbox = DraftInbox(max_finished=10)
+    first, second, third = add(inbox, 3)
+    assert inbox.claim(first)["status"] == DraftInbox.SENDING
+    assert inbox.claim(first) is None
+    inbox.set_status(second, DraftInbox.REJECTED)
+    assert [d["id"] for d in inbox.list()] == [third]
+    assert inbox.pending_count() == 1
+    assert inbox.update_response(second, "too late") is None
+
+
+def test_finished_drafts_are_evicted_but_failed_sends_stay():
+    inbox = DraftInbox(max_finished=2)
+    ids = add(inbox, 4)
+    inbox.set_status(ids[0], DraftInbox.FAILED)
+    for draft_id in ids[1:]:
+        inbox.claim(draft_id)
+        inbox.set_status(draft_id, DraftInbox.SENT)
+    assert inbox.get(ids[1]) is None
+    assert [d["id"] for d in inbox.list(status=None)] == [ids[0], ids[2], ids[3]]
+    assert inbox.get(ids[0])["status"] == DraftInbox.FAILED
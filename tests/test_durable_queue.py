@@ -0,0 +1,55 @@
+from services.durable_queue import DurableQueue, sender_partition
+
+
+def make_queue(tmp_path, partitions=1):
+    return DurableQueue(partitions, path=str(tmp_path / "queue.sqlite3"), max_attempts=2, retry_delay_seconds=0)
+
+
+def test_claim_returns_events_in_order_and_ack_removes_them(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.put({"sender": "a@example.com", "n": 1})
+    queue.put({"sender": "a@example.com", "n": 2})
+    first = queue.claim(0)
+    assert first["payload"]["n"] == 1 and first["attempts"] == 1
+    queue.ack(first["id"])
+    assert queue.claim(0)["payload"]["n"] == 2
+    assert queue.depth() == {0: 1}
+
+
+def test_nack_retries_then_parks_the_event(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.put({"sender": "a@example.com"})
+    queue.nack(queue.claim(0), "boom")
+    retry = queue.claim(0)
+    assert retry["attempts"] == 2
+    queue.nack(retry, "boom again")
+    assert queue.claim(0) is None
+    assert queue.get_stats()["failed"] == 1
+
+
+def test_recover_hands_out_claimed_events_again(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.put({"sender": "a@example.com"})
+    queue.claim(0)
+    assert queue.claim(0) is None
+    assert queue.recover(0) == 1
+    assert queue.claim(0)["attempts"] == 2
+
+
+def test_recover_parks_events_that_exhausted_their_attempts(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.put({"sender": "a@example.com"})
+    queue.claim(0)
+    queue.recover(0)
+    queue.claim(0)  # The worker died on the last attempt as well
+    assert queue.recover(0) == 0
+    assert queue.claim(0) is None
+    assert queue.get_stats()["failed"] == 1
+
+
+def test_rebalance_moves_events_to_their_new_partition(tmp_path):
+    make_queue(tmp_path, partitions=1).put({"sender": "b@example.com"})
+    queue = make_queue(tmp_path, partitions=4)
+    target = sender_partition("b@example.com", 4)
+    assert queue.rebalance() == (1 if target else 0)
+    assert queue.claim(target)["payload"]["sender"] == "b@example.com"
@@ -0,0 +1,160 @@
+import json
+import os
+import threading
+import types
+
+import pytest
+
+# Read when the handler module is imported; the fake toolset below never uses it
+os.environ.setdefault("COMPOSIO_API_KEY", "test-key")
+# The handler talks to Composio; skip where the installed SDK does not match the one the app targets
+email_handler = pytest.importorskip("mail.email_handler", exc_type=ImportError)
+EmailHandler = email_handler.EmailHandler
+
+
+class FakeEntity:
+    def __init__(self, connections):
+        self.connections = connections
+
+    def get_connections(self):
+        return self.connections
+
+
+class FakeConnectionRequest:
+    redirectUrl = "https://example.com/oauth"
+
+    def __init__(self, toolset):
+        self.toolset = toolset
+
+    def wait_until_active(self, client, timeout):
+        # The freshly authorized connection can read the profile
+        self.toolset.profile_error = None
+        self.toolset.oauth_completed.set()
+        return types.SimpleNamespace(id="new-connection")
+
+
+class FakeToolset:
+    """Composio toolset with one stored Gmail connection and a scripted GMAIL_GET_PROFILE result."""
+
+    def __init__(self, profile_error=None, connections=None):
+        self.profile_error = profile_error
+        self.client = None
+        self.profile_calls = 0
+        self.oauth_started = 0
+        self.oauth_completed = threading.Event()
+        if connections is None:
+            connections = [types.SimpleNamespace(id="stored", appName="gmail", status="ACTIVE",
+                                                 integrationId="integration", updatedAt="2026-01-01")]
+        self.entity = FakeEntity(connections)
+
+    def get_entity(self, user_id):
+        return self.entity
+
+    def execute_action(self, action, entity_id, params):
+        self.profile_calls += 1
+        if self.profile_error:
+            raise self.profile_error
+        return {"data": {"response_data": {"emailAddress": "me@example.com"}}}
+
+    def initiate_connection(self, integration_id, entity_id, app):
+        self.oauth_started += 1
+        return FakeConnectionRequest(self)
+
+
+@pytest.fixture
+def profile_path(tmp_path, monkeypatch):
+    path = tmp_path / "profile.json"
+    monkeypatch.setitem(email_handler.EMAIL_CONFIG, "profile_cache", {"path": str(path), "ttl_seconds": 3600})
+    monkeypatch.setattr("webbrowser.open", lambda url: True)
+    return path
+
+
+def write_cached_profile(path):
+    path.write_text(json.dumps({"fetched_at": 0, "profile": {"emailAddress": "cached@example.com"}}))
+
+
+def make_handler(toolset):
+    return EmailHandler("integration", "me", connect=False, toolset=toolset)
+
+
+def test_warm_start_serves_the_cached_profile_without_waiting(profile_path):
+    write_cached_profile(profile_path)
+    toolset = FakeToolset(profile_error=ConnectionError("network is unreachable"))
+    handler = make_handler(toolset)
+    handler.connect()
+    assert handler.active_connection.id == "stored"
+    assert handler.user_profile["emailAddress"] == "cached@example.com"
+    assert toolset.oauth_started == 0
+
+
+def test_revoked_connection_found_in_background_starts_oauth(profile_path):
+    write_cached_profile(profile_path)
+    toolset = FakeToolset(profile_error=RuntimeError("401 Unauthorized: token has been revoked"))
+    handler = make_handler(toolset)
+    assert handler.reuse_active_connection()
+    assert toolset.oauth_completed.wait(2)
+    assert toolset.oauth_started == 1
+
+
+def test_stored_connection_that_fails_a_live_check_falls_back_to_oauth(profile_path):
+    # No cached profile, so the reused connection is validated before startup goes on
+    toolset = FakeToolset(profile_error=RuntimeError("401 Unauthorized"))
+    handler = make_handler(toolset)
+    handler.connect()
+    assert toolset.oauth_started == 1
+    assert handler.active_connection.id == "new-connection"
+
+
+def test_stored_connection_with_a_live_profile_skips_oauth(profile_path):
+    toolset = FakeToolset()
+    handler = make_handler(toolset)
+    handler.connect()
+    assert toolset.oauth_started == 0
+    assert handler.active_connection.id == "stored"
+    assert handler.user_profile["emailAddress"] == "me@example.com"
+
+
+def test_only_active_connections_of_this_integration_are_reused(profile_path):
+    connections = [
+        types.SimpleNamespace(id="other", appName="gmail", status="ACTIVE",
+                              integrationId="another-integration", updatedAt="2026-03-01"),
+        types.SimpleNamespace(id="expired", appName="gmail", status="EXPIRED",
+                              integrationId="integration", updatedAt="2026-03-01"),
+        types.SimpleNamespace(id="old", appName="GMAIL", status="active",
+                              integrationId="integration", updatedAt="2026-01-01"),
+        types.SimpleNamespace(id="new", appName="gmail", status="ACTIVE",
+                              integrationId="integration", updatedAt="2026-02-01"),
+    ]
+    handler = make_handler(FakeToolset(connections=connections))
+    assert handler.find_active_connection().id == "new"
+
+    handler = make_handler(FakeToolset(connections=connections[:2]))
+    assert handler.find_active_connection() is None
+
+
+def test_no_stored_connection_runs_oauth(profile_path):
+    toolset = FakeToolset(connections=[])
+    handler = make_handler(toolset)
+    handler.connect()
+    assert toolset.oauth_started == 1
+
+
+def test_reuse_can_be_turned_off(profile_path, monkeypatch):
+    monkeypatch.setitem(email_handler.EMAIL_CONFIG, "reuse_existing_connection", False)
+    toolset = FakeToolset()
+    handler = make_handler(toolset)
+    handler.connect()
+    assert toolset.oauth_started == 1
+
+
+def test_transient_failure_in_background_keeps_the_cached_profile(profile_path):
+    write_cached_profile(profile_path)
+    toolset = FakeToolset(profile_error=ConnectionError("network is unreachable"))
+    handler = make_handler(toolset)
+    handler.active_connection = handler.find_active_connection()
+    handler.profile_cache.load_from_disk()
+    handler._validate_connection()
+    assert toolset.oauth_started == 0
+    assert handler.active_connection.id == "stored"
+    assert handler.user_profile["emailAddress"] == "cached@example.com"
+    assert "network is unreachable" in handler.profile_cache.last_error
@@ -0,0 +1,40 @@
+import pytest
+
+from core.email_manager import ProcessingError
+
+
+def test_email_whose_reply_failed_is_processed_again_on_retry(email_manager, monkeypatch):
+    queue_draft = email_manager._queue_draft
+    calls = []
+
+    def fail_once(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise RuntimeError("draft store unavailable")
+        return queue_draft(*args, **kwargs)
+
+    monkeypatch.setattr(email_manager, "_queue_draft", fail_once)
+    with pytest.raises(ProcessingError):
+        email_manager.process_queued_email("Ann <ann@example.com>", "Can we meet Tuesday?", "t1", "m1")
+    email_manager.process_queued_email("Ann <ann@example.com>", "Can we meet Tuesday?", "t1", "m1")
+
+    assert [draft["thread_id"] for draft in email_manager.ui.queued] == ["t1"]
+    assert email_manager.memory_manager.is_thread_processed("m1")
+    email_manager.process_queued_email("Ann <ann@example.com>", "Can we meet Tuesday?", "t1", "m1")
+    assert len(email_manager.ui.queued) == 1
+
+
+def test_reused_reply_goes_to_review_even_for_a_trusted_sender(email_manager, monkeypatch):
+    from config.agent_config import AI_AGENT_CONFIG
+    from services.approval_policy import ApprovalPolicy
+
+    monkeypatch.setitem(AI_AGENT_CONFIG, "auto_reply", True)
+    email_manager.approval_policy = ApprovalPolicy({"rules": [{"name": "partners", "domains": ["example.com"]}],
+                                                    "audit_log_path": None})
+
+    email_manager._handle_response_approval("Ann <ann@example.com>", "ann@example.com", "Pricing?",
+                                            "Hi Ann, our prices are attached.", "t2", reused_from="t1")
+
+    [draft] = email_manager.ui.queued
+    assert draft["reused_from"] == "t1"
+    assert email_manager.email_handler.sent == []
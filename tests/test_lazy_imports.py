@@ -0,0 +1,58 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+HEAVY_PACKAGES = ["composio", "composio_langgraph", "langchain_core", "langchain_openai", "openai", "pydantic"]
+REQUIRED_KEYS = ("COMPOSIO_API_KEY", "GMAIL_INTEGRATION_ID", "OPENAI_API_KEY")
+
+
+def run_fresh(code):
+    """Run code in a new interpreter without API keys and return its stdout."""
+    env = {key: value for key, value in os.environ.items() if key not in REQUIRED_KEYS}
+    # An empty .env.local must not fill the keys back in
+    env.update({key: "" for key in REQUIRED_KEYS})
+    result = subprocess.run([sys.executable, "-c", f"import sys; sys.path.insert(0, {SRC!r})\n{code}"],
+                            capture_output=True, text=True, cwd=SRC, env=env, check=True)
+    return result.stdout
+
+
+def loaded_sdks_after(code):
+    out = run_fresh(f"{code}\nprint(','.join(m for m in {HEAVY_PACKAGES!r} if m in sys.modules))")
+    return [name for name in out.strip().split(",") if name]
+
+
+def test_startup_modules_load_no_sdk():
+    assert loaded_sdks_after("import main, core.email_manager, agent.ai_agent, mail.email_listener") == []
+
+
+def test_chat_models_are_built_on_first_use():
+    code = ("from services.response_generator import ResponseGenerator\n"
+            "from services.sender_info_extractor import SenderInfoExtractor\n"
+            "ResponseGenerator(); SenderInfoExtractor()")
+    assert loaded_sdks_after(code) == []
+
+
+def test_missing_keys_fail_on_access_not_import(monkeypatch):
+    import config.settings as settings
+
+    monkeypatch.delenv("GMAIL_INTEGRATION_ID", raising=False)
+    monkeypatch.delitem(settings.__dict__, "GMAIL_INTEGRATION_ID", raising=False)
+    with pytest.raises(ValueError, match="GMAIL_INTEGRATION_ID"):
+        settings.GMAIL_INTEGRATION_ID
+    with pytest.raises(AttributeError):
+        settings.NOT_A_SETTING
+
+
+def test_keys_are_read_once_and_openai_key_is_secret(monkeypatch):
+    import config.settings as settings
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.delitem(settings.__dict__, "OPENAI_API_KEY", raising=False)
+    key = settings.OPENAI_API_KEY
+    assert key.get_secret_value() == "sk-test"
+    # Cached on the module, so later reads skip the lookup
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-other")
+    assert settings.OPENAI_API_KEY is key
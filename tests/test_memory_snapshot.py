@@ -0,0 +1,134 @@
+import threading
+
+import pytest
+
+from services.memory_manager import MemoryManager
+from services.memory_snapshot import SnapshotError, load_snapshot, save_snapshot
+
+
+def saved_memory(tmp_path):
+    memory = MemoryManager()
+    memory.add_email_to_memory("Ann <ann@example.com>", "Can we meet?", "t1", "Yes, Friday.")
+    memory.add_email_to_memory("bob@example.com", "Invoice attached", "t2")
+    path = str(tmp_path / "memory.snapshot")
+    save_snapshot(memory, path)
+    return path
+
+
+def test_history_map_releases_the_mapping_once_every_record_is_decoded(tmp_path):
+    restored = MemoryManager()
+    load_snapshot(restored, saved_memory(tmp_path))
+    history = restored.email_memory
+    assert history._buffer is not None
+    history.close()
+    assert history._buffer is None
+    assert {len(history[sender]) for sender in history} == {1}
+
+
+def test_empty_or_corrupt_snapshot_raises_snapshot_error(tmp_path):
+    empty = tmp_path / "empty.snapshot"
+    empty.write_bytes(b"")
+    with pytest.raises(SnapshotError):
+        load_snapshot(MemoryManager(), str(empty))
+
+    path = saved_memory(tmp_path)
+    with open(path, "r+b") as f:
+        f.truncate(40)
+    with pytest.raises(SnapshotError):
+        load_snapshot(MemoryManager(), path)
+
+
+def test_other_format_versions_are_rejected(tmp_path):
+    path = saved_memory(tmp_path)
+    with open(path, "r+b") as f:
+        f.seek(8)
+        f.write((1).to_bytes(2, "little"))
+    with pytest.raises(SnapshotError, match="version 1"):
+        load_snapshot(MemoryManager(), path)
+
+
+def test_concurrent_readers_decode_every_history_once(tmp_path):
+    memory = MemoryManager()
+    for i in range(200):
+        memory.add_email_to_memory(f"s{i}@example.com", f"Email {i}", f"t{i}")
+    path = str(tmp_path / "memory.snapshot")
+    save_snapshot(memory, path)
+    restored = MemoryManager()
+    load_snapshot(restored, path)
+
+    errors = []
+
+    def read_all():
+        try:
+            for i in range(200):
+                assert restored.get_sender_context(f"s{i}@example.com").endswith("Email {}...\n".format(i))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=read_all) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert restored.email_memory._buffer is None
+
+
+def test_failed_save_is_reported_and_retried(tmp_path):
+    from services.memory_snapshot import SnapshotScheduler
+
+    memory = MemoryManager()
+    scheduler = SnapshotScheduler(memory, str(tmp_path / "missing" / "memory.snapshot"))
+    memory.add_email_to_memory("ann@example.com", "Hi", "t1")
+    result = scheduler.save_if_dirty()
+    assert "error" in result and scheduler.failures == 1
+
+    scheduler.path = str(tmp_path / "memory.snapshot")
+    assert scheduler.save_if_dirty()["senders"] == 1
+    assert scheduler.last_error is None
+    assert scheduler.save_if_dirty() is None
+
+
+def test_shards_written_with_another_worker_count_are_resplit(tmp_path, monkeypatch):
+    from config.agent_config import MEMORY_CONFIG
+    from services.durable_queue import sender_partition
+    from services.memory_snapshot import reshard_snapshots, shard_name, snapshot_path
+
+    monkeypatch.setitem(MEMORY_CONFIG, "snapshot", {"namespaced_path": str(tmp_path / "memory_{namespace}.snapshot")})
+    senders = [f"s{i}@example.com" for i in range(20)]
+    for index in range(2):
+        memory = MemoryManager()
+        for sender in senders:
+            if sender_partition(sender, 2) == index:
+                memory.add_email_to_memory(sender, "Hi", f"t-{sender}")
+                memory.mark_thread_processed(f"m-{sender}")
+        save_snapshot(memory, snapshot_path(None, shard_name(index, 2)))
+
+    result = reshard_snapshots(None, 3, lambda sender: sender_partition(sender, 3))
+    assert result == {"sources": 2, "senders": 20}
+    assert sorted(p.name for p in tmp_path.iterdir()) == [f"memory_shard{i}of3.snapshot" for i in range(3)]
+    for index in range(3):
+        shard = MemoryManager()
+        load_snapshot(shard, snapshot_path(None, shard_name(index, 3)))
+        assert sorted(shard.email_memory) == sorted(s for s in senders if sender_partition(s, 3) == index)
+        assert all(shard.is_thread_processed(f"m-{sender}") for sender in senders)
+    assert reshard_snapshots(None, 3, lambda sender: 0)["sources"] == 0
+
+
+def test_single_account_memory_moves_to_the_first_account(tmp_path, monkeypatch):
+    from config.agent_config import MEMORY_CONFIG
+    from services.memory_snapshot import adopt_single_account_snapshots, shard_name, snapshot_path
+
+    monkeypatch.setitem(MEMORY_CONFIG, "snapshot", {"path": str(tmp_path / "memory.snapshot"),
+                                                    "namespaced_path": str(tmp_path / "memory_{namespace}.snapshot")})
+    memory = MemoryManager()
+    memory.add_email_to_memory("ann@example.com", "Hi", "t1")
+    save_snapshot(memory, snapshot_path())
+    save_snapshot(memory, snapshot_path(None, shard_name(0, 2)))
+
+    adopted = adopt_single_account_snapshots("alice")
+    assert sorted(adopted) == sorted([snapshot_path("alice"), snapshot_path("alice", shard_name(0, 2))])
+    restored = MemoryManager()
+    load_snapshot(restored, snapshot_path("alice"))
+    assert list(restored.email_memory) == ["ann@example.com"]
+    assert adopt_single_account_snapshots("alice") == []
@@ -0,0 +1,44 @@
+from services.memory_manager import MemoryManager
+from services.memory_summarizer import LocalSummaryBackend, MemorySummarizer
+
+CONFIG = {"keep_recent_raw": 2, "compact_batch_size": 2, "max_summary_chars": 1200}
+
+
+class FlakyBackend:
+    """Fails the first job, then folds like the local backend."""
+
+    def __init__(self):
+        self.local = LocalSummaryBackend(CONFIG)
+        self.calls = []
+
+    def summarize(self, sender, summary, emails):
+        self.calls.append([email["email"] for email in emails])
+        if len(self.calls) == 1:
+            raise RuntimeError("model unavailable")
+        return self.local.summarize(sender, summary, emails)
+
+
+def add_emails(memory, count):
+    for i in range(count):
+        memory.add_email_to_memory("ann@example.com", f"Email {i}. More text", f"t{i}", f"Reply {i}")
+        memory.summarizer.wait_idle()
+
+
+def test_older_emails_are_folded_into_the_summary():
+    memory = MemoryManager(MemorySummarizer(LocalSummaryBackend(CONFIG), CONFIG))
+    add_emails(memory, 4)
+    summary = memory.get_sender_summary("ann@example.com")
+    assert summary.splitlines() == ["- They wrote: Email 0 (replied: Reply 0)", "- They wrote: Email 1 (replied: Reply 1)"]
+    assert "Summary of earlier conversations" in memory.get_sender_context("ann@example.com")
+
+
+def test_failed_job_is_requeued_with_the_next_batch():
+    backend = FlakyBackend()
+    memory = MemoryManager(MemorySummarizer(backend, CONFIG))
+    add_emails(memory, 4)
+    assert memory.summarizer.failed_jobs == 1
+    assert memory.get_sender_summary("ann@example.com") == ""
+    add_emails(memory, 1)
+    assert backend.calls == [["Email 0. More text", "Email 1. More text"],
+                             ["Email 0. More text", "Email 1. More text", "Email 2. More text"]]
+    assert memory.get_sender_summary("ann@example.com").count("They wrote") == 3
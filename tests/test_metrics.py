@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+
+from services.metrics import MetricsRegistry
+
+
+def test_render_counters_with_labels():
+    registry = MetricsRegistry(prefix="test")
+    registry.counter("emails_total", "Emails seen")
+    registry.inc("emails_total", account="a")
+    registry.inc("emails_total", 2, account="b")
+
+    lines = registry.render().splitlines()
+
+    assert "# HELP test_emails_total Emails seen" in lines
+    assert "# TYPE test_emails_total counter" in lines
+    assert 'test_emails_total{account="a"} 1' in lines
+    assert 'test_emails_total{account="b"} 2' in lines
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry(prefix="test")
+    registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 0.5, 3.0):
+        registry.observe("latency_seconds", seconds, stage="reply")
+
+    lines = registry.render().splitlines()
+
+    assert 'test_latency_seconds_bucket{stage="reply",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{stage="reply",le="1.0"} 3' in lines
+    assert 'test_latency_seconds_bucket{stage="reply",le="+Inf"} 4' in lines
+    assert 'test_latency_seconds_sum{stage="reply"} 4.05' in lines
+    assert 'test_latency_seconds_count{stage="reply"} 4' in lines
+
+
+def test_callbacks_sharing_a_name_render_side_by_side():
+    registry = MetricsRegistry(prefix="test")
+    registry.register_callback("pending", "gauge", "Pending drafts", lambda: 3, account="a")
+    registry.register_callback("pending", "gauge", "Pending drafts", lambda: 5, account="b")
+    registry.register_callback("memory", "gauge", "Memory entries",
+                               lambda: {(("kind", "sender"),): 7}, account="a")
+
+    lines = registry.render().splitlines()
+
+    assert 'test_pending{account="a"} 3' in lines
+    assert 'test_pending{account="b"} 5' in lines
+    assert 'test_memory{account="a",kind="sender"} 7' in lines
+    assert lines.count("# TYPE test_pending gauge") == 1
+
+
+def test_duplicate_callback_raises():
+    registry = MetricsRegistry(prefix="test")
+    registry.register_callback("pending", "gauge", "Pending drafts", lambda: 1, account="a")
+
+    with pytest.raises(ValueError):
+        registry.register_callback("pending", "gauge", "Pending drafts", lambda: 2, account="a")
+
+
+def test_finished_thread_shards_are_retired_but_counted():
+    registry = MetricsRegistry(prefix="test")
+    registry.counter("emails_total", "Emails seen")
+    registry.inc("emails_total")
+    workers = [threading.Thread(target=registry.inc, args=("emails_total",)) for _ in range(5)]
+    for worker in workers:
+        worker.start()
+        worker.join()
+
+    assert 'test_emails_total 6' in registry.render().splitlines()
+    # Only the main thread's shard is still tracked
+    assert len(registry._shards) == 1
+    assert 'test_emails_total 6' in registry.render().splitlines()
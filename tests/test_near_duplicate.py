@@ -0,0 +1,60 @@
+from services.near_duplicate import NearDuplicateIndex, personalize_greeting
+
+FORM = ("New contact form submission.\nName: {name}\nCompany: Example Corp\n"
+        "Message: Hello, I would like to know more about pricing for the Pro plan for our team. "
+        "Could you send me details about discounts and the onboarding process? Thanks.")
+FORM_REPLY = ("Hi {name},\n\nThanks for your interest in the Pro plan. I will send the pricing and discount "
+              "details for Example Corp shortly.\n\nBest regards,\nNicolas")
+
+REFUND = ("Hello, I was charged twice and would like a refund for order {order}, which was {amount} dollars. "
+          "The charge appeared on my card ending {card} and I have not received any confirmation email "
+          "about the cancellation I requested last week. Please help.")
+REFUND_REPLY = ("Hi Alice,\n\nI am sorry about the double charge. We have issued a refund of {amount} dollars "
+                "for order {order} to your card ending {card}.\n\nBest regards,\nNicolas")
+
+
+def index() -> NearDuplicateIndex:
+    return NearDuplicateIndex({"max_distance": 5, "bands": 8, "min_words": 20})
+
+
+def test_templated_email_reuses_draft():
+    ix = index()
+    assert ix.add(FORM.format(name="Alice Smith"), FORM_REPLY.format(name="Alice"),
+                  "Alice Smith <alice@a.com>", {"company": "Example Corp"}, "t1")
+    match = ix.find(FORM.format(name="Bob Jones"), "Bob Jones <bob@b.com>")
+    assert match is not None and match["thread_id"] == "t1"
+    assert personalize_greeting(match["response"], "Bob").startswith("Hi Bob,\n")
+    assert ix.get_stats()["hit_rate"] == 1.0
+
+
+def test_numbers_are_part_of_the_fingerprint():
+    ix = index()
+    alice = REFUND.format(order="48213", amount="1299", card="4421")
+    bob = REFUND.format(order="90017", amount="15", card="1234")
+    assert ix.fingerprint(alice, "Alice <alice@a.com>") != ix.fingerprint(bob, "Bob <bob@b.com>")
+
+
+def test_draft_with_another_senders_details_is_not_reused():
+    ix = index()
+    details = {"order": "48213", "amount": "1299", "card": "4421"}
+    assert ix.add(REFUND.format(**details), REFUND_REPLY.format(**details),
+                  "Alice <alice@a.com>", {}, "t1")
+    bob = REFUND.format(order="90017", amount="15", card="1234")
+    assert ix.find(bob, "Bob <bob@b.com>") is None
+    assert ix.get_stats()["hits"] == 0
+    # The same details asked again are safe to answer with the same draft
+    assert ix.find(REFUND.format(**details), "Alice <alice2@a.com>") is not None
+
+
+def test_draft_with_unknown_address_is_not_reused():
+    ix = index()
+    reply = FORM_REPLY.format(name="Alice").replace("shortly.", "shortly to sales@example-corp.com.")
+    assert ix.add(FORM.format(name="Alice Smith"), reply, "Alice Smith <alice@a.com>", {}, "t1")
+    assert ix.find(FORM.format(name="Bob Jones"), "Bob Jones <bob@b.com>") is None
+    assert ix.get_stats()["rejected"] == 1
+
+
+def test_reply_naming_recipient_is_not_indexed():
+    ix = index()
+    reply = FORM_REPLY.format(name="Alice").replace("shortly.", "shortly, Alice.")
+    assert not ix.add(FORM.format(name="Alice Smith"), reply, "Alice Smith <alice@a.com>", {}, "t1")
@@ -0,0 +1,85 @@
+from services.outbound_queue import OutboundQueue
+
+
+class FlakySender:
+    """Fails with the given errors in turn, then succeeds."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self, recipient_email, message_text, thread_id):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+
+
+def make_queue(path, send_func):
+    return OutboundQueue(send_func, workers=1, max_attempts=3, base_delay=0, max_delay=0, path=str(path))
+
+
+def test_timeout_is_dead_lettered_as_unknown_without_retrying(tmp_path):
+    sender = FlakySender(TimeoutError("read timed out"))
+    queue = make_queue(tmp_path / "outbound.json", sender)
+    outcome = queue.submit("a@example.com", "Thanks", "t1").result(timeout=2)
+    assert not outcome["success"] and outcome["unknown"]
+    assert sender.calls == 1
+    assert queue.list_dead_letters()[0]["outcome"] == "unknown"
+    queue.stop()
+
+
+def test_sent_keys_and_dead_letters_survive_a_restart(tmp_path):
+    path = tmp_path / "outbound.json"
+    queue = make_queue(path, FlakySender())
+    assert queue.submit("a@example.com", "Thanks", "t1").result(timeout=2)["success"]
+    failing = FlakySender(*[RuntimeError("503")] * 3)
+    assert not queue.submit("b@example.com", "Hello", "t2", send_func=failing).result(timeout=2)["success"]
+    queue.stop()
+
+    sender = FlakySender()
+    restarted = make_queue(path, None)
+    restarted.register_sender(None, sender)
+    assert restarted.submit("a@example.com", "Thanks", "t1").result(timeout=2)["duplicate"]
+    [letter] = restarted.list_dead_letters()
+    assert letter["recipient_email"] == "b@example.com"
+    assert restarted.retry_dead_letter(letter["key"]).result(timeout=2)["success"]
+    assert sender.calls == 1
+    assert make_queue(path, None).list_dead_letters() == []
+    restarted.stop()
+
+
+def test_failing_on_sent_is_recorded(tmp_path):
+    queue = make_queue(tmp_path / "outbound.json", FlakySender())
+
+    def on_sent():
+        raise ValueError("memory full")
+
+    assert queue.submit("a@example.com", "Thanks", "t1", on_sent=on_sent).result(timeout=2)["success"]
+    queue.stop()
+    assert queue.get_stats()["callback_errors"] == 1
+    assert "memory full" in queue.last_error
+
+
+def test_state_log_is_appended_and_compacted_on_restart(tmp_path):
+    path = tmp_path / "outbound.jsonl"
+    queue = make_queue(path, FlakySender())
+    for i in range(3):
+        assert queue.submit("a@example.com", f"Reply {i}", "t1").result(timeout=2)["success"]
+    queue.stop()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"op": "sent", "key": "torn')  # A crash in the middle of an append
+    restarted = make_queue(path, FlakySender())
+    assert len(path.read_text().splitlines()) == 3
+    assert restarted.submit("a@example.com", "Reply 0", "t1").result(timeout=2)["duplicate"]
+    restarted.stop()
+
+
+def test_queue_retries_again_after_stop(tmp_path):
+    queue = make_queue(tmp_path / "outbound.jsonl", FlakySender())
+    assert queue.submit("a@example.com", "Thanks", "t1").result(timeout=2)["success"]
+    queue.stop()
+    flaky = FlakySender(RuntimeError("503"))
+    outcome = queue.submit("a@example.com", "Thanks again", "t1", send_func=flaky).result(timeout=2)
+    queue.stop()
+    assert outcome["success"] and outcome["attempts"] == 2
+    assert queue.get_stats()["retries"] == 1
@@ -0,0 +1,59 @@
+import threading
+
+from services.priority_scheduler import PriorityScheduler
+
+
+class StubMemory:
+    """Memory with no history, so every email gets the same priority."""
+
+    email_memory = {}
+    sender_info = {}
+
+    def count_prior_replies(self, sender):
+        return 0
+
+
+def test_stop_reports_emails_left_in_the_queue():
+    release = threading.Event()
+    scheduler = PriorityScheduler(StubMemory(), lambda *args: release.wait(2), {"workers": 1})
+    for i in range(3):
+        scheduler.submit("a@example.com", "Hello", f"t{i}")
+
+    dropped = scheduler.stop(timeout=0.1)
+    release.set()
+    assert [item["thread_id"] for item in dropped] == ["t1", "t2"]
+    assert scheduler.get_stats()["dropped"] == 2
+
+
+def test_emails_of_one_thread_are_processed_in_arrival_order():
+    started = threading.Event()
+    release = threading.Event()
+    order = []
+
+    def process(sender, email_text, thread_id, message_id):
+        if thread_id == "busy":
+            started.set()
+            release.wait(2)
+        order.append(message_id)
+
+    scheduler = PriorityScheduler(StubMemory(), process, {
+        "workers": 1, "urgency_keywords": ["urgent"], "weights": {"urgent": 3, "active_thread": 2}
+    })
+    scheduler.submit("c@example.com", "Hold the worker", "busy", "m0")
+    assert started.wait(2)
+    first = scheduler.submit("a@example.com", "Question about the plan", "t1", "m1")
+    follow_up = scheduler.submit("a@example.com", "Urgent: any news?", "t1", "m2")
+    assert follow_up["score"] > first["score"]
+    assert "active_thread" not in follow_up["signals"]
+    assert scheduler.get_stats()["waiting"] == 2
+
+    release.set()
+    assert scheduler.stop(timeout=2) == []
+    assert order == ["m0", "m1", "m2"]
+
+
+def test_thread_is_active_once_one_of_its_emails_was_processed():
+    scheduler = PriorityScheduler(StubMemory(), lambda *args: None, {"workers": 1})
+    scheduler.submit("a@example.com", "Hello", "t1")
+    scheduler.stop(timeout=2)
+    assert "active_thread" in scheduler.score("a@example.com", "Hello again", "t1")["signals"]
@@ -0,0 +1,29 @@
+import time
+
+from services.profile_cache import ProfileCache
+
+
+def test_failed_refresh_is_not_retried_before_the_retry_interval():
+    calls = []
+
+    def failing_loader():
+        calls.append(1)
+        raise RuntimeError("gmail down")
+
+    cache = ProfileCache(failing_loader, ttl_seconds=0, retry_seconds=60)
+    cache._profile = {"emailAddress": "me@example.com"}
+    for _ in range(20):
+        assert cache.get() == {"emailAddress": "me@example.com"}
+        time.sleep(0.001)
+    deadline = time.time() + 2
+    while cache._refreshing and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(calls) == 1
+    assert cache.last_error == "gmail down"
+
+    cache._attempted_at -= 60
+    cache.get()
+    deadline = time.time() + 2
+    while len(calls) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(calls) == 2
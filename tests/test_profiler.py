@@ -0,0 +1,106 @@
+import pstats
+import threading
+import time
+
+import pytest
+
+from services.profiler import ProfilerController
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    controller = ProfilerController({"output_dir": str(tmp_path), "sample_interval_seconds": 0.001,
+                                     "default_window_seconds": 0})
+    yield controller
+    controller.stop()
+
+
+def busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def sampler_threads():
+    return [t for t in threading.enumerate() if t.name == "profiler-sampler"]
+
+
+def test_start_rejects_unknown_modes_and_a_second_window(profiler):
+    with pytest.raises(ValueError):
+        profiler.start("perf")
+    profiler.start()
+    with pytest.raises(RuntimeError):
+        profiler.start(ProfilerController.CPROFILE)
+
+
+def test_stop_without_a_window_is_a_no_op(profiler):
+    status = profiler.stop()
+    assert status["mode"] is None
+    assert "stopped_mode" not in status
+
+
+def test_sampling_window_writes_stacks_rooted_at_the_email(profiler):
+    profiler.start(ProfilerController.SAMPLING)
+    assert profiler.active
+    with profiler.email("trace-1"):
+        busy(0.1)
+
+    status = profiler.stop()
+
+    assert status["stopped_mode"] == "sampling"
+    assert not profiler.active
+    assert sampler_threads() == []
+    assert status["emails_kept"] == 1
+    [path] = status["files"]
+    assert path.endswith(".folded")
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert any(line.startswith("email trace-1;") and "busy (test_profiler.py" in line for line in lines)
+
+
+def test_cprofile_window_writes_one_profile_per_email(profiler):
+    profiler.start(ProfilerController.CPROFILE)
+    with profiler.email("trace-1"):
+        busy(0.01)
+    with profiler.email("trace-2"):
+        busy(0.01)
+
+    status = profiler.stop()
+
+    assert len(status["files"]) == 2
+    assert all(path.endswith(".prof") for path in status["files"])
+    functions = {name for _, _, name in pstats.Stats(status["files"][0]).stats}
+    assert "busy" in functions
+
+
+def test_fast_emails_are_dropped_below_the_minimum(profiler):
+    profiler.start(ProfilerController.CPROFILE, min_email_seconds=0.05)
+    with profiler.email("fast"):
+        pass
+    with profiler.email("slow"):
+        busy(0.06)
+
+    status = profiler.stop()
+
+    assert status["emails_dropped"] == 1
+    assert status["emails_kept"] == 1
+    assert len(status["files"]) == 1
+    assert "email-slow" in status["files"][0]
+
+
+def test_window_stops_by_itself_and_can_be_restarted(profiler):
+    profiler.start(ProfilerController.SAMPLING, seconds=0.05)
+    deadline = time.monotonic() + 2
+    while profiler.active and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not profiler.active
+
+    profiler.start(ProfilerController.CPROFILE)
+    assert profiler.status()["mode"] == "cprofile"
+    assert profiler.status()["samples"] == 0
+
+
+def test_emails_outside_a_window_are_not_profiled(profiler):
+    with profiler.email("trace-1"):
+        busy(0.01)
+    assert profiler.status()["emails_kept"] == 0
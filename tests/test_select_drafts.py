@@ -0,0 +1,36 @@
+import pytest
+
+from services.draft_inbox import DraftInbox
+
+
+@pytest.fixture
+def manager(email_manager):
+    for thread in range(5):
+        email_manager.draft_inbox.add("Ann <a@example.com>", "a@example.com", "Hi", "Hello", f"t{thread}")
+    email_manager.draft_inbox.set_status(3, DraftInbox.SENT)
+    return email_manager
+
+
+def test_ranges_select_only_pending_drafts(manager):
+    assert manager.select_drafts("1-999999999") == [1, 2, 4, 5]
+    assert manager.select_drafts("2 #2-4") == [2, 4]
+
+
+def test_repeated_ids_are_selected_once_in_first_named_order(manager):
+    assert manager.select_drafts("2 2") == [2]
+    assert manager.select_drafts("5 1-5 2") == [5, 1, 2, 4]
+
+
+@pytest.mark.parametrize("selection", ["5-2", "3--5", "-2", "x"])
+def test_reversed_negative_or_malformed_ranges_are_rejected(manager, selection):
+    with pytest.raises(ValueError):
+        manager.select_drafts(selection)
+
+
+def test_approved_results_follow_the_selection_order(manager):
+    outcome = manager.approve_drafts(manager.select_drafts("5 3 1"))
+
+    assert [r["draft_id"] for r in outcome["results"]] == [5, 3, 1]
+    assert outcome["sent"] == 2
+    assert outcome["failed"] == 1
+    assert len(manager.email_handler.sent) == 2
@@ -0,0 +1,15 @@
+from services.sender_filter import SenderFilter
+
+
+def test_wildcard_without_local_part_matches_the_domain():
+    sender_filter = SenderFilter(["news*.example.com", "@promo?.shop.com"], [], block_noreply=False)
+    assert sender_filter.check("Ann <ann@news1.example.com>") == "wildcard:news*.example.com"
+    assert sender_filter.check("bob@promo7.shop.com") == "wildcard:@promo?.shop.com"
+    assert sender_filter.check("news@example.com") is None
+
+
+def test_address_wildcards_still_match_the_whole_address():
+    sender_filter = SenderFilter(["*@news.*", "promo-?@*"], [], block_noreply=False)
+    assert sender_filter.check("digest@news.example.org") == "wildcard:*@news.*"
+    assert sender_filter.check("promo-1@shop.com") == "wildcard:promo-?@*"
+    assert sender_filter.check("ann@example.com") is None
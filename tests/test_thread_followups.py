@@ -0,0 +1,57 @@
+from services.email_processor import EmailProcessor
+from services.memory_manager import MemoryManager
+from services.response_generator import ResponseGenerator
+from services.sender_info_extractor import SenderInfoExtractor
+from services.thread_context import ThreadContextFetcher
+
+USER_INFO = {"name": "Nicolas", "email": "me@example.com"}
+
+
+class Reply:
+    content = "Thanks, see you Tuesday."
+    usage_metadata = {"input_tokens": 1, "output_tokens": 1}
+
+
+class Model:
+    def invoke(self, messages):
+        return Reply()
+
+
+class Gmail:
+    def __init__(self):
+        self.thread = [{"id": "m1", "sender": "alice@example.com", "text": "Can we meet?"}]
+        self.thread_fetches = 0
+        self.message_fetches = 0
+
+    def fetch_thread_messages(self, thread_id):
+        self.thread_fetches += 1
+        return list(self.thread)
+
+    def fetch_message(self, message_id):
+        self.message_fetches += 1
+        return next(m for m in self.thread if m["id"] == message_id)
+
+
+def processor(gmail):
+    return EmailProcessor(MemoryManager(), SenderInfoExtractor(model=Model()), ResponseGenerator(model=Model()),
+                          ThreadContextFetcher(gmail.fetch_thread_messages, gmail.fetch_message))
+
+
+def test_follow_up_in_known_thread_is_processed_incrementally():
+    gmail = Gmail()
+    p = processor(gmail)
+    assert p.process_email("Alice <alice@example.com>", "Can we meet?", "t1", USER_INFO, "m1")["success"]
+    gmail.thread.append({"id": "m2", "sender": "alice@example.com", "text": "Tuesday?"})
+    assert p.process_email("Alice <alice@example.com>", "Tuesday?", "t1", USER_INFO, "m2")["success"]
+    assert (gmail.thread_fetches, gmail.message_fetches) == (1, 1)
+    # The same message delivered again is still skipped
+    assert p.process_email("Alice <alice@example.com>", "Tuesday?", "t1", USER_INFO, "m2")["reason"] == "already_processed"
+
+
+def test_current_message_is_not_repeated_without_message_id():
+    gmail = Gmail()
+    fetcher = ThreadContextFetcher(gmail.fetch_thread_messages, gmail.fetch_message)
+    assert fetcher.get_context("t1") == ""
+    gmail.thread.append({"id": "m2", "sender": "alice@example.com", "text": "Tuesday?"})
+    context = fetcher.get_context("t1")
+    assert "Can we meet?" in context and "Tuesday?" not in context
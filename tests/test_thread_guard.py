@@ -0,0 +1,72 @@
+from services.memory_manager import MemoryManager
+from services.memory_snapshot import load_snapshot, save_snapshot
+from services.thread_guard import ThreadGuard
+
+DAY = 24 * 3600
+
+
+class Clock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_guard(clock):
+    return ThreadGuard(ttl_seconds=30 * DAY, exact_window_seconds=6 * 3600, bucket_seconds=600,
+                       expected_ids_per_generation=1000, false_positive_rate=1e-6, clock=clock)
+
+
+def test_recent_ids_can_be_unmarked_until_they_leave_the_exact_window():
+    clock = Clock()
+    guard = make_guard(clock)
+    guard.add("m1")
+    guard.add("m2")
+    guard.discard("m1")
+    assert "m1" not in guard and "m2" in guard
+    clock.now += DAY
+    assert "m2" in guard
+    assert guard.get_stats()["recent_ids"] == 0
+    guard.discard("m2")  # Already in the filter: cannot be removed
+    assert "m2" in guard
+
+
+def test_ids_are_remembered_for_the_whole_ttl_across_rotations():
+    clock = Clock()
+    guard = make_guard(clock)
+    added = {}
+    for day in range(0, 60, 2):
+        clock.now = day * DAY
+        guard.add(f"m{day}")
+        added[f"m{day}"] = clock.now
+    assert guard.get_stats()["bloom_generations"] <= 4
+    for thread_id, added_at in added.items():
+        if clock.now - added_at < 30 * DAY:
+            assert thread_id in guard
+
+    clock.now += 46 * DAY
+    assert not any(thread_id in guard for thread_id in added)
+    assert guard.get_stats()["bloom_generations"] == 0
+
+
+def test_guard_state_survives_a_snapshot(tmp_path):
+    memory = MemoryManager()
+    memory.mark_thread_processed("recent")
+    path = str(tmp_path / "memory.snapshot")
+    save_snapshot(memory, path)
+    restored = MemoryManager()
+    load_snapshot(restored, path)
+    assert restored.is_thread_processed("recent")
+    assert not restored.is_thread_processed("other")
+
+
+def test_folded_ids_survive_to_state_and_restore_state():
+    clock = Clock()
+    guard = make_guard(clock)
+    guard.add("old")
+    clock.now += DAY
+    guard.add("new")
+    copy = make_guard(clock)
+    copy.restore_state(guard.to_state())
+    assert "old" in copy and "new" in copy and "unseen" not in copy
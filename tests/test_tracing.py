@@ -0,0 +1,80 @@
+import io
+import json
+import threading
+
+import pytest
+
+from services.event_log import JsonLinesLog
+from services.tracing import LatencyHistogram, Tracer
+
+
+def make_tracer():
+    stream = io.StringIO()
+    tracer = Tracer({"enabled": True, "export_path": None, "bucket_growth": 1.05},
+                    export_log=JsonLinesLog(stream=stream, flush_every_events=1))
+    return tracer, stream
+
+
+def spans(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_nested_spans_share_the_trace_and_nested_traces_restore_the_outer_one():
+    tracer, stream = make_tracer()
+    with tracer.trace("outer"):
+        with tracer.span("generate_response"):
+            with tracer.span("extract_sender_info"):
+                pass
+            with tracer.trace() as inner:
+                with tracer.span("generate_alternative"):
+                    pass
+        assert tracer.current_trace_id == "outer"
+    assert tracer.current_trace_id is None
+
+    records = spans(stream)
+    assert [r["stage"] for r in records] == ["extract_sender_info", "generate_alternative", "generate_response"]
+    assert [r["trace_id"] for r in records] == ["outer", inner, "outer"]
+    assert records[0]["start"] >= records[2]["start"]
+    assert records[0]["duration_ms"] <= records[2]["duration_ms"]
+
+
+def test_trace_ids_are_per_thread_and_can_be_passed_explicitly():
+    tracer, stream = make_tracer()
+    with tracer.trace("email-1"):
+        worker = threading.Thread(target=lambda: tracer.record("reply_to_thread", 5.0, trace_id="email-1"))
+        other = threading.Thread(target=lambda: tracer.record("reply_to_thread", 5.0))
+        for thread in (worker, other):
+            thread.start()
+        for thread in (worker, other):
+            thread.join()
+    assert sorted(str(r["trace_id"]) for r in spans(stream)) == ["None", "email-1"]
+
+
+def test_failed_span_records_the_error_and_reraises():
+    tracer, stream = make_tracer()
+    with pytest.raises(ValueError):
+        with tracer.span("generate_response"):
+            raise ValueError("bad prompt")
+    assert spans(stream)[0]["error"] == "ValueError"
+    assert tracer.histograms["generate_response"].count == 1
+
+
+def test_histogram_percentiles_are_within_the_bucket_growth():
+    histogram = LatencyHistogram(growth=1.05)
+    for ms in range(1, 1001):
+        histogram.record(float(ms))
+    summary = histogram.summary()
+    assert summary["count"] == 1000 and summary["max_ms"] == 1000.0
+    for fraction, exact in ((0.50, 500), (0.95, 950), (0.99, 990)):
+        assert exact <= histogram.percentile(fraction) <= exact * 1.05
+    assert LatencyHistogram().percentile(0.5) == 0.0
+
+
+def test_latency_report_lists_pipeline_stages_in_order():
+    tracer, _stream = make_tracer()
+    tracer.record("custom_stage", 1.0)
+    tracer.record("reply_to_thread", 1.0)
+    tracer.record("extract_sender_info", 1.0)
+    assert [row["stage"] for row in tracer.get_latency_report()] == [
+        "extract_sender_info", "reply_to_thread", "custom_stage"
+    ]
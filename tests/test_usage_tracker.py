@@ -0,0 +1,88 @@
+from types import SimpleNamespace
+
+from services.usage_tracker import UsageTracker
+
+
+def response(input_tokens, output_tokens):
+    return SimpleNamespace(usage_metadata={"input_tokens": input_tokens, "output_tokens": output_tokens})
+
+
+def make_tracker(**config):
+    return UsageTracker({"daily_token_budget": 0, "path": None,
+                         "prices_per_million_tokens": {"big": {"input": 2.0, "output": 8.0}}, **config})
+
+
+def test_totals_are_kept_per_sender_stage_and_model():
+    tracker = make_tracker()
+    tracker.record("generate_response", "big", response(100, 50), sender="a@example.com")
+    tracker.record("generate_response", "big", response(10, 5), sender="b@example.com")
+    tracker.record("extract_sender_info", "small", response(20, 0), sender="a@example.com")
+    tracker.record("summarize", "small", response(7, 3))
+
+    report = tracker.get_report()
+
+    assert report["total"]["calls"] == 4
+    assert tracker.tokens_used_today() == 195
+    by_sender = {row["name"]: row for row in report["by_sender"]}
+    assert by_sender["a@example.com"]["calls"] == 2
+    assert by_sender["a@example.com"]["input_tokens"] == 120
+    assert report["senders"] == 2
+    by_stage = {row["name"]: row for row in report["by_stage"]}
+    assert by_stage["generate_response"]["output_tokens"] == 55
+    assert by_stage["summarize"]["calls"] == 1
+    by_model = {row["name"]: row for row in report["by_model"]}
+    assert by_model["big"]["cost"] == (110 * 2.0 + 55 * 8.0) / 1_000_000
+    assert by_model["small"]["cost"] == 0.0
+    # Senders are ranked by tokens spent
+    assert report["by_sender"][0]["name"] == "a@example.com"
+
+
+def test_budget_switches_callers_to_cheaper_behavior():
+    tracker = make_tracker(daily_token_budget=100)
+    tracker.record("generate_response", "big", response(60, 30))
+    assert not tracker.budget_exhausted()
+    assert not tracker.use_cheaper_behavior("generate_response")
+
+    tracker.record("generate_response", "big", response(5, 5))
+
+    assert tracker.budget_exhausted()
+    assert tracker.use_cheaper_behavior("generate_response")
+    assert tracker.use_cheaper_behavior("extract_sender_info")
+    report = tracker.get_report()
+    assert report["budget_exhausted"]
+    assert report["budget_fallbacks"] == {"generate_response": 1, "extract_sender_info": 1}
+
+
+def test_no_budget_means_unlimited():
+    tracker = make_tracker()
+    tracker.record("generate_response", "big", response(10_000_000, 0))
+
+    assert not tracker.budget_exhausted()
+    assert not tracker.use_cheaper_behavior("generate_response")
+
+
+def test_totals_survive_a_restart(tmp_path):
+    path = str(tmp_path / "usage.json")
+    tracker = make_tracker(path=path)
+    tracker.record("generate_response", "big", response(40, 2), sender="a@example.com")
+    tracker.save()
+
+    restored = make_tracker(path=path)
+
+    assert restored.tokens_used_today() == 42
+    assert restored.get_report()["by_sender"][0]["name"] == "a@example.com"
+
+
+def test_failed_saves_are_counted(tmp_path):
+    # A directory where the totals file should be makes every write fail
+    (tmp_path / "usage.json.tmp").mkdir()
+    tracker = make_tracker(path=str(tmp_path / "usage.json"))
+    # The first record saves too, since nothing was saved yet
+    tracker.record("generate_response", "big", response(1, 1))
+
+    tracker.save()
+
+    report = tracker.get_report()
+    assert report["save_errors"] == 2
+    assert tracker.tokens_used_today() == 2
+    assert report["last_error"].startswith("Could not write usage totals")
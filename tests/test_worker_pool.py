@@ -0,0 +1,47 @@
+import threading
+
+from core.worker_pool import PartitionWorker, QueueDispatcher
+from services.durable_queue import DurableQueue
+
+
+class RecordingAgent:
+    """Records queued emails; fails for the senders listed in fail_for."""
+
+    def __init__(self, fail_for=()):
+        self.fail_for = set(fail_for)
+        self.processed = []
+
+    def process_queued_email(self, sender, message_text, thread_id, message_id=None):
+        if sender in self.fail_for:
+            raise RuntimeError("agent failed")
+        self.processed.append((sender, message_text, thread_id, message_id))
+
+
+def make_queue(tmp_path):
+    return DurableQueue(1, path=str(tmp_path / "queue.sqlite3"), max_attempts=1, retry_delay_seconds=0)
+
+
+def test_dispatched_emails_are_processed_and_acknowledged(tmp_path):
+    queue = make_queue(tmp_path)
+    dispatcher = QueueDispatcher(queue, account="me@example.com")
+    dispatcher.process_incoming_email("a@example.com", "first", "t1", "m1")
+    dispatcher.process_incoming_email("a@example.com", "second", "t1", "m2")
+    agent = RecordingAgent()
+    stop = threading.Event()
+    worker = PartitionWorker(0, queue, {"me@example.com": agent}, poll_interval=0.01,
+                             on_tick=lambda: stop.set() if len(agent.processed) == 2 else None)
+    worker.run(stop)
+    assert [row[1] for row in agent.processed] == ["first", "second"]
+    assert queue.depth() == {0: 0}
+
+
+def test_failed_event_is_parked_and_the_partition_moves_on(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.put({"sender": "bad@example.com", "message_text": "x", "thread_id": "t1"})
+    queue.put({"sender": "good@example.com", "message_text": "y", "thread_id": "t2"})
+    agent = RecordingAgent(fail_for={"bad@example.com"})
+    worker = PartitionWorker(0, queue, {None: agent}, poll_interval=0.01)
+    worker.process(queue.claim(0))
+    worker.process(queue.claim(0))
+    assert [row[0] for row in agent.processed] == ["good@example.com"]
+    assert queue.get_stats()["failed"] == 1